@@ -2,6 +2,10 @@ import { useState, useRef } from "react";
 import "../Style/reportsummary.css";
 import { API_BASE_URL } from "../config/api";
 
+// Poll the job status every 2 s, for at most 10 minutes
+const POLL_INTERVAL_MS = 2000;
+const MAX_POLL_ATTEMPTS = 300;
+
 const ReportSummary = () => {
   const [uploadProgress, setUploadProgress] = useState(0);
   const [processing, setProcessing] = useState(false);
@@ -12,7 +16,55 @@ const ReportSummary = () => {
   const xhrRef = useRef(null);
   const fileInputRef = useRef(null);
 
-  const startUpload = (file) => {
+  const waitForProcessing = async (id) => {
+    const token = localStorage.getItem("access_token");
+
+    for (let attempt = 0; attempt < MAX_POLL_ATTEMPTS; attempt++) {
+      const res = await fetch(`${API_BASE_URL}/api/reports/${id}/status/`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+      });
+      const data = await res.json();
+
+      if (!res.ok || data.status === "failed") {
+        throw new Error(data.error || "Processing failed");
+      }
+      if (data.status === "done") {
+        return data;
+      }
+
+      await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    }
+
+    throw new Error("Processing is taking longer than expected. Please check your reports later.");
+  };
+
+  // Ask the server whether it already has this exact file, so it need not be sent
+  const precheckFile = async (file) => {
+    try {
+      const buffer = await file.arrayBuffer();
+      const hash = await crypto.subtle.digest("SHA-256", buffer);
+      const sha256 = Array.from(new Uint8Array(hash))
+        .map((b) => b.toString(16).padStart(2, "0"))
+        .join("");
+
+      const token = localStorage.getItem("access_token");
+      const res = await fetch(`${API_BASE_URL}/api/reports/precheck/`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          ...(token ? { Authorization: `Bearer ${token}` } : {}),
+        },
+        body: JSON.stringify({ sha256, size: file.size, filename: file.name }),
+      });
+      const data = await res.json();
+      return res.status === 201 && data.exists ? data.report_id : null;
+    } catch {
+      // Fall back to a normal upload
+      return null;
+    }
+  };
+
+  const startUpload = async (file) => {
     setError("");
     setReportId(null);
     setUploadProgress(0);
@@ -22,6 +74,15 @@ const ReportSummary = () => {
       size: (file.size / 1024 / 1024).toFixed(2) + " MB",
     });
 
+    setProcessing(true);
+    const knownReportId = await precheckFile(file);
+    if (knownReportId) {
+      setUploadProgress(100);
+      setReportId(knownReportId);
+      setProcessing(false);
+      return;
+    }
+
     const formData = new FormData();
     formData.append("report", file);
 
@@ -41,15 +102,19 @@ const ReportSummary = () => {
       }
     };
 
-    xhr.onload = () => {
+    xhr.onload = async () => {
       try {
         const data = JSON.parse(xhr.responseText);
-        if (xhr.status !== 201) {
+        if (xhr.status !== 201 && xhr.status !== 202) {
           throw new Error(data.error || "Upload failed");
         }
+        if (xhr.status === 202) {
+          await waitForProcessing(data.report_id);
+        }
         setReportId(data.report_id);
-      } catch {
-        setError("Invalid server response");
+      } catch (err) {
+        // Unparseable JSON is a bad response; anything else has a message to show
+        setError(err instanceof SyntaxError ? "Invalid server response" : err.message);
       } finally {
         setProcessing(false);
       }
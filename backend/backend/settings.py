@@ -1,7 +1,7 @@
 import os
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import config, Csv
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -220,6 +220,89 @@ LOGIN_URL = "/login/"
 API_NINJAS_KEY = config("API_NINJAS_KEY", default="")
 
 
+# Background report processing (manage.py process_reports)
+REPORT_JOB_MAX_ATTEMPTS = config("REPORT_JOB_MAX_ATTEMPTS", default=3, cast=int)
+REPORT_JOB_STALE_AFTER_SECONDS = config("REPORT_JOB_STALE_AFTER_SECONDS", default=900, cast=int)
+REPORT_WORKER_POLL_SECONDS = config("REPORT_WORKER_POLL_SECONDS", default=2, cast=float)
+
+# Time limit for processing one report (0 = none), and the share of it OCR and
+# text analysis may each use; a report that runs out keeps partial results
+REPORT_DEADLINE_SECONDS = config("REPORT_DEADLINE_SECONDS", default=300, cast=float)
+REPORT_OCR_BUDGET_SECONDS = config("REPORT_OCR_BUDGET_SECONDS", default=240, cast=float)
+REPORT_ANALYSIS_BUDGET_SECONDS = config("REPORT_ANALYSIS_BUDGET_SECONDS", default=30, cast=float)
+
+# How long analysis stage results are kept in the cache, keyed by a hash of
+# their inputs, for reports with the same text (0 = no caching)
+REPORT_PIPELINE_CACHE_SECONDS = config("REPORT_PIPELINE_CACHE_SECONDS", default=3600, cast=int)
+
+# Resumable uploads (upload/sessions/): chunk size, and how long unfinished sessions are kept
+UPLOAD_CHUNK_SIZE_KB = config("UPLOAD_CHUNK_SIZE_KB", default=1024, cast=int)
+UPLOAD_SESSION_TTL_HOURS = config("UPLOAD_SESSION_TTL_HOURS", default=24, cast=int)
+
+# Tesseract calls allowed at once across every process on the node (0 = one per CPU),
+# and how many more may wait for a slot before OCR work is refused with a 503
+OCR_MAX_CONCURRENT = config("OCR_MAX_CONCURRENT", default=0, cast=int)
+OCR_MAX_QUEUED = config("OCR_MAX_QUEUED", default=0, cast=int)  # 0 = four per slot
+OCR_QUEUE_TIMEOUT_SECONDS = config("OCR_QUEUE_TIMEOUT_SECONDS", default=60, cast=float)
+OCR_RETRY_AFTER_SECONDS = config("OCR_RETRY_AFTER_SECONDS", default=15, cast=int)
+# Lock files for the slots; must be on a local filesystem shared by the node's processes
+OCR_SLOT_DIR = config("OCR_SLOT_DIR", default="")
+
+# Processes used to OCR scanned PDF pages in parallel (0 = one per CPU, 1 = sequential)
+OCR_PAGE_WORKERS = config("OCR_PAGE_WORKERS", default=0, cast=int)
+
+# Bounded memory mode for PDFs: pages are OCR'd in child processes, at most
+# PDF_MAX_RENDERED_PAGES at a time, each limited to OCR_MEMORY_LIMIT_MB of
+# address space so a page too large to OCR fails its job, not the worker
+PDF_BOUNDED_MEMORY = config("PDF_BOUNDED_MEMORY", default=False, cast=bool)
+PDF_MAX_RENDERED_PAGES = config("PDF_MAX_RENDERED_PAGES", default=2, cast=int)
+OCR_MEMORY_LIMIT_MB = config("OCR_MEMORY_LIMIT_MB", default=1536, cast=int)
+
+# Stop extracting PDF pages once these fields are all found (scanned pages most-relevant first)
+PDF_EARLY_STOP = config("PDF_EARLY_STOP", default=False, cast=bool)
+PDF_EARLY_STOP_FIELDS = config(
+    "PDF_EARLY_STOP_FIELDS",
+    default="patient_id,age,gender,blood_pressure,heart_rate,respiratory_rate,body_temperature,spo2",
+    cast=Csv(),
+)
+
+# OCR engine: "auto" (tesserocr if installed, else pytesseract), "tesserocr", "pytesseract" or "fake"
+OCR_ENGINE = config("OCR_ENGINE", default="auto")
+OCR_LANGUAGE = config("OCR_LANGUAGE", default="eng")
+# tessdata directory for the tesserocr engine; empty uses TESSDATA_PREFIX or tesserocr's default
+OCR_TESSDATA_PATH = config("OCR_TESSDATA_PATH", default="")
+# What every image reads as with the fake engine
+OCR_FAKE_TEXT = config("OCR_FAKE_TEXT", default="")
+
+# How scanned PDF pages are rendered for OCR: "pdfium" or "pdfplumber"
+PDF_RASTERIZER = config("PDF_RASTERIZER", default="pdfium")
+
+# Render scanned pages at the lowest ladder resolution first, climbing only
+# when the OCR confidence or the fields found on the page fall short
+OCR_ADAPTIVE_RESOLUTION = config("OCR_ADAPTIVE_RESOLUTION", default=False, cast=bool)
+OCR_RESOLUTION_LADDER = config("OCR_RESOLUTION_LADDER", default="150,300", cast=Csv(int))
+OCR_MIN_CONFIDENCE = config("OCR_MIN_CONFIDENCE", default=85, cast=float)
+OCR_MIN_FIELDS = config("OCR_MIN_FIELDS", default=0, cast=int)
+
+# Photos larger than an A4 page at this dpi are downscaled before OCR (0 = never)
+OCR_IMAGE_TARGET_DPI = config("OCR_IMAGE_TARGET_DPI", default=300, cast=int)
+
+# OCR only the text blocks found in uploaded images instead of the whole photo
+OCR_IMAGE_REGIONS = config("OCR_IMAGE_REGIONS", default=False, cast=bool)
+
+# Reuse the OCR of a photo the same user uploaded within the window when the
+# new photo's perceptual hash is within this many bits of it (out of 64).
+# Off by default: different reports printed on the same form hash alike too.
+IMAGE_NEAR_DUPLICATES = config("IMAGE_NEAR_DUPLICATES", default=False, cast=bool)
+IMAGE_NEAR_DUPLICATE_DISTANCE = config("IMAGE_NEAR_DUPLICATE_DISTANCE", default=6, cast=int)
+IMAGE_NEAR_DUPLICATE_WINDOW_MINUTES = config("IMAGE_NEAR_DUPLICATE_WINDOW_MINUTES", default=30, cast=int)
+
+# A hash match is only reused once a quick OCR pass of the new photo at this
+# dpi reads the same numbers as the earlier shot's layer (see
+# deduplication.same_numbers): reports on one form differ only in values.
+IMAGE_NEAR_DUPLICATE_CHECK_DPI = config("IMAGE_NEAR_DUPLICATE_CHECK_DPI", default=150, cast=int)
+
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -5,9 +5,12 @@ from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.http import JsonResponse
 
+from reports.services.ocr_admission import queue_depth
+
 
 def healthz(request):
-    return JsonResponse({"status": "ok", "message": "Backend is running"})
+    # OCR slots in use and callers waiting for one on this node
+    return JsonResponse({"status": "ok", "message": "Backend is running", "ocr": queue_depth()})
 
 
 urlpatterns = [
@@ -0,0 +1,105 @@
+"""
+Benchmark image uploads: whole-photo OCR against downscaling and
+region-of-interest OCR, on a synthetic 12 MP phone photo of a report lying
+on a textured desk.
+
+Needs the tesseract binary. Run from the backend directory:
+    DEBUG=True python benchmarks/bench_image_regions.py
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.conf import settings  # noqa: E402
+from PIL import Image, ImageDraw, ImageFilter, ImageFont  # noqa: E402
+
+from reports.services.ocr_layer import layer_text, make_layer  # noqa: E402
+from reports.services.patient_extractor import extract_patient_details  # noqa: E402
+from reports.services.text_extractor import extract_image_pages  # noqa: E402
+from reports.services.vitals_extractor import extract_vitals  # noqa: E402
+
+PHOTO_SIZE = (4032, 3024)
+
+EXPECTED = {
+    "patient_id": "MB-0042",
+    "age": "52",
+    "gender": "Male",
+    "blood_pressure": "130/85",
+    "heart_rate": "72",
+    "respiratory_rate": "16",
+    "body_temperature": "37.5",
+}
+
+PAPER_LINES = [
+    "Patient ID: MB-0042",
+    "Age: 52   Gender: Male",
+    "Blood Pressure: 130/85 mmHg",
+    "Pulse: 72 bpm",
+    "Respiratory Rate: 16",
+    "Body Temperature: 37.5 C",
+]
+
+# (label, OCR_IMAGE_TARGET_DPI, OCR_IMAGE_REGIONS)
+MODES = [
+    ("whole photo", 0, False),
+    ("downscaled", 300, False),
+    ("regions", 300, True),
+]
+
+
+def build_photo(path):
+    desk = np.random.default_rng(0).normal(180, 30, PHOTO_SIZE[::-1]).clip(0, 255)
+    photo = Image.fromarray(desk.astype("uint8"))
+
+    paper = Image.new("L", (2400, 2900), 235)
+    draw = ImageDraw.Draw(paper)
+    draw.text((120, 100), "CITY CARE HOSPITAL", fill=20, font=ImageFont.load_default(size=70))
+    draw.rectangle((1900, 80, 2250, 300), fill=60)
+
+    font = ImageFont.load_default(size=46)
+    for number, line in enumerate(PAPER_LINES):
+        draw.text((150, 450 + number * 90), line, fill=20, font=font)
+    for day in range(6):
+        draw.text((150, 1500 + day * 90), f"Day {day}: Patient comfortable, afebrile.", fill=20, font=font)
+
+    photo.paste(paper, (800, 60))
+    photo.filter(ImageFilter.GaussianBlur(1)).convert("RGB").save(path, quality=90)
+
+
+def accuracy(text):
+    found = {**extract_vitals(text), **extract_patient_details(text, header_window=None)}
+    return sum(1 for field, value in EXPECTED.items() if found.get(field) == value) / len(EXPECTED)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "photo.jpg")
+        build_photo(path)
+
+        print(f"{PHOTO_SIZE[0]}x{PHOTO_SIZE[1]} photo, {settings.OCR_PAGE_WORKERS or os.cpu_count()} OCR workers")
+        print(f"{'mode':>12} {'seconds':>8} {'words':>6} {'accuracy':>9}")
+
+        for name, target_dpi, regions in MODES:
+            settings.OCR_IMAGE_TARGET_DPI = target_dpi
+            settings.OCR_IMAGE_REGIONS = regions
+
+            start = time.perf_counter()
+            pages = extract_image_pages(path)
+            elapsed = time.perf_counter() - start
+
+            words = len(pages[0]["words"]) if pages else 0
+            print(f"{name:>12} {elapsed:8.2f} {words:6d} {accuracy(layer_text(make_layer(pages))):9.1%}")
+
+
+if __name__ == "__main__":
+    main()
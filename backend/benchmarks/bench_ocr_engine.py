@@ -0,0 +1,74 @@
+"""
+Benchmark the OCR engines on the same page images: a tesseract subprocess
+per image (pytesseract) against a Tesseract API kept loaded in-process
+(tesserocr), with the fake engine as the floor.
+
+Engines that aren't available here are skipped. Run from the backend directory:
+    DEBUG=True python benchmarks/bench_ocr_engine.py [images]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from PIL import Image, ImageDraw, ImageFont  # noqa: E402
+
+from reports.services.ocr_engine import ENGINES, get_ocr_engine  # noqa: E402
+from reports.services.ocr_layer import parse_tsv  # noqa: E402
+
+LINES = [
+    "Patient ID: MB-0042   Age: 52   Gender: Male",
+    "Blood Pressure: 130/85 mmHg",
+    "Pulse: 72 bpm   Respiratory Rate: 16",
+    "Body Temperature: 37.5 C   SpO2: 97 %",
+]
+
+
+def page_images(count):
+    """Half-page report excerpts at 300 dpi, one per image so no result is cached"""
+    font = ImageFont.load_default(size=42)
+    images = []
+    for number in range(count):
+        image = Image.new("L", (2480, 600), 255)
+        draw = ImageDraw.Draw(image)
+        for row, line in enumerate([f"Report {number}"] + LINES):
+            draw.text((150, 60 + row * 100), line, fill=0, font=font)
+        images.append(np.asarray(image))
+    return images
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    images = page_images(count)
+
+    print(f"{count} images of {images[0].shape[1]}x{images[0].shape[0]}")
+    print(f"{'engine':>12} {'first ms':>9} {'per image ms':>13} {'words':>6}")
+
+    for name in ENGINES:
+        try:
+            engine = get_ocr_engine(name)
+            start = time.perf_counter()
+            words = parse_tsv(engine.image_to_data(images[0], config="--psm 6"))
+        except Exception as error:
+            print(f"{name:>12} skipped: {error}")
+            continue
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for image in images[1:]:
+            engine.image_to_data(image, config="--psm 6")
+        per_image = (time.perf_counter() - start) / max(1, count - 1)
+
+        print(f"{name:>12} {first * 1000:9.1f} {per_image * 1000:13.1f} {len(words):6d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark the adaptive OCR resolution ladder against fixed 300 dpi rendering
+on a synthetic corpus of scanned reports.
+
+Each mode runs in a fresh process so its peak RSS is measured separately.
+"Bitmap MB" is the largest page image handed to Tesseract, "MP" the total
+megapixels rendered, counting re-renders. Accuracy is the share of expected
+vitals and patient details recovered with the right value.
+
+Needs the tesseract binary. Run from the backend directory:
+    DEBUG=True python benchmarks/bench_ocr_resolution.py [pages]
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont  # noqa: E402
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.lib.utils import ImageReader  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+
+SCAN_DPI = 300
+
+# (label, expected field, value) lines of one scanned page
+PAGE_LINES = [
+    ("Patient ID: MB-{page:04d}", "patient_id", "MB-{page:04d}"),
+    ("Age: {age}   Gender: Male", "age", "{age}"),
+    ("Blood Pressure: 1{page2}/8{page1} mmHg", "blood_pressure", "1{page2}/8{page1}"),
+    ("Pulse: 7{page1} bpm", "heart_rate", "7{page1}"),
+    ("Respiratory Rate: 1{page1}", "respiratory_rate", "1{page1}"),
+    ("Body Temperature: 37.{page1} C", "body_temperature", "37.{page1}"),
+    ("SpO2: 9{page1} %", "spo2", "9{page1}"),
+]
+
+# Body text size in points; the smallest sizes are where 150 dpi falls short
+FONT_SIZES = [12, 10, 8]
+
+
+def build_corpus(path, pages):
+    """A PDF of image-only pages, each a noisy 300 dpi scan of a report"""
+    width, height = A4
+    expected = []
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+
+    for page in range(pages):
+        values = {"page": page, "page1": page % 10, "page2": 10 + page % 30, "age": 30 + page % 50}
+        font_size = FONT_SIZES[page % len(FONT_SIZES)]
+        font = ImageFont.load_default(size=round(font_size * SCAN_DPI / 72))
+
+        scan = Image.new("L", (round(width * SCAN_DPI / 72), round(height * SCAN_DPI / 72)), 255)
+        draw = ImageDraw.Draw(scan)
+        y = SCAN_DPI
+        for line, _, _ in PAGE_LINES:
+            draw.text((SCAN_DPI, y), line.format(**values), fill=0, font=font)
+            y += round(font_size * 2.2 * SCAN_DPI / 72)
+        scan = scan.filter(ImageFilter.GaussianBlur(1.2))
+
+        pdf.drawImage(ImageReader(scan.convert("RGB")), 0, 0, width, height)
+        pdf.showPage()
+        expected.append({field: value.format(**values) for _, field, value in PAGE_LINES})
+
+    pdf.save()
+    return expected
+
+
+def run_mode(path, adaptive, expected):
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+
+    from django.conf import settings
+    from reports.services.ocr_layer import page_text
+    from reports.services.patient_extractor import extract_patient_details
+    from reports.services.text_extractor import extract_pdf_pages
+    from reports.services.vitals_extractor import extract_vitals
+
+    settings.OCR_ADAPTIVE_RESOLUTION = adaptive
+
+    start = time.perf_counter()
+    pages = extract_pdf_pages(str(path), workers=1)
+    elapsed = time.perf_counter() - start
+
+    width, height = A4
+    renders = []
+    for page in pages:
+        ladder = sorted(settings.OCR_RESOLUTION_LADDER) if adaptive else [page["resolution"]]
+        renders += [
+            round(width * dpi / 72) * round(height * dpi / 72)
+            for dpi in ladder if dpi <= page["resolution"]
+        ]
+
+    correct = 0
+    for page, fields in zip(sorted(pages, key=lambda p: p["index"]), expected):
+        text = page_text(page)
+        found = {**extract_vitals(text), **extract_patient_details(text, header_window=None)}
+        correct += sum(1 for field, value in fields.items() if found.get(field) == value)
+
+    return {
+        "seconds": elapsed,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "bitmap_mb": max(renders) * 3 / 2**20,
+        "megapixels": sum(renders) / 1e6,
+        "climbed": sum(1 for page in pages if page["resolution"] > min(settings.OCR_RESOLUTION_LADDER)),
+        "accuracy": correct / sum(len(fields) for fields in expected),
+    }
+
+
+def measure(path, adaptive, expected):
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_mode, (path, adaptive, expected))
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "scanned.pdf"
+        expected = build_corpus(path, pages)
+
+        fixed = measure(path, False, expected)
+        adaptive = measure(path, True, expected)
+
+    print(f"{pages} scanned A4 pages, font sizes {FONT_SIZES} pt")
+    print(f"{'mode':>10} {'seconds':>8} {'s/page':>7} {'RSS MB':>7} {'bitmap MB':>10} {'MP':>7} {'accuracy':>9}")
+    for name, result in (("300 dpi", fixed), ("adaptive", adaptive)):
+        print(
+            f"{name:>10} {result['seconds']:8.2f} {result['seconds'] / pages:7.2f} {result['rss_mb']:7.1f} "
+            f"{result['bitmap_mb']:10.1f} {result['megapixels']:7.1f} {result['accuracy']:9.1%}"
+        )
+    print(f"adaptive re-rendered {adaptive['climbed']} of {pages} pages at a higher resolution")
+
+    print(
+        f"speedup {fixed['seconds'] / adaptive['seconds']:.2f}x, "
+        f"accuracy delta {(adaptive['accuracy'] - fixed['accuracy']) * 100:+.1f} points"
+    )
+
+
+if __name__ == "__main__":
+    main()
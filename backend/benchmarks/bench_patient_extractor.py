@@ -0,0 +1,52 @@
+"""
+Benchmark header-window patient detail extraction on long reports.
+
+Run from the backend directory:
+    python benchmarks/bench_patient_extractor.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reports.services.patient_extractor import extract_patient_details  # noqa: E402
+
+# Labels in the form most hospital headers use, which are the second
+# pattern tried for each field
+HEADER = """CITY CARE HOSPITAL - DISCHARGE SUMMARY
+UHID: CC-558201   Name: R. Sharma   52 Years / Sex: M
+Blood Group: O Positive   Date: 03/02/2025
+"""
+
+PAGE = (
+    "Day 3: Patient comfortable, afebrile, tolerating oral diet. Wound clean.\n"
+    "Medications continued as per chart. Vitals stable through the night.\n"
+) * 30
+
+
+def per_call_ms(text, header_window, number=20):
+    return min(timeit.repeat(
+        lambda: extract_patient_details(text, header_window=header_window),
+        number=number,
+        repeat=5,
+    )) / number * 1000
+
+
+def main():
+    print(f"{'pages':>6} {'chars':>9} {'full text ms':>13} {'header ms':>10} {'speedup':>8}")
+
+    for pages in (1, 10, 50, 100):
+        text = HEADER + PAGE * pages
+        assert (
+            extract_patient_details(text, header_window=None)
+            == extract_patient_details(text)
+        )
+
+        full = per_call_ms(text, None)
+        header = per_call_ms(text, 2000)
+        print(f"{pages:>6} {len(text):>9} {full:13.3f} {header:10.3f} {full / header:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
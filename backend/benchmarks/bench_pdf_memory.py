@@ -0,0 +1,100 @@
+"""
+Benchmark PDF extraction memory: peak RSS of the extracting process and of
+its OCR children, with and without PDF_BOUNDED_MEMORY, on a PDF of dense
+text pages followed by scanned pages. Each mode runs in a fresh process.
+
+Run from the backend directory:
+    DEBUG=True python benchmarks/bench_pdf_memory.py [text pages] [scanned pages]
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.lib.utils import ImageReader  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+
+MODES = {"default": False, "bounded": True}
+
+
+def build_pdf(path, text_pages, scanned_pages):
+    """Lab-table style text pages, then 200 dpi full page scans with a caption"""
+    width, height = A4
+    noise = np.random.default_rng(0).integers(200, 256, (2339, 1654), dtype=np.uint8)
+    scan = ImageReader(Image.fromarray(noise))
+
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    pdf.setFont("Helvetica", 7)
+    for page in range(text_pages):
+        for row in range(95):
+            pdf.drawString(36, height - 30 - row * 8, f"Haemoglobin {row} 13.{page} g/dL 13.0 - 17.0 " * 3)
+        pdf.showPage()
+    for page in range(scanned_pages):
+        pdf.drawImage(scan, 0, 0, width, height)
+        pdf.drawString(72, height - 72, f"Scanned page {page + 1}")
+        pdf.showPage()
+    pdf.save()
+
+
+def run_mode(path, bounded, results):
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+
+    from django.conf import settings
+
+    from reports.services.text_extractor import extract_pdf_pages
+
+    settings.PDF_BOUNDED_MEMORY = bounded
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    start = time.perf_counter()
+    pages = extract_pdf_pages(str(path))
+    elapsed = time.perf_counter() - start
+
+    results.put({
+        "seconds": elapsed,
+        "pages": len(pages),
+        "rss_growth_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - baseline,
+        "children_peak_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    })
+
+
+def main():
+    text_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    scanned_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "mixed.pdf"
+        build_pdf(path, text_pages, scanned_pages)
+
+        # Not a Pool: its daemonic processes can't start the OCR pool
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        results = {}
+        for mode, bounded in MODES.items():
+            process = context.Process(target=run_mode, args=(path, bounded, queue))
+            process.start()
+            results[mode] = queue.get()
+            process.join()
+
+    print(f"{text_pages} text pages + {scanned_pages} scanned pages")
+    print(f"{'mode':>8} {'seconds':>8} {'RSS growth MB':>14} {'OCR child peak MB':>18}")
+    for mode, result in results.items():
+        print(
+            f"{mode:>8} {result['seconds']:>8.2f} {result['rss_growth_mb']:>14.1f} "
+            f"{result['children_peak_mb']:>18.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the qualitative test stage on report-sized text.
+
+Run from the backend directory:
+    python benchmarks/bench_qualitative_extractor.py
+"""
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reports.services.qualitative_extractor import extract_qualitative  # noqa: E402
+
+LEGACY_TESTS = {
+    "urine_sugar": ["urine sugar", "sugar"],
+    "hiv": ["hiv"],
+    "hbsag": ["hbsag", "australia antigen"],
+    "vdrl": ["vdrl"],
+}
+LEGACY_VALUES = ["positive", "negative", "present", "absent", "non reactive", "reactive"]
+
+REPORT_BODY = """PATIENT ID: MB-20391   Age: 46 Years   Gender: Female
+Report Date: 12/03/2025
+HAEMATOLOGY
+Haemoglobin 12.1 g/dL
+Total Leucocyte Count 7600 /cumm
+Platelet Count 245000
+BIOCHEMISTRY
+Blood Glucose (F/R): 96/128 mg/dL
+Blood Urea 28 mg/dL
+Serum Creatinine 0.8 mg/dL
+Total Cholesterol 182 mg/dL
+"""
+
+SEROLOGY = """SEROLOGY
+Anti HIV: Non Reactive
+HBsAg (Australia Antigen): Non-Reactive
+VDRL: Non Reactive
+URINE EXAMINATION
+Urine Sugar: Absent
+"""
+
+
+def legacy_extract(text):
+    results = {}
+    for test, keywords in LEGACY_TESTS.items():
+        for kw in keywords:
+            pattern = rf"{kw}[^a-z]{{0,20}}({'|'.join(LEGACY_VALUES)})"
+            match = re.search(pattern, text)
+            if match:
+                results[test] = match.group(1)
+                break
+    return results
+
+
+def per_call_ms(func, text, number=2000):
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number * 1000
+
+
+def main():
+    cases = {
+        "1 page": REPORT_BODY + SEROLOGY,
+        "5 pages": REPORT_BODY * 5 + SEROLOGY,
+        "5 pages, no serology": REPORT_BODY * 5,
+    }
+
+    # The legacy version matched lowercase keywords case-sensitively, so it
+    # finds nothing on real reports; its timing is shown for scale only.
+    print(f"{'report':>22} {'chars':>7} {'legacy ms':>10} {'stage ms':>9}  legacy / stage results")
+    for name, text in cases.items():
+        re.purge()
+        legacy = per_call_ms(legacy_extract, text)
+        stage = per_call_ms(extract_qualitative, text)
+        print(
+            f"{name:>22} {len(text):>7} {legacy:10.4f} {stage:9.4f}  "
+            f"{len(legacy_extract(text))} / {extract_qualitative(text)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark the PDF rasterizer backends: pages rendered per second into the
+grayscale arrays OCR is fed, and peak RSS of a fresh process per backend.
+
+Run from the backend directory:
+    DEBUG=True python benchmarks/bench_rasterizer.py [pages] [dpi]
+"""
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.lib.utils import ImageReader  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+
+BACKENDS = ["pdfplumber", "pdfium"]
+
+
+def build_pdf(path, pages):
+    """Scanned-style pages: a full page 200 dpi image with a little text on top"""
+    width, height = A4
+    noise = np.random.default_rng(0).integers(200, 256, (2339, 1654), dtype=np.uint8)
+    scan = ImageReader(Image.fromarray(noise))
+
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    for page in range(pages):
+        pdf.drawImage(scan, 0, 0, width, height)
+        pdf.drawString(72, height - 72, f"Page {page + 1}")
+        pdf.showPage()
+    pdf.save()
+
+
+def run_backend(path, backend, pages, dpi):
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+
+    from reports.services.rasterizer import open_rasterizer
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    start = time.perf_counter()
+    with open_rasterizer(str(path), backend=backend) as rasterizer:
+        for index in range(pages):
+            image = rasterizer.render(index, dpi)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "pages_per_second": pages / elapsed,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rss_growth_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - baseline,
+        "shape": image.shape,
+    }
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    dpi = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "scanned.pdf"
+        build_pdf(path, pages)
+
+        results = {}
+        for backend in BACKENDS:
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                results[backend] = pool.apply(run_backend, (path, backend, pages, dpi))
+
+    print(f"{pages} A4 pages at {dpi} dpi, {results[BACKENDS[0]]['shape']} grayscale each")
+    print(f"{'backend':>11} {'pages/s':>8} {'peak RSS MB':>12} {'growth MB':>10}")
+    for backend, result in results.items():
+        print(
+            f"{backend:>11} {result['pages_per_second']:8.2f} "
+            f"{result['peak_rss_mb']:12.1f} {result['rss_growth_mb']:10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark extract_vitals against the previous sequential-regex version.
+
+Run from the backend directory:
+    python benchmarks/bench_vitals_extractor.py
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reports.services.vitals_extractor import extract_vitals  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000, 4_000_000]
+
+REPORT_LINE = (
+    "Blood Pressure reading noted during the visit without values recorded "
+    "Pulse regular Temperature taken orally SpO2 checked on room air BMI pending\n"
+)
+
+LEGACY_PATTERNS = [
+    r"Blood\s*Pressure.*?(\d{2,3})\s*/\s*(\d{2,3})",
+    r"(Heart\s*Rate|Pulse).*?(\d{2,3})\s*(bpm|beats)?",
+    r"Respiratory\s*Rate.*?(\d{1,2})",
+    r"(Body\s*Temperature|Temperature).*?([\d\.]+)\s*(C|F)",
+    r"(SpO2|Oxygen\s*Saturation).*?(\d{2,3})\s*%",
+    r"Blood\s*Glucose.*?(\d{2,3})\s*/\s*(\d{2,3})",
+    r"\bBMI.*?([\d\.]+)",
+]
+
+
+def legacy_extract(text):
+    return [re.search(pattern, text, re.IGNORECASE) for pattern in LEGACY_PATTERNS]
+
+
+def make_text(size, newlines=True):
+    # Keywords everywhere but no values: the worst case for the old patterns
+    line = REPORT_LINE if newlines else REPORT_LINE.replace("\n", " ")
+    return (line * (size // len(line) + 1))[:size]
+
+
+def timed(func, text, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'chars':>10} {'layout':>10} {'legacy ms':>10} {'scanner ms':>11} {'ns/char':>8}")
+
+    for newlines in (True, False):
+        for size in SIZES:
+            text = make_text(size, newlines)
+            # The old patterns go quadratic on a single long line; skip the big ones
+            legacy = (
+                f"{timed(legacy_extract, text) * 1000:10.1f}"
+                if newlines or size <= 100_000 else f"{'skipped':>10}"
+            )
+            scanner = timed(lambda t: extract_vitals(t, time_limit=60), text)
+            print(
+                f"{size:>10} {'lines' if newlines else 'one line':>10} {legacy} "
+                f"{scanner * 1000:11.1f} {scanner / size * 1e9:8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,19 @@
 from django.contrib import admin
-from .models import MedicalReport
+from .models import MedicalReport, ReportJob, UploadSession
 
 @admin.register(MedicalReport)
 class MedicalReportAdmin(admin.ModelAdmin):
     list_display = ("original_filename", "file_size_kb", "uploaded_at")
+    readonly_fields = ("stage_timings",)
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("report", "status", "attempts", "locked_by", "created_at", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "filename", "size", "report", "created_at")
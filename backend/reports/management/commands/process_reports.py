@@ -0,0 +1,70 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reports.models import ReportJob
+from reports.services.chunked_upload import delete_expired_sessions
+from reports.services.job_queue import claim_next_job, run_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued medical reports in the background"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.REPORT_WORKER_POLL_SECONDS,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            "--worker-id",
+            default=f"{socket.gethostname()}:{os.getpid()}",
+            help="Identifier recorded on claimed jobs",
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"]
+        poll_interval = options["poll_interval"]
+        self._stopping = False
+
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write(f"Report worker {worker_id} started")
+
+        while not self._stopping:
+            close_old_connections()
+            requeue_stale_jobs()
+            delete_expired_sessions()
+
+            job = claim_next_job(worker_id)
+
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            job_status = run_job(job)
+            self.stdout.write(f"Report {job.report_id}: {job_status}")
+
+            if job_status == ReportJob.STATUS_QUEUED:
+                # Failed or deferred for OCR capacity: back off before the next claim
+                time.sleep(poll_interval)
+
+        self.stdout.write(f"Report worker {worker_id} stopped")
+
+    def _request_stop(self, signum, frame):
+        # Finish the current job, then exit
+        self._stopping = True
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.models import MedicalReport
+from reports.services.report_processor import (
+    ANALYSIS_FIELDS,
+    generate_report_pdf,
+    reevaluate_report,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-evaluate processed reports from their stored text, without OCR. "
+        "Use after changing the extractors or the reference ranges."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Rows read and written per batch",
+        )
+        parser.add_argument(
+            "--start-after",
+            type=int,
+            default=None,
+            help="Only re-evaluate reports with an id greater than this",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=None,
+            help="File recording the last finished id; an existing one is resumed from",
+        )
+        parser.add_argument(
+            "--pdf",
+            action="store_true",
+            help="Also regenerate each summary PDF (much slower)",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if chunk_size <= 0:
+            raise CommandError("--chunk-size must be positive")
+
+        checkpoint = Path(options["checkpoint"]) if options["checkpoint"] else None
+        start_after = options["start_after"]
+
+        if start_after is None and checkpoint and checkpoint.exists():
+            start_after = int(checkpoint.read_text().strip() or 0)
+            self.stdout.write(f"Resuming after report {start_after}")
+
+        reports = MedicalReport.objects.filter(extracted_text__isnull=False)
+        if start_after:
+            reports = reports.filter(id__gt=start_after)
+
+        total = reports.count()
+        self.stdout.write(f"Re-evaluating {total} reports")
+
+        # Only what re-evaluation reads and writes; the rest stays in the database
+        reports = (
+            reports
+            .order_by("id")
+            .only("id", "extracted_text", "summary_pdf", *ANALYSIS_FIELDS)
+        )
+
+        done = 0
+        batch = []
+
+        for report in reports.iterator(chunk_size=chunk_size):
+            reevaluate_report(report)
+            batch.append(report)
+
+            if len(batch) >= chunk_size:
+                done += self._flush(batch, checkpoint, options["pdf"])
+                self.stdout.write(f"{done}/{total} re-evaluated (last id {batch[-1].id})")
+                batch = []
+
+        if batch:
+            done += self._flush(batch, checkpoint, options["pdf"])
+
+        self.stdout.write(self.style.SUCCESS(f"Re-evaluated {done} reports"))
+
+    def _flush(self, batch, checkpoint, regenerate_pdf):
+        MedicalReport.objects.bulk_update(batch, ANALYSIS_FIELDS)
+
+        if regenerate_pdf:
+            for report in batch:
+                generate_report_pdf(report)
+
+        if checkpoint:
+            checkpoint.write_text(str(batch[-1].id))
+
+        return len(batch)
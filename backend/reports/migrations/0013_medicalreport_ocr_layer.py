@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0012_medicalreport_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalreport',
+            name='ocr_layer',
+            field=models.FileField(blank=True, null=True, upload_to='ocr_layers/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0015_medicalreport_image_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalreport',
+            name='partial',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0016_medicalreport_partial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalreport',
+            name='stage_timings',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -12,8 +14,15 @@ class MedicalReport(models.Model):
     file = models.FileField(upload_to="reports/")
     original_filename = models.CharField(max_length=255)
     file_size_kb = models.FloatField()
+    content_hash = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    image_hash = models.CharField(max_length=16, blank=True, default="")
 
     extracted_text = models.TextField(blank=True, null=True)
+    ocr_layer = models.FileField(
+        upload_to="ocr_layers/",
+        null=True,
+        blank=True
+    )
     patient_details = models.JSONField(blank=True, null=True)
     vitals = models.JSONField(blank=True, null=True)
 
@@ -23,6 +32,9 @@ class MedicalReport(models.Model):
     comparison_table = models.JSONField(blank=True, null=True)
     key_observations = models.JSONField(blank=True, null=True)
     final_conclusion = models.TextField(blank=True, null=True)
+    partial = models.BooleanField(default=False)
+    # Wall and CPU seconds of each processing stage, see report_pipeline
+    stage_timings = models.JSONField(blank=True, null=True)
 
     summary_pdf = models.FileField(
         upload_to="report_summaries/",
@@ -32,5 +44,91 @@ class MedicalReport(models.Model):
 
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "uploaded_at"]),
+        ]
+
     def __str__(self):
         return self.original_filename
+
+
+class ReportJob(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_PROCESSING, "Processing"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    report = models.OneToOneField(
+        MedicalReport,
+        on_delete=models.CASCADE,
+        related_name="job"
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    locked_by = models.CharField(max_length=255, blank=True, default="")
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        verbose_name = "Report Job"
+        verbose_name_plural = "Report Jobs"
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Job for report {self.report_id} - {self.status}"
+
+
+class UploadSession(models.Model):
+    """A resumable upload sent in fixed size chunks, finalized into a report"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="upload_sessions"
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+
+    report = models.OneToOneField(
+        MedicalReport,
+        on_delete=models.SET_NULL,
+        related_name="upload_session",
+        null=True,
+        blank=True
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def total_chunks(self):
+        return -(-self.size // self.chunk_size)
+
+    def chunk_length(self, index: int) -> int:
+        """Expected size of chunk index; only the last one may be short"""
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def __str__(self):
+        return f"Upload {self.id} - {self.filename}"
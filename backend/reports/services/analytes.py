@@ -0,0 +1,227 @@
+"""
+Single registry of everything known about each analyte: the keywords that
+introduce it in a report, the grammar of its value, its unit, its normal
+range and the name shown to users.
+
+The registry is compiled once at import into one keyword alternation and
+per-analyte lookup tables, so adding an analyte adds a branch to that
+alternation rather than another regex pass over the text.
+"""
+import re
+
+# Value grammars
+INTEGER_2_3 = r"(\d{2,3})"
+DECIMAL = r"([\d\.]+)"
+PAIR = r"(\d{2,3})\s*/\s*(\d{2,3})"
+LAB_NUMBER = r"(\d+(?:\.\d+)?)"
+QUALITATIVE = r"[^a-z]{0,20}(positive|negative|present|absent|non[\s\-]*reactive|reactive)"
+
+# key -> definition
+#   display_name  name used in the comparison table
+#   aliases       keyword regexes that introduce the value in a report
+#   value         regex for the value, searched on the keyword's line
+#   outputs       vitals keys filled from the value groups (default: [key];
+#                 several groups with a single output are joined with "/")
+#   unit          unit shown in the normal range
+#   range         reference range used by compare_vitals (None: not evaluated)
+#   integer       report the value as an int rather than a float
+#   range_label   override for the normal range text
+ANALYTES = {
+    "blood_pressure": {
+        "display_name": "Blood Pressure",
+        "aliases": [r"Blood\s*Pressure"],
+        "value": PAIR,
+        "unit": "mmHg",
+        "range": {"type": "bp", "systolic_max": 120, "diastolic_max": 80},
+    },
+    "heart_rate": {
+        "display_name": "Heart Rate",
+        "aliases": [r"Heart\s*Rate", r"Pulse"],
+        "value": INTEGER_2_3,
+        "unit": "bpm",
+        "range": {"type": "numeric", "min": 60, "max": 100},
+    },
+    "respiratory_rate": {
+        "display_name": "Respiratory Rate",
+        "aliases": [r"Respiratory\s*Rate"],
+        "value": r"(\d{1,2})",
+        "unit": "breaths/min",
+        "range": {"type": "numeric", "min": 12, "max": 20},
+    },
+    "body_temperature": {
+        "display_name": "Body Temperature",
+        "aliases": [r"Body\s*Temperature", r"Temperature"],
+        "value": r"([\d\.]+)\s*(?:C|F)",
+        "unit": "°C",
+        "range": {"type": "numeric", "min": 36.1, "max": 37.2},
+    },
+    "spo2": {
+        "display_name": "SpO₂",
+        "aliases": [r"SpO2", r"Oxygen\s*Saturation"],
+        "value": r"(\d{2,3})\s*%",
+        "unit": "%",
+        "range": {"type": "numeric", "min": 95, "max": 100},
+        "integer": True,
+        "range_label": "95–100%",
+    },
+    "blood_glucose": {
+        "display_name": "Blood Sugar",
+        "aliases": [r"Blood\s*Glucose"],
+        "value": PAIR,
+        "outputs": ["fasting_glucose", "random_glucose"],
+        "unit": "mg/dL",
+        "range": None,
+    },
+    "fasting_glucose": {
+        "display_name": "Blood Sugar",
+        "aliases": [],
+        "unit": "mg/dL",
+        "range": {"type": "numeric", "min": 70, "max": 99},
+    },
+    "random_glucose": {
+        "display_name": "Blood Sugar",
+        "aliases": [],
+        "unit": "mg/dL",
+        "range": {"type": "numeric", "min": 0, "max": 140},
+    },
+    "hemoglobin": {
+        "display_name": "Hemoglobin",
+        "aliases": [r"Ha?emoglobin", r"\bHb\b"],
+        "value": LAB_NUMBER,
+        "unit": "g/dL",
+        "range": {
+            "type": "gender_based",
+            "male": {"min": 13, "max": 17},
+            "female": {"min": 12, "max": 15},
+            "min": 12,
+            "max": 17,
+        },
+    },
+    "platelet_count": {
+        "display_name": "Platelet Count",
+        "aliases": [r"Platelet\s*Count"],
+        "value": r"(\d{4,6})",
+        "unit": "/µL",
+        "range": {"type": "numeric", "min": 150000, "max": 450000},
+    },
+    "blood_urea": {
+        "display_name": "Blood Urea",
+        "aliases": [r"Blood\s*Urea(?!\s*Nitrogen)"],
+        "value": LAB_NUMBER,
+        "unit": "mg/dL",
+        "range": {"type": "numeric", "min": 15, "max": 40},
+    },
+    "serum_creatinine": {
+        "display_name": "Serum Creatinine",
+        "aliases": [r"Serum\s*Creatinine", r"\bCreatinine(?!\s*Clearance)"],
+        "value": LAB_NUMBER,
+        "unit": "mg/dL",
+        "range": {"type": "numeric", "min": 0.6, "max": 1.3},
+    },
+    "total_cholesterol": {
+        "display_name": "Total Cholesterol",
+        "aliases": [r"Total\s*Cholesterol"],
+        "value": LAB_NUMBER,
+        "unit": "mg/dL",
+        "range": {"type": "numeric", "max": 200},
+    },
+    "bmi": {
+        "display_name": "BMI",
+        "aliases": [r"\bBMI"],
+        "value": DECIMAL,
+        "unit": "",
+        "range": {"type": "numeric", "min": 18.5, "max": 24.9},
+    },
+    "urine_sugar": {
+        "display_name": "Urine Sugar",
+        "aliases": [r"urine sugar", r"sugar"],
+        "value": QUALITATIVE,
+        "range": {"type": "qualitative", "normal": ["absent", "negative"]},
+    },
+    "hiv": {
+        "display_name": "HIV",
+        "aliases": [r"hiv"],
+        "value": QUALITATIVE,
+        "range": {"type": "qualitative", "normal": ["non reactive", "negative"]},
+    },
+    "hbsag": {
+        "display_name": "HBsAg",
+        "aliases": [r"hbsag", r"australia antigen"],
+        "value": QUALITATIVE,
+        "range": {"type": "qualitative", "normal": ["non reactive", "negative"]},
+    },
+    "vdrl": {
+        "display_name": "VDRL",
+        "aliases": [r"vdrl"],
+        "value": QUALITATIVE,
+        "range": {"type": "qualitative", "normal": ["non reactive", "negative"]},
+    },
+}
+
+
+def _is_qualitative(definition):
+    return (definition.get("range") or {}).get("type") == "qualitative"
+
+
+def compile_anchor_pattern(keys):
+    """
+    One case-insensitive alternation; the named group is the analyte key.
+    When every alias starts with a plain letter, a lookahead on those first
+    letters lets the engine skip most positions without trying each branch.
+    """
+    branches = [
+        f"(?P<{key}>{'|'.join(ANALYTES[key]['aliases'])})"
+        for key in keys
+        if ANALYTES[key]["aliases"]
+    ]
+    pattern = "|".join(branches)
+
+    first_chars = set()
+    for key in keys:
+        for alias in ANALYTES[key]["aliases"]:
+            first = alias[2:3] if alias.startswith(r"\b") else alias[:1]
+            if not first.isalpha():
+                return re.compile(pattern, re.IGNORECASE)
+            first_chars.add(first.lower())
+
+    prefilter = "".join(sorted(first_chars))
+    return re.compile(f"(?=[{prefilter}])(?:{pattern})", re.IGNORECASE)
+
+
+# Compiled lookup tables
+
+# Analytes read by extract_vitals (qualitative tests have their own stage)
+VITAL_KEYS = [
+    key for key, definition in ANALYTES.items()
+    if definition.get("aliases") and not _is_qualitative(definition)
+]
+QUALITATIVE_KEYS = [
+    key for key, definition in ANALYTES.items()
+    if _is_qualitative(definition)
+]
+
+VITAL_ANCHOR_PATTERN = compile_anchor_pattern(VITAL_KEYS)
+
+VALUE_PATTERNS = {
+    key: re.compile(definition["value"], re.IGNORECASE)
+    for key, definition in ANALYTES.items()
+    if definition.get("value")
+}
+
+OUTPUT_KEYS = {
+    key: definition.get("outputs", [key])
+    for key, definition in ANALYTES.items()
+}
+
+NORMAL_RANGES = {
+    key: {**definition["range"], "unit": definition.get("unit", "")}
+    for key, definition in ANALYTES.items()
+    if definition.get("range")
+}
+
+DISPLAY_NAMES = {
+    key: definition["display_name"]
+    for key, definition in ANALYTES.items()
+}
+
+NUMBER_PATTERN = re.compile(LAB_NUMBER)
@@ -0,0 +1,71 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import connection
+
+from .job_queue import run_job
+from .text_extractor import get_ocr_page_workers
+
+logger = logging.getLogger(__name__)
+
+
+def process_batch(items: list, workers: int = None):
+    """
+    Process inline jobs of a batch concurrently, yielding each job as it finishes.
+    items are (job, source) pairs, source as process_report takes it.
+
+    The batch shares one OCR budget: up to workers reports (default
+    OCR_PAGE_WORKERS) are extracted at once, each OCR-ing its pages one at a
+    time, so a batch never runs more OCR than a single large PDF would.
+    Old reports are not cleaned up; do it once for the whole batch.
+    """
+    if not items:
+        return
+
+    if workers is None:
+        workers = get_ocr_page_workers()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(items)))) as executor:
+        futures = {
+            executor.submit(_run_batch_job, job, source): job
+            for job, source in items
+        }
+        for future in as_completed(futures):
+            yield futures[future]
+
+
+def start_batch(items: list, on_finished=None, workers: int = None) -> queue.Queue:
+    """
+    Process a batch as process_batch does, but on a background thread, so it
+    finishes whether or not the caller keeps reading: a batch upload goes on
+    when its client disconnects. Jobs are put on the returned queue as they
+    finish, followed by None once on_finished, if given, has run.
+    """
+    finished = queue.Queue()
+
+    def run():
+        try:
+            for job in process_batch(items, workers):
+                finished.put(job)
+            if on_finished is not None:
+                on_finished()
+        except Exception as e:
+            logger.error(f"Report batch failed: {str(e)}", exc_info=True)
+        finally:
+            connection.close()
+            finished.put(None)
+
+    threading.Thread(target=run, name="report-batch", daemon=True).start()
+    return finished
+
+
+def _run_batch_job(job, source):
+    try:
+        status = run_job(job, source=source, cleanup=False, ocr_workers=1)
+        logger.info(f"Batch report {job.report_id}: {status}")
+        return status
+    finally:
+        # Each thread has its own database connection
+        connection.close()
@@ -0,0 +1,166 @@
+"""
+Resumable uploads: a file sent as numbered, fixed size chunks over several
+requests, so a dropped connection only costs the chunk in flight.
+
+Each chunk is written to its own file in the session's directory under
+MEDIA_ROOT, and only renamed into place once complete, so the chunks on
+disk are always the ones fully received. Finalizing streams them in order
+into the report's storage, hashing and type-checking on the way.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from ..models import MedicalReport, UploadSession
+from ..upload_handlers import StoredUploadedFile, create_stored_file, matches_magic_bytes
+
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_BYTES = 64 * 1024
+
+
+class ChunkError(Exception):
+    """A chunk or session that can't be accepted; the message is safe to show"""
+
+
+def session_dir(session) -> str:
+    return os.path.join(settings.MEDIA_ROOT, "upload_sessions", str(session.id))
+
+
+def chunk_path(session, index: int) -> str:
+    return os.path.join(session_dir(session), f"{index}.chunk")
+
+
+def create_session(user, filename: str, size: int) -> UploadSession:
+    session = UploadSession.objects.create(
+        user=user,
+        filename=filename,
+        size=size,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE_KB * 1024,
+    )
+    os.makedirs(session_dir(session), exist_ok=True)
+    return session
+
+
+def write_chunk(session, index: int, stream, length: int):
+    """
+    Store chunk index by reading exactly length bytes from stream, without
+    holding more than a small buffer in memory. Re-sending a chunk replaces it.
+    """
+    if not 0 <= index < session.total_chunks:
+        raise ChunkError(f"Chunk index must be between 0 and {session.total_chunks - 1}")
+
+    expected = session.chunk_length(index)
+    if length != expected:
+        raise ChunkError(f"Chunk {index} must be {expected} bytes, got {length}")
+
+    directory = session_dir(session)
+    os.makedirs(directory, exist_ok=True)
+
+    received = 0
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".part", delete=False) as partial:
+        try:
+            while received < expected:
+                data = stream.read(min(COPY_BUFFER_BYTES, expected - received))
+                if not data:
+                    break
+                partial.write(data)
+                received += len(data)
+        except Exception:
+            os.unlink(partial.name)
+            raise
+
+    if received != expected:
+        os.unlink(partial.name)
+        raise ChunkError(f"Chunk {index} was cut off after {received} of {expected} bytes")
+
+    os.replace(partial.name, chunk_path(session, index))
+
+
+def received_chunks(session) -> list:
+    """Indexes of the chunks fully received so far, in order"""
+    try:
+        names = os.listdir(session_dir(session))
+    except FileNotFoundError:
+        return []
+
+    return sorted(int(name.split(".")[0]) for name in names if name.endswith(".chunk"))
+
+
+def missing_chunks(session) -> list:
+    received = set(received_chunks(session))
+    return [index for index in range(session.total_chunks) if index not in received]
+
+
+def assemble_upload(session):
+    """
+    Join the chunks into the report file storage.
+    Returns a StoredUploadedFile already in place, or for storages without
+    local paths, a File over a temporary copy for FileField.save to upload.
+    """
+    extension = Path(session.filename).suffix.lower()
+    with open(chunk_path(session, 0), "rb") as first:
+        if not matches_magic_bytes(extension, first.read(16)):
+            raise ChunkError("File contents do not match its type")
+
+    field = MedicalReport._meta.get_field("file")
+    try:
+        destination, stored_name = create_stored_file(
+            field.storage, field.generate_filename(None, session.filename)
+        )
+    except NotImplementedError:
+        destination, stored_name = open(os.path.join(session_dir(session), "assembled"), "wb+"), None
+
+    digest = hashlib.sha256()
+    try:
+        for index in range(session.total_chunks):
+            with open(chunk_path(session, index), "rb") as chunk:
+                while data := chunk.read(COPY_BUFFER_BYTES):
+                    digest.update(data)
+                    destination.write(data)
+        destination.flush()
+        destination.seek(0)
+    except Exception:
+        destination.close()
+        if stored_name is not None:
+            field.storage.delete(stored_name)
+        raise
+
+    if stored_name is None:
+        return File(destination, name=session.filename)
+
+    return StoredUploadedFile(
+        file=destination,
+        name=session.filename,
+        content_type=None,
+        size=session.size,
+        charset=None,
+        stored_name=stored_name,
+        content_hash=digest.hexdigest(),
+    )
+
+
+def discard_chunks(session):
+    shutil.rmtree(session_dir(session), ignore_errors=True)
+
+
+def delete_expired_sessions() -> int:
+    """Remove sessions, and their chunks, left unfinished past UPLOAD_SESSION_TTL_HOURS"""
+    cutoff = timezone.now() - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    expired = list(UploadSession.objects.filter(report__isnull=True, created_at__lt=cutoff))
+
+    for session in expired:
+        discard_chunks(session)
+        session.delete()
+
+    if expired:
+        logger.info(f"Deleted {len(expired)} expired upload sessions")
+    return len(expired)
@@ -1,5 +1,25 @@
 from django.db import transaction
-from ..models import MedicalReport
+from ..models import MedicalReport, ReportJob
+
+# Jobs whose report a worker may still be writing to
+ACTIVE_JOB_STATUSES = [ReportJob.STATUS_QUEUED, ReportJob.STATUS_PROCESSING]
+
+
+class ReportDeleted(Exception):
+    """The report was deleted, e.g. by cleanup, while it was being processed"""
+
+
+def save_report_fields(report, *fields):
+    """
+    Write the given fields of a report with an UPDATE only. save() would
+    re-insert a report deleted meanwhile, as an orphan without a job.
+    """
+    updated = MedicalReport.objects.filter(pk=report.pk).update(
+        **{field: getattr(report, field) for field in fields}
+    )
+    if not updated:
+        raise ReportDeleted(f"Report {report.pk} was deleted")
+
 
 def cleanup_old_reports(user, keep=6):
     reports = (
@@ -11,13 +31,32 @@ def cleanup_old_reports(user, keep=6):
     if reports.count() <= keep:
         return
 
-    old_reports = reports[keep:]
+    old_ids = list(reports.values_list("pk", flat=True)[keep:])
 
     with transaction.atomic():
+        # Reports still queued or being processed are left for a later cleanup
+        old_reports = (
+            MedicalReport.objects
+            .select_for_update()
+            .filter(pk__in=old_ids)
+            .exclude(job__status__in=ACTIVE_JOB_STATUSES)
+        )
         for report in old_reports:
-            if report.file:
-                try:
-                    report.file.delete(save=False)
-                except Exception:
-                    pass
+            for field in ("file", "ocr_layer"):
+                stored = getattr(report, field)
+                if not stored:
+                    continue
+
+                # Pre-checked and duplicate uploads share stored files
+                shared = (
+                    MedicalReport.objects
+                    .filter(**{field: stored.name})
+                    .exclude(pk=report.pk)
+                    .exists()
+                )
+                if not shared:
+                    try:
+                        stored.delete(save=False)
+                    except Exception:
+                        pass
             report.delete()
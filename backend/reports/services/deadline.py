@@ -0,0 +1,42 @@
+"""
+Time budgets for report processing.
+
+process_report gives each report a Deadline of REPORT_DEADLINE_SECONDS and
+narrows it per stage with Deadline.stage. Stages check it between steps,
+and OCR passes the time left to the engine as a timeout, so a pathological
+scan ends with partial results instead of holding a worker for minutes.
+Deadlines are wall-clock times and can be sent to OCR worker processes.
+"""
+import time
+
+
+class DeadlineExceeded(Exception):
+    """A stage ran out of its time budget"""
+
+
+class Deadline:
+    """A point in time work must finish by; seconds=None means no limit"""
+
+    def __init__(self, seconds: float = None):
+        self.expires_at = time.time() + seconds if seconds else None
+
+    def remaining(self):
+        """Seconds left, or None without a limit"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.time())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+    def check(self, what: str):
+        if self.expired():
+            raise DeadlineExceeded(f"{what} ran out of time")
+
+    def stage(self, seconds: float = None) -> "Deadline":
+        """A deadline seconds from now for one stage, never later than this one"""
+        stage = Deadline(seconds)
+        if self.expires_at is not None:
+            if stage.expires_at is None or stage.expires_at > self.expires_at:
+                stage.expires_at = self.expires_at
+        return stage
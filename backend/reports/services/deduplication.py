@@ -0,0 +1,127 @@
+import hashlib
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from ..models import MedicalReport, ReportJob
+from .image_hash import hamming_distance
+from .cleanup_report import save_report_fields
+
+# Everything derived from the file contents; a byte-identical upload
+# produces the same values, so they can be copied instead of recomputed.
+REUSED_FIELDS = [
+    "extracted_text",
+    "ocr_layer",
+    "image_hash",
+    "patient_details",
+    "vitals",
+    "comparison_table",
+    "key_observations",
+    "final_conclusion",
+    "bmi",
+    "respiratory_rate",
+    "summary_pdf",
+]
+
+
+def compute_content_hash(file) -> str:
+    """SHA-256 of an uploaded file, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def find_processed_duplicate(content_hash: str, exclude_id=None, user=None):
+    """
+    Most recent successfully processed report with the same contents, if any.
+    Pass user to only match that user's own reports.
+    """
+    if not content_hash:
+        return None
+
+    reports = MedicalReport.objects.filter(
+        content_hash=content_hash,
+        job__status=ReportJob.STATUS_DONE,
+        extracted_text__isnull=False,
+        partial=False,
+    )
+    if user is not None:
+        reports = reports.filter(user=user)
+
+    return (
+        reports
+        .exclude(pk=exclude_id)
+        .order_by("-uploaded_at")
+        .first()
+    )
+
+
+def find_similar_image_report(report, image_hash: str):
+    """
+    The closest processed photo with a stored OCR layer that the same user
+    uploaded within IMAGE_NEAR_DUPLICATE_WINDOW_MINUTES, if its perceptual
+    hash is within IMAGE_NEAR_DUPLICATE_DISTANCE bits of image_hash.
+    The (user, uploaded_at) index keeps the candidates to a handful of rows,
+    which are compared here.
+    """
+    if not image_hash or not report.user_id:
+        return None
+
+    since = timezone.now() - timedelta(minutes=settings.IMAGE_NEAR_DUPLICATE_WINDOW_MINUTES)
+    candidates = (
+        MedicalReport.objects
+        .filter(
+            user_id=report.user_id,
+            uploaded_at__gte=since,
+            job__status=ReportJob.STATUS_DONE,
+            partial=False,
+        )
+        .exclude(pk=report.pk)
+        .exclude(image_hash="")
+        .exclude(ocr_layer="")
+        .exclude(ocr_layer__isnull=True)
+    )
+
+    best, best_distance = None, settings.IMAGE_NEAR_DUPLICATE_DISTANCE + 1
+    for candidate in candidates:
+        distance = hamming_distance(image_hash, candidate.image_hash)
+        if distance < best_distance:
+            best, best_distance = candidate, distance
+
+    return best
+
+
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def same_numbers(quick_text: str, text: str) -> bool:
+    """
+    Whether a quick OCR pass of a new photo confirms a perceptual hash match
+    with an earlier shot's text. Two reports printed on the same form hash
+    alike and share every label, so only their numbers tell them apart:
+    every number the quick pass reads must be in the earlier text, and it
+    must read at least half as many. A misread only costs a full OCR.
+    """
+    quick_numbers = NUMBER.findall(quick_text or "")
+    numbers = set(NUMBER.findall(text or ""))
+
+    if not quick_numbers or 2 * len(quick_numbers) < len(numbers):
+        return False
+    return all(number in numbers for number in quick_numbers)
+
+
+def reuse_processed_results(report, source):
+    """Copy the extraction results of an identical, already processed report"""
+    for field in REUSED_FIELDS:
+        value = getattr(source, field)
+        if isinstance(value, FieldFile):
+            # Point at the same stored file rather than sharing the FieldFile object
+            value = value.name or None
+        setattr(report, field, value)
+    save_report_fields(report, *REUSED_FIELDS)
+    return report
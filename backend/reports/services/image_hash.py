@@ -0,0 +1,27 @@
+"""
+Perceptual hashes of report photos, to recognise the same paper shot again.
+
+dHash: the image is shrunk to 9x8 grey pixels and each bit records whether
+a pixel is brighter than its right neighbour. Re-shooting the same page
+(slightly rotated, shifted, lit differently) flips only a few of the 64
+bits, while an exact content hash changes completely.
+"""
+import cv2
+import numpy as np
+
+DHASH_SIZE = 8
+
+
+def dhash(image) -> str:
+    """64-bit difference hash of an image, as 16 hex digits"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    small = cv2.resize(image, (DHASH_SIZE + 1, DHASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return np.packbits(bits).tobytes().hex()
+
+
+def hamming_distance(first: str, second: str) -> int:
+    """Number of differing bits between two hex hashes"""
+    return bin(int(first, 16) ^ int(second, 16)).count("1")
@@ -0,0 +1,113 @@
+"""
+Preprocessing for photographed and scanned report images: downscale oversized
+photos, then find the text blocks so only they are OCR'd, leaving out the
+margins, logos and background around the paper.
+
+Regions are (x, y, width, height) boxes in the coordinates of the image they
+were found in.
+"""
+import cv2
+import numpy as np
+
+# Long side of an A4 page, in inches, used to turn a target dpi into pixels
+A4_LONG_SIDE_INCHES = 11.69
+
+# Blobs shorter than this are specks and dust, not characters
+MIN_GLYPH_HEIGHT = 5
+
+# Lines whose boxes are more ink than this are logos, stamps or photos
+MAX_LINE_INK = 0.6
+
+# A region covering more of the image than this is background, not text
+MAX_REGION_SHARE = 0.5
+
+# Pixels of margin kept around each region so glyph edges aren't cut
+REGION_PADDING = 10
+
+
+def downscale_to_dpi(image, target_dpi: int):
+    """
+    Shrink an image whose long side is bigger than an A4 page scanned at
+    target_dpi. Smaller images are returned unchanged.
+    """
+    height, width = image.shape[:2]
+    max_side = round(A4_LONG_SIDE_INCHES * target_dpi)
+
+    if target_dpi <= 0 or max(height, width) <= max_side:
+        return image
+
+    scale = max_side / max(height, width)
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def find_text_regions(binary) -> list:
+    """
+    Text blocks of a binarized image (dark text on light paper), top to bottom.
+    Words are dilated together into lines, and lines close enough to each
+    other are merged into blocks. Returns [] when nothing looks like text.
+    """
+    height, width = binary.shape
+    ink = 255 - binary
+
+    glyph_height = typical_glyph_height(ink)
+    if not glyph_height:
+        return []
+
+    # Wide enough to bridge the gaps between words but not between columns
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (round(glyph_height * 1.5), 3))
+    contours, _ = cv2.findContours(cv2.dilate(ink, kernel), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+    lines = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w < 16 or h < 8 or w * h > MAX_REGION_SHARE * width * height:
+            continue
+        if cv2.countNonZero(ink[y:y + h, x:x + w]) > MAX_LINE_INK * w * h:
+            continue
+        lines.append((x, y, w, h))
+
+    lines = [line for line in lines if not any(_contains(other, line) for other in lines if other != line)]
+    return [_pad(block, width, height) for block in merge_lines(lines)]
+
+
+def typical_glyph_height(ink):
+    """Median height of the character-sized blobs of ink, or None if there are none"""
+    _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    heights = heights[(heights >= MIN_GLYPH_HEIGHT) & (heights <= ink.shape[0] // 10)]
+    if not len(heights):
+        return None
+    return int(np.median(heights))
+
+
+def merge_lines(lines: list) -> list:
+    """
+    Merge line boxes into blocks when they overlap horizontally and are less
+    than two line heights apart, i.e. without a blank line between them.
+    """
+    blocks = []
+
+    for x, y, w, h in sorted(lines, key=lambda line: (line[1], line[0])):
+        for i, (bx, by, bw, bh) in enumerate(blocks):
+            overlaps = x < bx + bw and bx < x + w
+            if overlaps and y - (by + bh) <= 2 * h:
+                left, top = min(x, bx), min(y, by)
+                blocks[i] = (left, top, max(x + w, bx + bw) - left, max(y + h, by + bh) - top)
+                break
+        else:
+            blocks.append((x, y, w, h))
+
+    return sorted(blocks, key=lambda block: (block[1], block[0]))
+
+
+def _contains(outer, inner) -> bool:
+    ox, oy, ow, oh = outer
+    x, y, w, h = inner
+    return ox <= x and oy <= y and ox + ow >= x + w and oy + oh >= y + h
+
+
+def _pad(box, width: int, height: int) -> tuple:
+    x, y, w, h = box
+    left, top = max(0, x - REGION_PADDING), max(0, y - REGION_PADDING)
+    right, bottom = min(width, x + w + REGION_PADDING), min(height, y + h + REGION_PADDING)
+    return left, top, right - left, bottom - top
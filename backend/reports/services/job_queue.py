@@ -0,0 +1,181 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import ReportJob
+from .ocr_admission import OcrBusy
+from .cleanup_report import ReportDeleted
+from .report_processor import process_report
+from .text_extractor import OcrMemoryExceeded
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_report(report):
+    """Queue a stored report for background processing"""
+    return ReportJob.objects.create(report=report)
+
+
+def record_completed(report):
+    """Record a report that was completed without going through the queue"""
+    return ReportJob.objects.create(
+        report=report,
+        status=ReportJob.STATUS_DONE,
+        finished_at=timezone.now(),
+    )
+
+
+def start_inline_job(report, worker_id: str):
+    """
+    Record a report that is being processed right away by worker_id instead
+    of waiting in the queue. Finish it with run_job; if the process dies
+    first, requeue_stale_jobs hands it to a worker like any other job.
+    """
+    return ReportJob.objects.create(
+        report=report,
+        status=ReportJob.STATUS_PROCESSING,
+        locked_by=worker_id,
+        locked_at=timezone.now(),
+        attempts=1,
+    )
+
+
+def claim_next_job(worker_id: str, max_tries: int = 5):
+    """
+    Claim the oldest queued job for this worker, or return None.
+
+    Rows are locked with SKIP LOCKED where the database supports it, and the
+    claim itself is a conditional UPDATE, so a job is only ever handed to one
+    worker even when several processes or nodes poll the same table.
+    """
+    for _ in range(max_tries):
+        with transaction.atomic():
+            job = (
+                ReportJob.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=ReportJob.STATUS_QUEUED)
+                .order_by("created_at")
+                .first()
+            )
+
+            if job is None:
+                return None
+
+            claimed = (
+                ReportJob.objects
+                .filter(pk=job.pk, status=ReportJob.STATUS_QUEUED)
+                .update(
+                    status=ReportJob.STATUS_PROCESSING,
+                    locked_by=worker_id,
+                    locked_at=timezone.now(),
+                    attempts=F("attempts") + 1,
+                    updated_at=timezone.now(),
+                )
+            )
+
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+    return None
+
+
+def run_job(job, **options):
+    """
+    Process a claimed job and record the outcome. Returns the final status.
+    options are passed on to process_report.
+    """
+    max_attempts = settings.REPORT_JOB_MAX_ATTEMPTS
+
+    try:
+        process_report(job.report, **options)
+
+    except OcrBusy as e:
+        # The node is saturated, not the report at fault: retry later
+        # without using up an attempt
+        logger.info(f"Report job {job.id} deferred: {str(e)}")
+        ReportJob.objects.filter(pk=job.pk).update(attempts=F("attempts") - 1)
+        _finish(job, ReportJob.STATUS_QUEUED)
+        return ReportJob.STATUS_QUEUED
+
+    except ReportDeleted as e:
+        # Cleanup removed the report and its job: nothing left to retry
+        logger.warning(f"Report job {job.id} failed: {str(e)}")
+        _finish(job, ReportJob.STATUS_FAILED, error=str(e))
+        return ReportJob.STATUS_FAILED
+
+    except OcrMemoryExceeded as e:
+        # The same pages would run out of memory again on every attempt
+        logger.error(f"Report job {job.id} failed: {str(e)}")
+        _finish(job, ReportJob.STATUS_FAILED, error=str(e))
+        return ReportJob.STATUS_FAILED
+
+    except Exception as e:
+        logger.error(f"Report job {job.id} failed: {str(e)}", exc_info=True)
+
+        new_status = (
+            ReportJob.STATUS_QUEUED
+            if job.attempts < max_attempts
+            else ReportJob.STATUS_FAILED
+        )
+        _finish(job, new_status, error=str(e))
+        return new_status
+
+    _finish(job, ReportJob.STATUS_DONE)
+    return ReportJob.STATUS_DONE
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Release jobs whose worker died mid-processing.
+    Jobs that used up their attempts are marked failed instead.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.REPORT_JOB_STALE_AFTER_SECONDS)
+    stale = ReportJob.objects.filter(
+        status=ReportJob.STATUS_PROCESSING,
+        locked_at__lt=cutoff,
+    )
+
+    failed = (
+        stale.filter(attempts__gte=settings.REPORT_JOB_MAX_ATTEMPTS)
+        .update(
+            status=ReportJob.STATUS_FAILED,
+            error="Worker stopped responding",
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+    )
+    requeued = stale.update(
+        status=ReportJob.STATUS_QUEUED,
+        locked_by="",
+        locked_at=None,
+        updated_at=timezone.now(),
+    )
+
+    if failed or requeued:
+        logger.warning(f"Stale report jobs: {requeued} requeued, {failed} failed")
+
+    return requeued
+
+
+def _finish(job, new_status, error=""):
+    # update() rather than save(): the report (and its job) may have been
+    # removed by cleanup while processing, and save() would re-insert it.
+    ReportJob.objects.filter(
+        pk=job.pk,
+        status=ReportJob.STATUS_PROCESSING,
+        locked_by=job.locked_by,
+    ).update(
+        status=new_status,
+        error=error,
+        locked_by="",
+        locked_at=None,
+        finished_at=timezone.now() if new_status != ReportJob.STATUS_QUEUED else None,
+        updated_at=timezone.now(),
+    )
+    job.status = new_status
+    job.error = error
@@ -0,0 +1,158 @@
+"""
+Node-wide admission control for OCR.
+
+Every Tesseract call on the node, from report workers, their page pools
+and web workers processing batch uploads, first takes one of
+OCR_MAX_CONCURRENT slots. A slot is an exclusive flock on a file in
+OCR_SLOT_DIR, so slots are shared by all processes on the node and the
+kernel releases them when a process dies.
+
+Callers that find every slot taken wait holding one of OCR_MAX_QUEUED
+queue tickets, locked the same way. When the tickets are taken too the
+queue is full, and OcrBusy is raised right away instead of piling up more
+work on a saturated node.
+"""
+import fcntl
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# How often waiting callers retry the slots
+SLOT_POLL_SECONDS = 0.05
+
+# The kernel's table of file locks held on the node
+PROC_LOCKS = "/proc/locks"
+
+
+class OcrBusy(Exception):
+    """The node's OCR queue is full, or a slot didn't free up in time"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.retry_after = settings.OCR_RETRY_AFTER_SECONDS
+
+
+def slot_count() -> int:
+    return settings.OCR_MAX_CONCURRENT or os.cpu_count() or 1
+
+
+def queue_limit() -> int:
+    return settings.OCR_MAX_QUEUED or 4 * slot_count()
+
+
+def slot_dir() -> str:
+    directory = settings.OCR_SLOT_DIR or os.path.join(tempfile.gettempdir(), "medbrief-ocr-slots")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+@contextmanager
+def ocr_slot(deadline=None):
+    """
+    Hold an OCR slot for the duration of the block, waiting in the queue
+    for at most OCR_QUEUE_TIMEOUT_SECONDS. Raises OcrBusy when the queue is
+    full or the wait times out, and DeadlineExceeded if the deadline passes
+    first.
+    """
+    slot = _lock_any("slot", slot_count())
+
+    if slot is None:
+        ticket = _lock_any("queue", queue_limit())
+        if ticket is None:
+            raise OcrBusy("OCR queue is full")
+
+        try:
+            slot = _wait_for_slot(deadline)
+        finally:
+            _unlock(ticket)
+
+    try:
+        yield
+    finally:
+        _unlock(slot)
+
+
+def _wait_for_slot(deadline):
+    give_up = time.monotonic() + settings.OCR_QUEUE_TIMEOUT_SECONDS
+
+    while True:
+        time.sleep(SLOT_POLL_SECONDS)
+
+        slot = _lock_any("slot", slot_count())
+        if slot is not None:
+            return slot
+
+        if deadline is not None:
+            deadline.check("Waiting for OCR")
+        if time.monotonic() >= give_up:
+            raise OcrBusy("Timed out waiting for an OCR slot")
+
+
+def queue_depth() -> dict:
+    """Slots in use and callers waiting for one, across the node"""
+    return {
+        "running": _count_locked("slot", slot_count()),
+        "waiting": _count_locked("queue", queue_limit()),
+        "slots": slot_count(),
+        "queue_limit": queue_limit(),
+    }
+
+
+def ocr_queue_full() -> bool:
+    """Whether new OCR work would be refused right now"""
+    depth = queue_depth()
+    return depth["running"] >= depth["slots"] and depth["waiting"] >= depth["queue_limit"]
+
+
+def _lock_any(kind: str, count: int):
+    """File descriptor of the first free lock of this kind, now held, or None"""
+    directory = slot_dir()
+    for number in range(count):
+        fd = os.open(os.path.join(directory, f"{kind}-{number}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            continue
+        return fd
+    return None
+
+
+def _unlock(fd):
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def _count_locked(kind: str, count: int) -> int:
+    """
+    Number of locks of this kind held, read from the kernel's lock table
+    without touching the locks, so counting never takes a free slot from
+    a caller of _lock_any. Where /proc/locks is missing (not Linux) nothing
+    is counted: ocr_queue_full never refuses, and ocr_slot still raises OcrBusy.
+    """
+    files = set()
+    directory = slot_dir()
+    for number in range(count):
+        try:
+            stat = os.stat(os.path.join(directory, f"{kind}-{number}.lock"))
+        except FileNotFoundError:
+            continue
+        files.add(f"{os.major(stat.st_dev):02x}:{os.minor(stat.st_dev):02x}:{stat.st_ino}")
+
+    try:
+        with open(PROC_LOCKS) as f:
+            table = f.read().splitlines()
+    except OSError:
+        return 0
+
+    # "1: FLOCK  ADVISORY  WRITE 28961 fe:00:13533190 0 EOF"; blocked
+    # waiters are listed as "1: -> FLOCK ..." and don't hold the lock
+    held = set()
+    for line in table:
+        fields = line.split()
+        if len(fields) >= 6 and fields[1] == "FLOCK" and fields[5] in files:
+            held.add(fields[5])
+    return len(held)
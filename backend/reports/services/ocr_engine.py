@@ -0,0 +1,154 @@
+"""
+OCR engines behind ocr_layer.ocr_words, picked with settings.OCR_ENGINE:
+    "tesserocr"    Tesseract loaded in-process through tesserocr, one API per
+                   thread kept for the life of the process, so the language
+                   model is loaded once rather than for every image
+    "pytesseract"  a tesseract subprocess per image, writing a temp file and
+                   reloading the model each time
+    "fake"         no OCR; every image reads as settings.OCR_FAKE_TEXT, for
+                   tests and benchmarks
+    "auto"         tesserocr when it is installed, otherwise pytesseract
+
+Every engine returns Tesseract's TSV output, as pytesseract.image_to_data does,
+and raises DeadlineExceeded when recognition takes longer than timeout seconds.
+"""
+import os
+import shlex
+import threading
+
+import numpy as np
+import pytesseract
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .deadline import DeadlineExceeded
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+TSV_HEADER = (
+    "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\t"
+    "left\ttop\twidth\theight\tconf\ttext"
+)
+
+# Tesseract's own default page segmentation: fully automatic, no OSD
+DEFAULT_PSM = 3
+
+
+class PytesseractEngine:
+    name = "pytesseract"
+
+    def image_to_data(self, image, config: str = "", timeout: float = None) -> str:
+        # pytesseract kills the tesseract process once the timeout passes
+        try:
+            return pytesseract.image_to_data(image, config=config, timeout=timeout or 0)
+        except RuntimeError as e:
+            if str(e) == "Tesseract process timeout":
+                raise DeadlineExceeded(f"OCR timed out after {timeout:.2f}s")
+            raise
+
+
+class TesserocrEngine:
+    name = "tesserocr"
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def image_to_data(self, image, config: str = "", timeout: float = None) -> str:
+        api = self.api()
+        psm, variables = parse_config(config)
+
+        # The API is reused, so -c variables are put back after this call
+        previous = {name: api.GetVariableAsString(name) for name in variables}
+
+        api.SetPageSegMode(psm)
+        for name, value in variables.items():
+            api.SetVariable(name, value)
+
+        try:
+            pixels = np.ascontiguousarray(np.asarray(image))
+            height, width = pixels.shape[:2]
+            channels = 1 if pixels.ndim == 2 else pixels.shape[2]
+            api.SetImageBytes(pixels.tobytes(), width, height, channels, width * channels)
+
+            # Tesseract's own cancel hook stops recognition once the timeout passes
+            if timeout and not api.Recognize(timeout=max(1, int(timeout * 1000))):
+                raise DeadlineExceeded(f"OCR timed out after {timeout:.2f}s")
+            return f"{TSV_HEADER}\n{api.GetTSVText(0)}"
+        finally:
+            api.Clear()
+            for name, value in previous.items():
+                if value is not None:
+                    api.SetVariable(name, value)
+
+    def api(self):
+        # tesserocr APIs can't be shared between threads, and one inherited
+        # through fork must not be reused by the child
+        api = getattr(self.local, "api", None)
+        if api is None or self.local.pid != os.getpid():
+            options = {"lang": settings.OCR_LANGUAGE}
+            if settings.OCR_TESSDATA_PATH:
+                options["path"] = settings.OCR_TESSDATA_PATH
+            api = tesserocr.PyTessBaseAPI(**options)
+            self.local.api = api
+            self.local.pid = os.getpid()
+        return api
+
+
+class FakeEngine:
+    name = "fake"
+
+    def image_to_data(self, image, config: str = "", timeout: float = None) -> str:
+        rows = [TSV_HEADER]
+        for number, word in enumerate(settings.OCR_FAKE_TEXT.split(), start=1):
+            rows.append(f"5\t1\t1\t1\t1\t{number}\t{number * 10}\t0\t10\t10\t95\t{word}")
+        return "\n".join(rows)
+
+
+ENGINES = {
+    "pytesseract": PytesseractEngine,
+    "tesserocr": TesserocrEngine,
+    "fake": FakeEngine,
+}
+
+_engines = {}
+
+
+def get_ocr_engine(name: str = None):
+    """The configured engine, created once per process and reused"""
+    name = name or settings.OCR_ENGINE
+    if name == "auto":
+        name = "tesserocr" if tesserocr is not None else "pytesseract"
+
+    if name not in ENGINES:
+        raise ImproperlyConfigured(
+            f"Unknown OCR_ENGINE {name!r}, expected auto or one of {', '.join(ENGINES)}"
+        )
+    if name == "tesserocr" and tesserocr is None:
+        raise ImproperlyConfigured("OCR_ENGINE is tesserocr but tesserocr is not installed")
+
+    if name not in _engines:
+        _engines[name] = ENGINES[name]()
+    return _engines[name]
+
+
+def parse_config(config: str):
+    """
+    The page segmentation mode and -c variables of a tesseract command line
+    config such as "--oem 3 --psm 6". --oem is ignored; the in-process engine
+    always uses the LSTM model it was loaded with.
+    """
+    psm = DEFAULT_PSM
+    variables = {}
+
+    args = shlex.split(config)
+    for option, value in zip(args, args[1:]):
+        if option == "--psm":
+            psm = int(value)
+        elif option == "-c" and "=" in value:
+            name, variable_value = value.split("=", 1)
+            variables[name] = variable_value
+
+    return psm, variables
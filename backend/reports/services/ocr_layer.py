@@ -0,0 +1,177 @@
+"""
+The OCR layer of a report: per-page text as extracted, kept as a compressed
+side artifact so reports can be re-extracted without re-running Tesseract.
+
+A layer is a dict:
+    {"version": 1, "pages": [page, ...]}
+where each page is either
+    {"index": 0, "source": "text", "text": "..."}         native text layer
+    {"index": 1, "source": "ocr", "words": [word, ...]}   Tesseract output
+    {"index": 2, "source": "skipped"}                      not extracted
+and each OCR word is [block, paragraph, line, left, top, width, height, conf, text].
+OCR pages of mixed PDFs also keep the sparse native "text" found on them,
+without the OCR words that repeat it,
+and PDF pages record the class page_probe gave them under "probe". OCR pages
+of PDFs record the dpi they were rendered at, which word boxes are measured in,
+under "resolution". Pages skipped because OCR ran out of time, rather than
+by early stopping, have "reason": "deadline"; pages left out by early
+stopping have "reason": "early_stop".
+"""
+import gzip
+import json
+
+from .ocr_admission import ocr_slot
+from .ocr_engine import get_ocr_engine
+
+LAYER_VERSION = 1
+
+# Why a page was skipped when its OCR ran out of time
+DEADLINE_REASON = "deadline"
+
+# Why a page was skipped once every early stop field was found
+EARLY_STOP_REASON = "early_stop"
+
+# Columns of Tesseract's TSV output that are kept per word
+TSV_COLUMNS = [
+    "block_num", "par_num", "line_num",
+    "left", "top", "width", "height",
+    "conf",
+]
+
+
+def ocr_words(image, config: str = "", deadline=None) -> list:
+    """
+    Run the configured OCR engine on an image and return its recognised words.
+    The engine runs in one of the node's OCR slots (see ocr_admission).
+    With a deadline, the engine is stopped when it passes (DeadlineExceeded).
+    """
+    with ocr_slot(deadline):
+        timeout = None
+        if deadline is not None:
+            deadline.check("OCR")
+            timeout = deadline.remaining()
+
+        return parse_tsv(get_ocr_engine().image_to_data(image, config=config, timeout=timeout))
+
+
+def parse_tsv(tsv: str) -> list:
+    """Word rows of Tesseract TSV output as compact lists"""
+    lines = tsv.splitlines()
+    if not lines:
+        return []
+
+    header = lines[0].split("\t")
+    positions = [header.index(column) for column in TSV_COLUMNS]
+    text_position = header.index("text")
+    level_position = header.index("level")
+
+    words = []
+    for line in lines[1:]:
+        cells = line.split("\t")
+        if len(cells) <= text_position or cells[level_position] != "5":
+            continue
+
+        text = cells[text_position].strip()
+        if not text:
+            continue
+
+        word = [int(float(cells[i])) for i in positions]
+        word.append(text)
+        words.append(word)
+
+    return words
+
+
+def words_to_text(words: list) -> str:
+    """Rebuild reading-order text: words joined by spaces, one line per Tesseract line"""
+    lines = []
+    current_key = None
+
+    for block, par, line, *_, text in words:
+        key = (block, par, line)
+        if key != current_key:
+            lines.append([])
+            current_key = key
+        lines[-1].append(text)
+
+    return "\n".join(" ".join(line) for line in lines)
+
+
+def mean_confidence(words: list):
+    confidences = [word[7] for word in words if word[7] >= 0]
+    if not confidences:
+        return None
+    return sum(confidences) / len(confidences)
+
+
+def text_page(index: int, text: str, probe: str = None) -> dict:
+    page = {"index": index, "source": "text", "text": text}
+    if probe:
+        page["probe"] = probe
+    return page
+
+
+def ocr_page(index: int, words: list, text: str = "", probe: str = None, resolution: int = None) -> dict:
+    page = {"index": index, "source": "ocr", "words": words}
+    if resolution:
+        page["resolution"] = resolution
+    if text:
+        page["text"] = text
+    if probe:
+        page["probe"] = probe
+    return page
+
+
+def skipped_page(index: int, reason: str = None) -> dict:
+    page = {"index": index, "source": "skipped"}
+    if reason:
+        page["reason"] = reason
+    return page
+
+
+def layer_is_partial(layer: dict) -> bool:
+    """Whether pages were left out because OCR ran out of time"""
+    return any(page.get("reason") == DEADLINE_REASON for page in layer["pages"])
+
+
+def layer_is_complete(layer: dict) -> bool:
+    """Whether every page was extracted, so the layer can stand in for the document"""
+    return all(page["source"] != "skipped" for page in layer["pages"])
+
+
+def make_layer(pages: list) -> dict:
+    return {"version": LAYER_VERSION, "pages": sorted(pages, key=lambda page: page["index"])}
+
+
+def page_text(page: dict) -> str:
+    if page["source"] == "ocr":
+        texts = (page.get("text") or "", words_to_text(page["words"]))
+        return "\n".join(text for text in texts if text)
+    return page.get("text") or ""
+
+
+def probe_counts(layer: dict) -> dict:
+    """How many pages took each extraction path, e.g. {"native": 3, "scanned": 9}"""
+    counts = {}
+    for page in layer["pages"]:
+        probe = page.get("probe") or page["source"]
+        counts[probe] = counts.get(probe, 0) + 1
+    return counts
+
+
+def layer_text(layer: dict) -> str:
+    """Full document text of a layer, pages in order"""
+    texts = (page_text(page) for page in layer["pages"])
+    return "\n".join(text for text in texts if text)
+
+
+def dump_layer(layer: dict) -> bytes:
+    data = json.dumps(layer, separators=(",", ":"), ensure_ascii=False)
+    return gzip.compress(data.encode("utf-8"))
+
+
+def load_layer(data: bytes) -> dict:
+    layer = json.loads(gzip.decompress(data).decode("utf-8"))
+    if layer.get("version") != LAYER_VERSION:
+        raise ValueError(f"Unsupported OCR layer version: {layer.get('version')}")
+    return layer
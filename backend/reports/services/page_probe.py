@@ -0,0 +1,44 @@
+"""
+Cheap per-page classification of PDF pages, run before any layout work.
+
+Counting page.chars and page.images only needs pdfminer's object parse,
+which extract_text reuses afterwards, so the probe costs almost nothing
+on native pages and lets scanned pages without any characters skip the
+layout pass entirely.
+"""
+
+NATIVE = "native"
+SCANNED = "scanned"
+MIXED = "mixed"
+
+# A page with at least this many characters is treated as native text
+NATIVE_MIN_CHARS = 200
+
+# Fewer characters than this means there is no usable text layer
+SCANNED_MAX_CHARS = 20
+
+# Share of the page an image must cover for a sparse-text page to be mixed
+MIXED_MIN_IMAGE_COVERAGE = 0.3
+
+
+def probe_page(page) -> str:
+    """Classify a pdfplumber page as native text, scanned or mixed"""
+    char_count = len(page.chars)
+
+    if char_count >= NATIVE_MIN_CHARS:
+        return NATIVE
+    if char_count < SCANNED_MAX_CHARS:
+        return SCANNED
+
+    if image_coverage(page) >= MIXED_MIN_IMAGE_COVERAGE:
+        return MIXED
+    return NATIVE
+
+
+def image_coverage(page) -> float:
+    """Fraction of the page area covered by embedded images"""
+    page_area = float(page.width * page.height) or 1.0
+    image_area = sum(
+        float(image["width"] * image["height"]) for image in page.images
+    )
+    return min(1.0, image_area / page_area)
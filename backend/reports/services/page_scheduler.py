@@ -0,0 +1,72 @@
+"""
+Helpers for extracting long PDFs incrementally: which fields a page's text
+fills, and which scanned pages are most likely to hold the vitals table and
+should be OCR'd first.
+"""
+import cv2
+import numpy as np
+
+from .analytes import VITAL_ANCHOR_PATTERN
+from .vitals_extractor import extract_vitals
+from .qualitative_extractor import extract_qualitative
+from .patient_extractor import extract_patient_details
+
+# Rendering resolution of the thumbnails used to spot tables on scanned pages
+THUMBNAIL_RESOLUTION = 36
+
+
+def found_fields(text: str) -> set:
+    """Patient detail and vitals keys that this text provides a value for"""
+    if not text:
+        return set()
+
+    fields = set(extract_vitals(text))
+    fields.update(extract_qualitative(text))
+    fields.update(
+        field for field, value in extract_patient_details(text, header_window=None).items()
+        if value != "Not Available"
+    )
+    return fields
+
+
+def order_by_relevance(pdf, page_numbers: list) -> list:
+    """Page numbers sorted so pages most likely to hold vitals come first"""
+    scores = {index: page_relevance(pdf.pages[index]) for index in page_numbers}
+    return sorted(page_numbers, key=lambda index: (-scores[index], index))
+
+
+def page_relevance(page) -> float:
+    """
+    Cheap guess at how likely a page is to hold the vitals table.
+    Keyword hits in whatever characters the page has count most; ruled
+    table lines found in a low resolution thumbnail break ties. Fully
+    scanned pages have no characters, so they are ordered by their table
+    lines alone.
+    """
+    chars = "".join(char["text"] for char in page.chars)
+    keyword_hits = sum(1 for _ in VITAL_ANCHOR_PATTERN.finditer(chars))
+
+    try:
+        thumbnail = np.asarray(
+            page.to_image(resolution=THUMBNAIL_RESOLUTION).original.convert("L")
+        )
+        table_lines = count_table_lines(thumbnail)
+    except Exception:
+        table_lines = 0
+
+    return keyword_hits * 10 + table_lines
+
+
+def count_table_lines(gray) -> int:
+    """Number of long horizontal and vertical rules in a grayscale image"""
+    binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+    height, width = binary.shape
+
+    lines = 0
+    for kernel_size in ((max(1, width // 6), 1), (1, max(1, height // 8))):
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, kernel_size)
+        rules = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel)
+        contours, _ = cv2.findContours(rules, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        lines += len(contours)
+
+    return lines
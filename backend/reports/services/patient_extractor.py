@@ -1,12 +1,11 @@
 import re
 
+# Patient details almost always sit in the header block of the first page
+HEADER_WINDOW = 2000
 
-def extract_patient_details(text: str) -> dict:
-
-    if not text:
-        return {}
-
-    patterns = {
+PATIENT_PATTERNS = {
+    field: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for field, patterns in {
         "patient_id": [
             r"Patient\s*ID\s*[:\-]\s*([A-Za-z0-9\-]+)",
             r"UHID\s*[:\-]\s*([A-Za-z0-9\-]+)",
@@ -27,24 +26,54 @@ def extract_patient_details(text: str) -> dict:
             r"Report\s*Date\s*[:\-]\s*([0-9\-\/]+)",
             r"Date\s*[:\-]\s*([0-9\-\/]+)",
         ],
-    }
+    }.items()
+}
+
+
+def extract_patient_details(text: str, header_window: int = HEADER_WINDOW) -> dict:
+    """
+    Extract patient details, looking in the first header_window characters,
+    up to the end of that line, first and only searching the full text for
+    fields not found there.
+    Pass header_window=None to search the full text directly.
+    """
+
+    if not text:
+        return {}
+
+    header = text[:_header_end(text, header_window)] if header_window else None
 
     extracted = {}
 
-    for field, regex_list in patterns.items():
-        value = "Not Available"
+    for field, regex_list in PATIENT_PATTERNS.items():
+        value = None
 
-        for pattern in regex_list:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                value = match.group(1)
-                break
+        if header is not None:
+            value = _search_field(header, regex_list)
 
-        extracted[field] = normalize_field(field, value)
+        if value is None and (header is None or len(header) < len(text)):
+            value = _search_field(text, regex_list)
+
+        extracted[field] = normalize_field(field, value or "Not Available")
 
     return extracted
 
 
+def _header_end(text: str, header_window: int) -> int:
+    # Extend the header to the end of the line it stops in, so a value
+    # straddling the boundary is never matched cut short
+    end = text.find("\n", header_window)
+    return len(text) if end == -1 else end
+
+
+def _search_field(text: str, regex_list: list):
+    for pattern in regex_list:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+
 def normalize_field(field: str, value: str) -> str:
     if value == "Not Available":
         return value
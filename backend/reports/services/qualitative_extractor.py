@@ -1,23 +1,37 @@
 import re
+from .analytes import QUALITATIVE_KEYS, VALUE_PATTERNS, compile_anchor_pattern
 
-QUALITATIVE_TESTS = {
-    "urine_sugar": ["urine sugar", "sugar"],
-    "hiv": ["hiv"],
-    "hbsag": ["hbsag", "australia antigen"],
-    "vdrl": ["vdrl"]
-}
+# One case-insensitive alternation over every test keyword, compiled once
+QUALITATIVE_ANCHOR_PATTERN = compile_anchor_pattern(QUALITATIVE_KEYS)
+
+NON_REACTIVE_PATTERN = re.compile(r"non[\s\-]*reactive")
 
-VALUES = ["positive", "negative", "present", "absent", "non reactive", "reactive"]
 
 def extract_qualitative(text: str) -> dict:
+    """
+    Extract qualitative test results (HIV, HBsAg, VDRL, urine sugar).
+    The value must follow its keyword within 20 non-letter characters.
+    """
+    if not text:
+        return {}
+
     results = {}
 
-    for test, keywords in QUALITATIVE_TESTS.items():
-        for kw in keywords:
-            pattern = rf"{kw}[^a-z]{{0,20}}({'|'.join(VALUES)})"
-            match = re.search(pattern, text)
-            if match:
-                results[test] = match.group(1)
+    for anchor in QUALITATIVE_ANCHOR_PATTERN.finditer(text):
+        test = anchor.lastgroup
+        if test in results:
+            continue
+
+        match = VALUE_PATTERNS[test].match(text, anchor.end())
+        if match:
+            results[test] = normalize_result(match.group(1))
+
+            if len(results) == len(QUALITATIVE_KEYS):
                 break
 
     return results
+
+
+def normalize_result(value: str) -> str:
+    value = value.lower()
+    return NON_REACTIVE_PATTERN.sub("non reactive", value)
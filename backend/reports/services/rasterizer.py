@@ -0,0 +1,103 @@
+"""
+Rendering PDF pages to grayscale NumPy images for OCR.
+
+Two backends, picked with settings.PDF_RASTERIZER:
+    "pdfplumber"  page.to_image, which reopens the document with pdfium for
+                  every page and goes through an RGB PIL image
+    "pdfium"      one pypdfium2 document per rasterizer, each page rendered
+                  in grayscale straight into a NumPy buffer
+
+Both render without anti-aliasing, so they produce the same pixels.
+A PDF is given either as a file path or as its bytes.
+"""
+import io
+import os
+
+import numpy as np
+import pdfplumber
+import pypdfium2
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def open_pdf(source):
+    """Open a PDF given as a path or as bytes with pdfplumber"""
+    if isinstance(source, (str, os.PathLike)):
+        return pdfplumber.open(source)
+    return pdfplumber.open(io.BytesIO(source))
+
+
+class PdfplumberRasterizer:
+
+    def __init__(self, source, pdf=None):
+        # An already open pdfplumber document is reused rather than parsed again
+        self.owns_pdf = pdf is None
+        self.pdf = open_pdf(source) if pdf is None else pdf
+
+    def render(self, index: int, resolution: int) -> np.ndarray:
+        image = self.pdf.pages[index].to_image(resolution=resolution).original
+        return np.asarray(image.convert("L"))
+
+    def close(self):
+        if self.owns_pdf:
+            self.pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PdfiumRasterizer:
+
+    def __init__(self, source, pdf=None):
+        self.document = pypdfium2.PdfDocument(source)
+
+    def render(self, index: int, resolution: int) -> np.ndarray:
+        page = self.document[index]
+        try:
+            bitmap = page.render(
+                scale=resolution / 72,
+                grayscale=True,
+                no_smoothtext=True,
+                no_smoothpath=True,
+                no_smoothimage=True,
+            )
+            # The bitmap buffer is allocated by Python, so the array can keep
+            # it alive as a view after pdfium's handle is closed
+            image = bitmap.to_numpy()
+            bitmap.close()
+            return image
+        finally:
+            page.close()
+
+    def close(self):
+        self.document.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+RASTERIZERS = {
+    "pdfplumber": PdfplumberRasterizer,
+    "pdfium": PdfiumRasterizer,
+}
+
+
+def open_rasterizer(source, pdf=None, backend: str = None):
+    """
+    Open the configured rasterizer for a PDF. pdf is an optional open
+    pdfplumber document of the same file, for backends that can use it.
+    """
+    backend = backend or settings.PDF_RASTERIZER
+    try:
+        rasterizer_class = RASTERIZERS[backend]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Unknown PDF_RASTERIZER {backend!r}, expected one of {', '.join(RASTERIZERS)}"
+        )
+    return rasterizer_class(source, pdf=pdf)
@@ -0,0 +1,167 @@
+"""
+A small engine running report processing as a sequence of named stages.
+
+Each stage reads the context entries it declares as inputs and returns
+the entries it adds. For every stage the engine records wall and CPU time,
+and how its outputs were obtained:
+
+- "stored": the stage's load hook found a stored intermediate result,
+  e.g. the report's OCR layer, and the work was not repeated
+- "cached": a cacheable stage's outputs were found in the Django cache,
+  keyed by a hash of its inputs
+- "run": the stage ran
+
+Stages that are not required are skipped once the deadline has passed and
+the run is marked partial. A stage that returns only part of its outputs,
+e.g. from a time-limited scan, calls run.mark_incomplete(): the run is
+partial and those outputs are not cached.
+"""
+import hashlib
+import json
+import logging
+import resource
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+STORED = "stored"
+CACHED = "cached"
+RAN = "run"
+SKIPPED = "skipped"
+
+# Context entries the engine itself provides to stages
+RUN_INPUTS = ("run", "deadline")
+
+
+class Stage:
+    """
+    One step of a pipeline: func(**inputs) returns a dict of new context
+    entries. load(**inputs), if given, returns them from a stored result
+    instead, or None to run the stage. Cacheable stages must depend on their inputs only; bump version
+    when their code changes, so cached outputs of the old code are not used.
+    A stage that may be cut short takes the "run" input to mark_incomplete().
+    """
+
+    def __init__(self, name: str, func, inputs=(), load=None, cacheable: bool = False,
+                 required: bool = False, version: int = 1):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.load = load
+        self.cacheable = cacheable
+        self.required = required
+        self.version = version
+
+
+class PipelineRun:
+    """The context, stage timings and outcome of one pipeline run"""
+
+    def __init__(self, context: dict, deadline, use_cache: bool):
+        self.context = context
+        self.deadline = deadline
+        self.use_cache = use_cache
+        self.timings = {}
+        self.partial = False
+        self.incomplete = False
+
+    def include(self, run, prefix: str):
+        """Record the stages of a nested run as this run's, under prefix"""
+        for name, timing in run.timings.items():
+            self.timings[f"{prefix}.{name}"] = timing
+        self.partial = self.partial or run.partial
+
+    def mark_incomplete(self):
+        """The running stage's outputs are partial: keep them out of the cache"""
+        self.incomplete = True
+        self.partial = True
+
+    def ran(self, name: str) -> bool:
+        return name in self.timings and self.timings[name]["how"] != SKIPPED
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{name} {timing['how']}" if timing["how"] == SKIPPED
+            else f"{name} {timing['wall']:.2f}s (cpu {timing['cpu']:.2f}s, {timing['how']})"
+            for name, timing in self.timings.items()
+        )
+
+
+class ReportPipeline:
+
+    def __init__(self, name: str, stages: list):
+        self.name = name
+        self.stages = stages
+
+    def run(self, deadline=None, use_cache: bool = True, **context) -> PipelineRun:
+        """
+        Run every stage over context. The run itself and its deadline are
+        available to stages as the "run" and "deadline" inputs.
+        """
+        run = PipelineRun(context, deadline or Deadline(), use_cache)
+        context["run"] = run
+        context["deadline"] = run.deadline
+
+        for stage in self.stages:
+            if not stage.required and run.deadline.expired():
+                run.partial = True
+                run.timings[stage.name] = {"how": SKIPPED}
+                continue
+
+            try:
+                self._run_stage(stage, run)
+            except DeadlineExceeded as e:
+                logger.warning(f"{self.name} stage {stage.name} stopped early: {str(e)}")
+                run.partial = True
+                run.timings[stage.name] = {"how": SKIPPED}
+
+        return run
+
+    def _run_stage(self, stage, run):
+        inputs = {name: run.context.get(name) for name in stage.inputs}
+        wall, cpu = time.perf_counter(), cpu_time()
+
+        how = STORED
+        outputs = stage.load(**inputs) if stage.load is not None else None
+
+        key = None
+        if outputs is None and stage.cacheable and run.use_cache and settings.REPORT_PIPELINE_CACHE_SECONDS:
+            key = self.cache_key(stage, inputs)
+            how = CACHED
+            outputs = cache.get(key)
+
+        if outputs is None:
+            how = RAN
+            run.incomplete = False
+            outputs = stage.func(**inputs) or {}
+            if key is not None and not run.incomplete:
+                cache.set(key, outputs, settings.REPORT_PIPELINE_CACHE_SECONDS)
+
+        run.context.update(outputs)
+        run.timings[stage.name] = {
+            "how": how,
+            "wall": round(time.perf_counter() - wall, 4),
+            "cpu": round(cpu_time() - cpu, 4),
+        }
+
+    def cache_key(self, stage, inputs: dict) -> str:
+        # The run and its deadline are not data the outputs depend on
+        data = {name: value for name, value in inputs.items() if name not in RUN_INPUTS}
+        digest = hashlib.sha256(
+            json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return f"report-pipeline:{self.name}:{stage.name}:{stage.version}:{digest}"
+
+
+def cpu_time() -> float:
+    """
+    CPU seconds of this thread plus those of finished child processes, so
+    OCR page pools count towards the stage that ran them. Children of other
+    threads, e.g. in a batch, may be counted too.
+    """
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.thread_time() + children.ru_utime + children.ru_stime
@@ -0,0 +1,440 @@
+import os
+import tempfile
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+
+from .text_extractor import IMAGE_EXTENSIONS, decode_image, extract_layer, quick_image_text
+from .image_hash import dhash
+from .ocr_layer import layer_text, layer_is_complete, layer_is_partial, dump_layer, load_layer
+from .deadline import Deadline, DeadlineExceeded
+from .text_normalizer import normalize_text
+from .patient_extractor import extract_patient_details
+from .vitals_extractor import scan_vitals
+from .qualitative_extractor import extract_qualitative
+from .vitals_comparator import compare_vitals
+from .observation_engine import generate_observations
+from .conclusion_engine import generate_conclusion
+from .pdf_generator import generate_summary_pdf
+from .cleanup_report import ReportDeleted, cleanup_old_reports, save_report_fields
+from .deduplication import (
+    find_processed_duplicate,
+    find_similar_image_report,
+    reuse_processed_results,
+    same_numbers,
+)
+from .report_pipeline import ReportPipeline, Stage
+
+logger = logging.getLogger(__name__)
+
+
+def process_report(report, source=None, cleanup: bool = True, ocr_workers: int = None, deadline=None):
+    """
+    Run OCR and extraction for a stored report and save the results on it.
+    Extracts patient details, vitals, observations, conclusion and the PDF summary.
+    source is the file's content when the caller already holds it in memory
+    (see upload_source); otherwise it is read through the storage backend.
+    Callers processing several reports of a user together pass cleanup=False
+    and clean up once at the end; ocr_workers caps the PDF page OCR processes.
+
+    Processing stops within deadline (default REPORT_DEADLINE_SECONDS), with
+    OCR and analysis held to their own budgets. Whatever was extracted by
+    then is saved and the report is marked partial.
+
+    The stages run through REPORT_PIPELINE; their timings are saved on the
+    report as stage_timings.
+    """
+    if deadline is None:
+        deadline = Deadline(settings.REPORT_DEADLINE_SECONDS)
+
+    # Identical file already processed: reuse its results, skip OCR
+    duplicate = find_processed_duplicate(report.content_hash, exclude_id=report.id)
+    if duplicate is not None:
+        logger.info(f"Report {report.id} reuses results of identical report {duplicate.id}")
+        return finish_duplicate_report(report, duplicate, cleanup=cleanup)
+
+    run = REPORT_PIPELINE.run(deadline=deadline, report=report, source=source, ocr_workers=ocr_workers)
+    logger.info(f"Report {report.id} stages: {run.summary()}")
+
+    if not run.ran("pdf"):
+        logger.warning(f"Report {report.id}: out of time, PDF summary skipped")
+
+    report.partial = report.partial or run.partial
+    report.stage_timings = run.timings
+    save_report_fields(report, "partial", "stage_timings")
+
+    if report.partial:
+        logger.warning(f"Report {report.id} saved with partial results")
+
+    if cleanup:
+        cleanup_user_reports(report)
+
+    return report
+
+
+def _load_stored_layer(report, **inputs):
+    # Resume from the stored OCR layer when there is one
+    layer = load_report_layer(report)
+    return {"layer": layer} if layer is not None else None
+
+
+def _ocr_stage(report, source, ocr_workers, deadline):
+    if source is None:
+        source = report_file_source(report)
+
+    # Confirming a similar photo counts towards the OCR budget too
+    ocr_deadline = deadline.stage(settings.REPORT_OCR_BUDGET_SECONDS)
+
+    # Photos are decoded once, for the perceptual hash and for OCR
+    layer = None
+    if Path(report.file.name).suffix.lower() in IMAGE_EXTENSIONS:
+        image = decode_image(source)
+        if image is not None:
+            source = image
+            layer = reuse_similar_image_layer(report, image, deadline=ocr_deadline)
+
+    if layer is None:
+        layer = extract_layer(source, report.file.name, workers=ocr_workers, deadline=ocr_deadline)
+        save_report_layer(report, layer)
+
+    return {"layer": layer}
+
+
+def _normalize_stage(layer):
+    return {"text": normalize_text(layer_text(layer))}
+
+
+def _analysis_stage(run, text, deadline):
+    analysis = ANALYSIS_PIPELINE.run(
+        deadline=deadline.stage(settings.REPORT_ANALYSIS_BUDGET_SECONDS),
+        use_cache=run.use_cache,
+        text=text,
+    )
+    run.include(analysis, "analysis")
+    return {"results": analysis_results(analysis)}
+
+
+def _save_stage(report, layer, text, results):
+    # Save all extracted data
+    report.extracted_text = text
+    report.partial = layer_is_partial(layer) or results["partial"]
+    apply_results(report, results)
+    save_report_fields(report, "extracted_text", "ocr_layer", "image_hash", "partial", *ANALYSIS_FIELDS)
+
+
+def _pdf_stage(report):
+    generate_report_pdf(report)
+
+
+# OCR, analysis and the PDF summary of a stored report; see process_report
+REPORT_PIPELINE = ReportPipeline("report", [
+    Stage("ocr", _ocr_stage, inputs=["report", "source", "ocr_workers", "deadline"],
+          load=_load_stored_layer, required=True),
+    Stage("normalize", _normalize_stage, inputs=["layer"], required=True),
+    Stage("analysis", _analysis_stage, inputs=["run", "text", "deadline"], required=True),
+    Stage("save", _save_stage, inputs=["report", "layer", "text", "results"], required=True),
+    Stage("pdf", _pdf_stage, inputs=["report"]),
+])
+
+
+def reuse_similar_image_layer(report, image, deadline=None):
+    """
+    Record the photo's perceptual hash on the report and, with
+    IMAGE_NEAR_DUPLICATES on, return the OCR layer of a recent shot of the
+    same page by the same user, sharing its stored file. A hash match is
+    confirmed by a quick OCR pass reading the same numbers, within deadline;
+    a pass cut short confirms nothing. None means OCR it.
+    """
+    report.image_hash = dhash(image)
+    if not settings.IMAGE_NEAR_DUPLICATES:
+        return None
+
+    similar = find_similar_image_report(report, report.image_hash)
+    if similar is None:
+        return None
+
+    layer = load_report_layer(similar)
+    if layer is None:
+        return None
+
+    try:
+        quick_text = quick_image_text(image, deadline=deadline)
+    except DeadlineExceeded as e:
+        logger.warning(f"Report {report.id}: similar photo not confirmed: {str(e)}")
+        return None
+
+    if not same_numbers(quick_text, layer_text(layer)):
+        logger.info(f"Report {report.id} looks like photo report {similar.id} but reads differently")
+        return None
+
+    logger.info(f"Report {report.id} reuses the OCR of similar photo report {similar.id}")
+    report.ocr_layer = similar.ocr_layer.name
+    return layer
+
+
+def report_file_source(report):
+    """
+    The stored file as extract_layer takes it: a path when the storage is
+    local disk, otherwise its bytes read through the storage API.
+    """
+    try:
+        return report.file.path
+    except NotImplementedError:
+        with report.file.open("rb") as f:
+            return f.read()
+
+
+def upload_source(uploaded_file):
+    """
+    An uploaded file as extract_layer takes it, without another copy:
+    the temporary file Django already wrote for large uploads, or a
+    memoryview of the in-memory buffer for small ones.
+    """
+    if hasattr(uploaded_file, "temporary_file_path"):
+        return uploaded_file.temporary_file_path()
+
+    buffer = uploaded_file.file
+    if hasattr(buffer, "getbuffer"):
+        return buffer.getbuffer()
+
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def reevaluate_report(report):
+    """
+    Recompute everything derived from the stored extracted text, without OCR.
+    Fields are set on the report but not saved, so callers can batch writes.
+    Cached analysis results are not used: re-evaluation follows code changes.
+    """
+    apply_results(report, analyze_text(report.extracted_text or "", use_cache=False))
+    return report
+
+
+def analyze_text(text: str, deadline=None, use_cache: bool = True) -> dict:
+    """
+    Patient details, vitals and their evaluation extracted from normalized text.
+    With a deadline, steps not started before it passes are left out: their
+    fields stay None and "partial" is True.
+    """
+    return analysis_results(ANALYSIS_PIPELINE.run(deadline=deadline, use_cache=use_cache, text=text))
+
+
+def analysis_results(run) -> dict:
+    results = {field: run.context.get(field) for field in ANALYSIS_FIELDS}
+    results["partial"] = run.partial
+    if run.partial:
+        logger.warning("Analysis stopped early: out of time")
+    return results
+
+
+def _patient_details_stage(text):
+    patient_details = extract_patient_details(text)
+    return {"patient_details": {k: v or "Not Available" for k, v in patient_details.items()}}
+
+
+def _vitals_stage(run, text):
+    vitals, complete = scan_vitals(text)
+    if not complete:
+        run.mark_incomplete()
+    return {"vitals": vitals}
+
+
+def _bmi_stage(vitals, patient_details):
+    # Calculate BMI if available
+    bmi = None
+    try:
+        bmi_value = vitals.get("bmi")
+        if bmi_value:
+            bmi = round(float(bmi_value), 1)
+    except (ValueError, TypeError):
+        pass
+
+    # Calculate BMI from weight and height if not extracted
+    if bmi is None:
+        try:
+            weight = float(patient_details.get("weight", 0))
+            height_cm = float(patient_details.get("height", 0))
+            if weight > 0 and height_cm > 0:
+                height_m = height_cm / 100
+                bmi = round(weight / (height_m ** 2), 1)
+        except (ValueError, TypeError, ZeroDivisionError):
+            pass
+
+    # Extract respiratory rate
+    respiratory_rate = None
+    try:
+        rr_value = vitals.get("respiratory_rate")
+        if rr_value:
+            respiratory_rate = float(rr_value)
+    except (ValueError, TypeError):
+        pass
+
+    return {"bmi": bmi, "respiratory_rate": respiratory_rate}
+
+
+def _qualitative_stage(text, vitals):
+    return {"vitals": {**vitals, **extract_qualitative(text)}}
+
+
+def _comparison_stage(vitals, patient_details):
+    # Compare vitals with normal ranges
+    return {"comparison_table": compare_vitals(vitals=vitals, gender=patient_details.get("gender"))}
+
+
+def _observations_stage(comparison_table):
+    # Generate AI observations and conclusions
+    return {
+        "key_observations": generate_observations(comparison_table),
+        "final_conclusion": generate_conclusion(comparison_table),
+    }
+
+
+# Extraction and evaluation of normalized text; each stage depends only on
+# its inputs, so its results are cached by their hash. Patient details are
+# always extracted, the rest only while there is time.
+ANALYSIS_PIPELINE = ReportPipeline("analysis", [
+    Stage("patient_details", _patient_details_stage, inputs=["text"], cacheable=True, required=True),
+    Stage("vitals", _vitals_stage, inputs=["run", "text"], cacheable=True, version=2),
+    Stage("bmi", _bmi_stage, inputs=["vitals", "patient_details"], cacheable=True),
+    Stage("qualitative", _qualitative_stage, inputs=["text", "vitals"], cacheable=True),
+    Stage("comparison", _comparison_stage, inputs=["vitals", "patient_details"], cacheable=True),
+    Stage("observations", _observations_stage, inputs=["comparison_table"], cacheable=True),
+])
+
+
+# Fields written by analyze_text, e.g. for bulk_update
+ANALYSIS_FIELDS = [
+    "patient_details",
+    "vitals",
+    "comparison_table",
+    "key_observations",
+    "final_conclusion",
+    "bmi",
+    "respiratory_rate",
+]
+
+
+def apply_results(report, results: dict):
+    for field in ANALYSIS_FIELDS:
+        setattr(report, field, results[field])
+
+
+def load_report_layer(report):
+    """
+    The report's stored OCR layer, or None if missing, unreadable or with
+    pages left out by a deadline or early stopping, so the OCR is run again
+    in full.
+    """
+    if not report.ocr_layer:
+        return None
+
+    try:
+        with report.ocr_layer.open("rb") as f:
+            layer = load_layer(f.read())
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable OCR layer for report {report.id}: {str(e)}")
+        return None
+
+    if not layer_is_complete(layer):
+        return None
+    return layer
+
+
+def save_report_layer(report, layer):
+    """Persist the OCR layer right away so a later failure never costs the OCR work"""
+    report.ocr_layer.save(
+        f"ocr_layer_{report.id}.json.gz",
+        ContentFile(dump_layer(layer)),
+        save=False,
+    )
+    try:
+        save_report_fields(report, "ocr_layer", "image_hash")
+    except ReportDeleted:
+        report.ocr_layer.delete(save=False)
+        raise
+
+
+def finish_duplicate_report(report, source, cleanup: bool = True):
+    """Complete a report by copying the results of an identical processed one"""
+    reuse_processed_results(report, source)
+    return finish_copied_report(report, cleanup=cleanup)
+
+
+def finish_copied_report(report, cleanup: bool = True):
+    """
+    Render the PDF summary of a report whose results were already copied
+    with reuse_processed_results, if the source had none.
+    """
+    if not report.summary_pdf:
+        generate_report_pdf(report)
+
+    if cleanup:
+        cleanup_user_reports(report)
+    return report
+
+
+def cleanup_user_reports(report, keep: int = 6):
+    # Cleanup old reports (keep last 6, or more for a larger batch)
+    if not report.user_id:
+        return
+
+    try:
+        cleanup_old_reports(report.user, keep=max(6, keep))
+    except Exception as e:
+        logger.warning(f"Cleanup failed: {str(e)}")
+
+
+def generate_report_pdf(report) -> bool:
+    """
+    Render the PDF summary for a processed report. Returns False on failure,
+    and raises ReportDeleted if the report was deleted meanwhile.
+    """
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            generate_summary_pdf(report, tmp.name)
+            tmp.seek(0)
+
+            pdf_filename = f"Medical_Report_Summary_{report.id}.pdf"
+            report.summary_pdf.save(pdf_filename, File(tmp), save=False)
+            try:
+                save_report_fields(report, "summary_pdf")
+            except ReportDeleted:
+                report.summary_pdf.delete(save=False)
+                os.unlink(tmp.name)
+                raise
+            logger.info(f"PDF generated successfully for report {report.id}")
+
+        # Clean up temp file
+        try:
+            os.unlink(tmp.name)
+        except Exception as e:
+            logger.warning(f"Failed to delete temp file: {e}")
+
+        return True
+
+    except ReportDeleted:
+        raise
+
+    except Exception as e:
+        logger.error(f"PDF generation failed for report {report.id}: {str(e)}")
+        # Continue without PDF - it's not critical
+        return False
+
+
+def build_report_result(report) -> dict:
+    """Response payload describing the extracted results of a report"""
+    return {
+        "report_id": report.id,
+        "bmi": report.bmi,
+        "respiratory_rate": report.respiratory_rate,
+        "final_conclusion": report.final_conclusion,
+        "patient_details": report.patient_details or {},
+        "vitals": report.vitals or {},
+        "key_observations": report.key_observations or [],
+        "pdf_generated": bool(report.summary_pdf),
+        "partial": report.partial,
+    }
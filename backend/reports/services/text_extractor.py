@@ -1,54 +1,528 @@
-import pdfplumber
-import pytesseract
+import os
+import logging
+import resource
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import cv2
 import numpy as np
 from pathlib import Path
+from django.conf import settings
+
+from .ocr_layer import (
+    ocr_words,
+    words_to_text,
+    mean_confidence,
+    text_page,
+    ocr_page,
+    skipped_page,
+    make_layer,
+    DEADLINE_REASON,
+    EARLY_STOP_REASON,
+    layer_text,
+    page_text,
+    probe_counts,
+)
+from .image_regions import downscale_to_dpi, find_text_regions
+from .page_probe import probe_page, NATIVE, SCANNED
+from .rasterizer import open_pdf, open_rasterizer
+from .page_scheduler import found_fields, order_by_relevance
+from .deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Rendering resolution for OCR when the adaptive ladder is off
+OCR_RESOLUTION = 300
+
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+
+# How long to wait for the workers of a broken OCR pool to be reaped
+WORKER_EXIT_TIMEOUT_SECONDS = 5
+
+# A photo is one uniform block of text
+PHOTO_OCR_CONFIG = r"--oem 3 --psm 6"
+
+
+class OcrMemoryExceeded(Exception):
+    """An OCR worker process ran out of memory"""
 
 
-def extract_text(file_path: str) -> str:
+def extract_text(source, name: str = None) -> str:
     """
     Detect file type and extract text accordingly.
     """
-    extension = Path(file_path).suffix.lower()
+    return layer_text(extract_layer(source, name))
 
-    if extension == ".pdf":
-        return extract_from_pdf(file_path)
-    elif extension in [".jpg", ".jpeg", ".png"]:
-        return extract_from_image(file_path)
+
+def extract_layer(source, name: str = None, workers: int = None, deadline=None) -> dict:
+    """
+    Detect file type and extract the per-page OCR layer accordingly.
+    source is a file path, the file's content as bytes or any other buffer,
+    or an image already decoded by decode_image; name then gives the file
+    type. workers caps the
+    processes OCR-ing PDF pages (default OCR_PAGE_WORKERS). Pages whose OCR
+    a deadline cuts short are skipped with reason "deadline".
+    """
+    extension = Path(name or source).suffix.lower()
+
+    if extension == ".pdf" and not isinstance(source, (str, os.PathLike, bytes)):
+        source = bytes(source)
+
+    if extension == ".pdf" and settings.PDF_EARLY_STOP:
+        pages = extract_pdf_pages_until_complete(source, workers=workers, deadline=deadline)
+    elif extension == ".pdf":
+        pages = extract_pdf_pages(source, workers, deadline)
+    elif extension in IMAGE_EXTENSIONS:
+        pages = extract_image_pages(source, deadline)
     else:
-        return ""
+        pages = []
+
+    return make_layer(pages)
+
+
+
+def extract_from_pdf(source, workers: int = None) -> str:
+    return layer_text(make_layer(extract_pdf_pages(source, workers)))
+
+
+def extract_pdf_pages(source, workers: int = None, deadline=None) -> list:
+    """
+    Extract the text layer of every page, OCR-ing scanned and mixed pages.
+    With more than one worker, those pages are OCR'd in a process pool.
+    """
+    workers = get_pdf_ocr_workers(workers)
+
+    pages = []
+    ocr_pending = {}
+
+    with open_pdf(source) as pdf:
+        for index, page in enumerate(pdf.pages):
+            probe, text, boxes = read_text_layer(page)
+
+            if probe == NATIVE:
+                pages.append(text_page(index, text, probe))
+            else:
+                ocr_pending[index] = (probe, text, boxes)
+
+        if ocr_pending and not use_ocr_pool(workers, len(ocr_pending)):
+            with open_rasterizer(source, pdf=pdf) as rasterizer:
+                for index in ocr_pending:
+                    result = _ocr_or_timeout(ocr_pdf_page, rasterizer, index, deadline)
+                    pages.append(_ocr_result_page(index, result, ocr_pending))
+
+    if ocr_pending and use_ocr_pool(workers, len(ocr_pending)):
+        page_numbers = list(ocr_pending)
+        for index, result in zip(page_numbers, ocr_pdf_pages_parallel(source, page_numbers, workers, deadline)):
+            pages.append(_ocr_result_page(index, result, ocr_pending))
+
+    log_page_mix(source, pages)
+    return pages
+
+
+def extract_pdf_pages_until_complete(source, target_fields=None, workers: int = None, deadline=None) -> list:
+    """
+    Extract pages only until every target field has been found.
+    Native text pages are read first, in order, since they cost no OCR.
+    Scanned pages are then OCR'd most-relevant first, one wave of workers
+    at a time, and the remaining pages are recorded as skipped.
+    """
+    workers = get_pdf_ocr_workers(workers)
 
+    targets = set(target_fields or settings.PDF_EARLY_STOP_FIELDS)
+    found = set()
+    pages = []
+    ocr_pending = {}
 
+    with open_pdf(source) as pdf:
+        page_count = len(pdf.pages)
 
-def extract_from_pdf(file_path: str) -> str:
-    text_blocks = []
+        for index, page in enumerate(pdf.pages):
+            if targets <= found:
+                break
 
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
+            probe, text, boxes = read_text_layer(page)
+            found |= found_fields(text)
 
-            if page_text:
-                text_blocks.append(page_text)
+            if probe == NATIVE:
+                pages.append(text_page(index, text, probe))
             else:
+                ocr_pending[index] = (probe, text, boxes)
+
+        scanned_pages = list(ocr_pending)
+        if scanned_pages and not targets <= found:
+            scanned_pages = order_by_relevance(pdf, scanned_pages)
+
+            if not use_ocr_pool(workers, len(scanned_pages)):
+                with open_rasterizer(source, pdf=pdf) as rasterizer:
+                    for index in scanned_pages:
+                        if targets <= found:
+                            break
+                        result = _ocr_or_timeout(ocr_pdf_page, rasterizer, index, deadline)
+                        page = _ocr_result_page(index, result, ocr_pending)
+                        pages.append(page)
+                        found |= found_fields(page_text(page))
+            else:
+                pool_size = min(workers, len(scanned_pages))
+                with _ocr_executor(source, pool_size, deadline) as executor:
+                    while scanned_pages and not targets <= found:
+                        wave, scanned_pages = scanned_pages[:pool_size], scanned_pages[pool_size:]
+                        for index, result in zip(wave, _map_pages(executor, wave)):
+                            page = _ocr_result_page(index, result, ocr_pending)
+                            pages.append(page)
+                            found |= found_fields(page_text(page))
+
+    extracted = {page["index"] for page in pages}
+    pages.extend(
+        skipped_page(index, reason=EARLY_STOP_REASON)
+        for index in range(page_count) if index not in extracted
+    )
+
+    log_page_mix(source, pages)
+    return pages
+
+
+def read_text_layer(page):
+    """
+    Probe the page, then run the layout pass only where a text layer exists.
+    Returns (probe, text, boxes); native pages without extractable text count
+    as scanned. For pages to be OCR'd, boxes are the native words' bounding
+    boxes in points, so OCR words repeating them can be dropped.
+    The page's parsed objects and layout are released afterwards.
+    """
+    try:
+        probe = probe_page(page)
+        if probe == SCANNED and not page.chars:
+            return probe, "", []
+
+        text = page.extract_text() or ""
+        if probe == NATIVE:
+            if text.strip():
+                return probe, text, []
+            probe = SCANNED
+
+        boxes = [
+            (word["x0"], word["top"], word["x1"], word["bottom"])
+            for word in page.extract_words()
+        ]
+        return probe, text, boxes
+    finally:
+        release_page(page)
+
+
+def release_page(page):
+    """
+    Drop what pdfplumber caches on a page: its objects, layout and text map.
+    The document keeps every page, so otherwise a long PDF's caches add up
+    to hundreds of MB; a page read again is simply parsed again.
+
+    The text map is only cleared when get_textmap is cached per page, as in
+    pdfplumber 0.10. A cache on the Page class would be shared by every open
+    page in the process, including other documents and threads, so it is left
+    alone.
+    """
+    page.flush_cache()
+    if "get_textmap" in vars(page):
+        page.get_textmap.cache_clear()
+
+
+def _ocr_result_page(index: int, result, ocr_pending: dict) -> dict:
+    if result is None:
+        return skipped_page(index, reason=DEADLINE_REASON)
+
+    probe, text, boxes = ocr_pending[index]
+    words, resolution = result
+    words = drop_native_words(words, boxes, resolution)
+    return ocr_page(index, words, text=text, probe=probe, resolution=resolution)
+
+
+def drop_native_words(words: list, boxes: list, resolution: int) -> list:
+    """
+    OCR words whose centre doesn't fall in a native word's box, since the
+    page's native text is kept as well. boxes are in points, words in pixels
+    at resolution.
+    """
+    if not boxes:
+        return words
+
+    scale = resolution / 72
+    pixel_boxes = [[coordinate * scale for coordinate in box] for box in boxes]
+
+    kept = []
+    for word in words:
+        left, top, width, height = word[3:7]
+        x, y = left + width / 2, top + height / 2
+        if not any(x0 <= x <= x1 and top0 <= y <= bottom for x0, top0, x1, bottom in pixel_boxes):
+            kept.append(word)
+    return kept
+
+
+def _ocr_or_timeout(ocr, *args):
+    """ocr(*args), or None once the deadline has cut it short"""
+    try:
+        return ocr(*args)
+    except DeadlineExceeded as e:
+        logger.warning(f"Skipping OCR: {str(e)}")
+        return None
+
+
+def log_page_mix(source, pages: list):
+    counts = probe_counts({"pages": pages})
+    name = Path(source).name if isinstance(source, (str, os.PathLike)) else f"{len(source)} byte upload"
+    logger.info(f"PDF page mix for {name}: {counts}")
+
+
+def ocr_pdf_page(rasterizer, index: int, deadline=None) -> tuple:
+    """
+    OCR a page at OCR_RESOLUTION, or with OCR_ADAPTIVE_RESOLUTION on, at each
+    resolution of the ladder in turn until the result is good enough.
+    If the deadline cuts a higher resolution short, the last result is kept.
+    Returns (words, resolution the words were read at).
+    """
+    if not settings.OCR_ADAPTIVE_RESOLUTION:
+        return ocr_pdf_page_at(rasterizer, index, OCR_RESOLUTION, deadline), OCR_RESOLUTION
+
+    ladder = sorted(settings.OCR_RESOLUTION_LADDER)
+    words, resolution = ocr_pdf_page_at(rasterizer, index, ladder[0], deadline), ladder[0]
+    for higher in ladder[1:]:
+        if ocr_is_acceptable(words):
+            break
+        logger.debug(f"Re-rendering page {index + 1} above {resolution} dpi")
+        try:
+            words, resolution = ocr_pdf_page_at(rasterizer, index, higher, deadline), higher
+        except DeadlineExceeded:
+            logger.warning(f"Keeping page {index + 1} at {resolution} dpi: out of time")
+            break
+
+    return words, resolution
+
+
+def ocr_pdf_page_at(rasterizer, index: int, resolution: int, deadline=None) -> list:
+    page_image = rasterizer.render(index, resolution)
+    return ocr_words(page_image, deadline=deadline)
+
+
+def ocr_is_acceptable(words: list) -> bool:
+    """Whether a low resolution OCR pass is confident and complete enough to keep"""
+    confidence = mean_confidence(words)
+    if confidence is None or confidence < settings.OCR_MIN_CONFIDENCE:
+        return False
+
+    if settings.OCR_MIN_FIELDS > 0:
+        return len(found_fields(words_to_text(words))) >= settings.OCR_MIN_FIELDS
+    return True
+
+
+def ocr_pdf_pages_parallel(source, page_numbers: list, workers: int, deadline=None) -> list:
+    """
+    OCR the given pages in a bounded process pool.
+    Returns each page's (words, resolution) in the order given, regardless of
+    finish order, or None for pages the deadline cut short.
+    """
+    pool_size = min(workers, len(page_numbers))
+
+    with _ocr_executor(source, pool_size, deadline) as executor:
+        return _map_pages(executor, page_numbers)
+
+
+def _map_pages(executor, page_numbers: list) -> list:
+    # Collected one by one so pages done before the deadline are kept
+    futures = [executor.submit(_ocr_worker_page, index) for index in page_numbers]
+    workers = list((getattr(executor, "_processes", None) or {}).values())
+    try:
+        return [_ocr_or_timeout(future.result) for future in futures]
+    except MemoryError as e:
+        raise OcrMemoryExceeded(f"OCR worker ran out of memory: {e!r}") from e
+    except BrokenProcessPool as e:
+        if memory_exit(workers):
+            raise OcrMemoryExceeded(f"OCR worker ran out of memory: {e!r}") from e
+        # Any other crash is retried like other failures
+        raise
+
+
+def memory_exit(workers: list) -> bool:
+    """
+    Whether one of a broken pool's worker processes died for lack of memory:
+    killed by the kernel's OOM killer (SIGKILL), or, under
+    OCR_MEMORY_LIMIT_MB, aborted by Tesseract or Leptonica failing to
+    allocate (SIGABRT). The pool terminates the other workers itself.
+    """
+    memory_signals = {signal.SIGKILL}
+    if settings.PDF_BOUNDED_MEMORY and settings.OCR_MEMORY_LIMIT_MB:
+        memory_signals.add(signal.SIGABRT)
+
+    for worker in workers:
+        worker.join(WORKER_EXIT_TIMEOUT_SECONDS)
+        if worker.exitcode is not None and -worker.exitcode in memory_signals:
+            return True
+    return False
+
+
+def _ocr_executor(source, pool_size: int, deadline=None) -> ProcessPoolExecutor:
+    # Split the cores between the pool workers so Tesseract's own OpenMP
+    # threads don't oversubscribe the machine.
+    omp_threads = max(1, (os.cpu_count() or 1) // pool_size)
+
+    memory_limit_mb = settings.OCR_MEMORY_LIMIT_MB if settings.PDF_BOUNDED_MEMORY else 0
+
+    return ProcessPoolExecutor(
+        max_workers=pool_size,
+        initializer=_init_ocr_worker,
+        initargs=(source, omp_threads, deadline, memory_limit_mb),
+    )
+
+
+def get_ocr_page_workers() -> int:
+    workers = settings.OCR_PAGE_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def get_pdf_ocr_workers(workers: int = None) -> int:
+    """
+    Processes OCR-ing a PDF's pages. Each holds one rendered page, so in
+    PDF_BOUNDED_MEMORY mode there are at most PDF_MAX_RENDERED_PAGES.
+    """
+    if workers is None:
+        workers = get_ocr_page_workers()
+    if settings.PDF_BOUNDED_MEMORY:
+        workers = min(workers, max(1, settings.PDF_MAX_RENDERED_PAGES))
+    return workers
+
+
+def use_ocr_pool(workers: int, page_count: int) -> bool:
+    # In bounded memory mode OCR always runs in child processes, under
+    # OCR_MEMORY_LIMIT_MB, so running out of memory can't take this process down
+    return settings.PDF_BOUNDED_MEMORY or (workers > 1 and page_count > 1)
+
 
-                page_image = page.to_image(resolution=300).original
-                ocr_text = pytesseract.image_to_string(page_image)
-                if ocr_text:
-                    text_blocks.append(ocr_text)
+_worker_rasterizer = None
+_worker_deadline = None
 
-    return "\n".join(text_blocks)
 
-def extract_from_image(file_path: str) -> str:
-    image = cv2.imread(file_path)
+def _init_ocr_worker(source, omp_threads: int, deadline=None, memory_limit_mb: int = 0):
+    global _worker_rasterizer, _worker_deadline
+    os.environ["OMP_THREAD_LIMIT"] = str(omp_threads)
+    if memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    # Each worker opens the document once and reuses it for all its pages
+    _worker_rasterizer = open_rasterizer(source)
+    _worker_deadline = deadline
+
+
+def _ocr_worker_page(index: int) -> tuple:
+    return ocr_pdf_page(_worker_rasterizer, index, _worker_deadline)
+
+
+def extract_from_image(source) -> str:
+    return layer_text(make_layer(extract_image_pages(source)))
+
+
+def extract_image_pages(source, deadline=None) -> list:
+    image = decode_image(source)
 
     if image is None:
-        return ""
+        return []
+
+    gray = binarize_photo(image, settings.OCR_IMAGE_TARGET_DPI)
+
+    config = PHOTO_OCR_CONFIG
 
+    try:
+        if settings.OCR_IMAGE_REGIONS:
+            regions = find_text_regions(gray)
+            if regions:
+                return [ocr_page(0, ocr_image_regions(gray, regions, config, deadline=deadline))]
+
+        return [ocr_page(0, ocr_words(gray, config=config, deadline=deadline))]
+    except DeadlineExceeded as e:
+        logger.warning(f"Skipping image OCR: {str(e)}")
+        return [skipped_page(0, reason=DEADLINE_REASON)]
+
+
+def quick_image_text(image, deadline=None) -> str:
+    """
+    Text of a decoded photo from one OCR pass at
+    IMAGE_NEAR_DUPLICATE_CHECK_DPI, without text regions: a fraction of the
+    cost of extract_image_pages, good enough to compare against an earlier
+    shot's layer but not to keep. Raises DeadlineExceeded past deadline.
+    """
+    gray = binarize_photo(image, settings.IMAGE_NEAR_DUPLICATE_CHECK_DPI)
+    return words_to_text(ocr_words(gray, config=PHOTO_OCR_CONFIG, deadline=deadline))
+
+
+def binarize_photo(image, target_dpi: int):
+    image = downscale_to_dpi(image, target_dpi)
 
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-    gray = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)[1]
+    return cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY)[1]
+
+
+def decode_image(source):
+    """
+    Load an image from a path, or decode it straight from an in-memory
+    buffer (bytes, memoryview, mmap) without copying it first. An already
+    decoded image is returned as is.
+    Returns None when the data isn't a readable image.
+    """
+    if isinstance(source, np.ndarray):
+        return source
+
+    if isinstance(source, (str, os.PathLike)):
+        return cv2.imread(str(source))
+
+    buffer = np.frombuffer(source, dtype=np.uint8)
+    if not buffer.size:
+        return None
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+
+def ocr_image_regions(image, regions: list, config: str = "", workers: int = None, deadline=None) -> list:
+    """
+    OCR each (x, y, width, height) region of the image, in the shared region
+    thread pool when there are several regions and workers. Words are moved
+    back into image coordinates, and their block numbers prefixed with the
+    region number so lines never merge across regions.
+    """
+    if workers is None:
+        workers = get_ocr_page_workers()
+
+    def ocr_region(region):
+        x, y, width, height = region
+        return ocr_words(image[y:y + height, x:x + width], config=config, deadline=deadline)
+
+    if workers <= 1 or len(regions) <= 1:
+        results = [ocr_region(region) for region in regions]
+    else:
+        results = list(region_executor().map(ocr_region, regions))
+
+    words = []
+    for number, ((x, y, _, _), region_words) in enumerate(zip(regions, results), start=1):
+        for block, par, line, left, top, width, height, conf, text in region_words:
+            words.append([number * 1000 + block, par, line, left + x, top + y, width, height, conf, text])
+
+    return words
+
+
+# Threads OCR-ing image regions, kept for the life of the process so each
+# keeps its Tesseract API loaded (see TesserocrEngine). Both engines release
+# the GIL while Tesseract runs, so threads are enough here.
+_region_executor = None
+_region_executor_pid = None
+_region_executor_lock = threading.Lock()
 
-    config = r"--oem 3 --psm 6"
 
-    return pytesseract.image_to_string(gray, config=config)
+def region_executor() -> ThreadPoolExecutor:
+    global _region_executor, _region_executor_pid
+    with _region_executor_lock:
+        # Threads don't survive fork, so a child starts its own pool
+        if _region_executor is None or _region_executor_pid != os.getpid():
+            _region_executor = ThreadPoolExecutor(
+                max_workers=get_ocr_page_workers(), thread_name_prefix="ocr-region"
+            )
+            _region_executor_pid = os.getpid()
+        return _region_executor
@@ -1,11 +1,13 @@
 import re
-from .normal_ranges import NORMAL_RANGES
+from .analytes import NORMAL_RANGES, DISPLAY_NAMES, ANALYTES, NUMBER_PATTERN
+
+BP_PATTERN = re.compile(r"(\d{2,3})\s*/\s*(\d{2,3})")
 
 
 def compare_vitals(vitals: dict, gender: str = None) -> list:
     """
     Compare extracted vitals with normal ranges and return structured results.
-    Improved handling for SpO2 and Blood Sugar.
+    Ranges, display names and value handling come from the analyte registry.
     """
 
     results = []
@@ -15,11 +17,12 @@ def compare_vitals(vitals: dict, gender: str = None) -> list:
             continue
 
         normal = NORMAL_RANGES[vital]
+        definition = ANALYTES[vital]
         status = "Normal"
 
        
         if normal["type"] == "bp":
-            match = re.search(r"(\d{2,3})\s*/\s*(\d{2,3})", str(raw_value))
+            match = BP_PATTERN.search(str(raw_value))
             if not match:
                 continue
 
@@ -33,7 +36,7 @@ def compare_vitals(vitals: dict, gender: str = None) -> list:
                 status = "High"
 
             results.append({
-                "vital": "Blood Pressure",
+                "vital": DISPLAY_NAMES[vital],
                 "patient_value": f"{systolic}/{diastolic}",
                 "normal_range": f"≤{normal['systolic_max']} / ≤{normal['diastolic_max']}",
                 "status": status,
@@ -50,7 +53,7 @@ def compare_vitals(vitals: dict, gender: str = None) -> list:
             )
 
             results.append({
-                "vital": vital.replace("_", " ").title(),
+                "vital": DISPLAY_NAMES[vital],
                 "patient_value": raw_value,
                 "normal_range": ", ".join(normal.get("normal", [])),
                 "status": status,
@@ -58,55 +61,14 @@ def compare_vitals(vitals: dict, gender: str = None) -> list:
             continue
 
 
-        if vital == "spo2":
-            match = re.search(r"(\d{2,3})", str(raw_value))
-            if not match:
-                continue
-
-            value = int(match.group(1))
-
-            if value < normal["min"]:
-                status = "Low"
-            elif value > normal["max"]:
-                status = "High"
-
-            results.append({
-                "vital": "SpO₂",
-                "patient_value": value,
-                "normal_range": f"{normal['min']}–{normal['max']}%",
-                "status": status,
-            })
-            continue
-
-       
-        if vital in ["fasting_glucose", "random_glucose"]:
-            match = re.search(r"(\d+(\.\d+)?)", str(raw_value))
-            if not match:
-                continue
-
-            value = float(match.group(1))
-
-            min_val = normal.get("min")
-            max_val = normal.get("max")
-
-            if min_val is not None and value < min_val:
-                status = "Low"
-            elif max_val is not None and value > max_val:
-                status = "High"
-
-            results.append({
-                "vital": "Blood Sugar",
-                "patient_value": value,
-                "normal_range": format_range(min_val, max_val),
-                "status": status,
-            })
+        # Numeric values may carry units or symbols ("97%", "110 mg/dL")
+        match = NUMBER_PATTERN.search(str(raw_value))
+        if not match:
             continue
 
-   
-        try:
-            value = float(raw_value)
-        except (ValueError, TypeError):
-            continue
+        value = float(match.group(1))
+        if definition.get("integer"):
+            value = int(value)
 
         ref = normal
         if normal["type"] == "gender_based" and gender:
@@ -121,9 +83,9 @@ def compare_vitals(vitals: dict, gender: str = None) -> list:
             status = "High"
 
         results.append({
-            "vital": vital.replace("_", " ").title(),
+            "vital": DISPLAY_NAMES[vital],
             "patient_value": value,
-            "normal_range": format_range(min_val, max_val),
+            "normal_range": definition.get("range_label") or format_range(min_val, max_val),
             "status": status,
         })
 
@@ -1,74 +1,71 @@
-import re
+import time
 
+from .analytes import VITAL_ANCHOR_PATTERN, VALUE_PATTERNS, OUTPUT_KEYS, VITAL_KEYS
 
-def extract_vitals(text: str) -> dict:
-    
+# Longest stretch after a keyword searched for its value. Values must sit on
+# the same line as their keyword, so the window also ends at the next newline.
+VALUE_WINDOW = 120
+
+# Stop scanning a document after this long and keep what was found so far
+SCAN_TIME_LIMIT_SECONDS = 0.5
+
+
+def extract_vitals(text: str, time_limit: float = SCAN_TIME_LIMIT_SECONDS) -> dict:
+    """
+    Extract vitals in one pass over the text.
+    Each keyword is followed by a bounded search for its value on the same line.
+    Unlike the per-vital patterns this replaced, a value on the next line or
+    more than VALUE_WINDOW characters after its keyword is not found.
+    """
+    return scan_vitals(text, time_limit)[0]
+
+
+def scan_vitals(text: str, time_limit: float = SCAN_TIME_LIMIT_SECONDS) -> tuple:
+    """
+    extract_vitals, also returning whether the whole text was scanned:
+    False when time_limit cut the scan short, so the vitals may be missing
+    some that a slower run would find.
+    """
 
     if not text:
-        return {}
+        return {}, True
+
+    found = {}
+    complete = True
+    deadline = time.monotonic() + time_limit
 
+    for anchor in VITAL_ANCHOR_PATTERN.finditer(text):
+        vital = anchor.lastgroup
+        if vital in found:
+            continue
+
+        start = anchor.end()
+        end = text.find("\n", start, start + VALUE_WINDOW)
+        if end == -1:
+            end = min(len(text), start + VALUE_WINDOW)
+
+        match = VALUE_PATTERNS[vital].search(text, start, end)
+        if match:
+            found[vital] = match.groups()
+
+            if len(found) == len(VITAL_KEYS):
+                break
+
+        if time.monotonic() > deadline:
+            complete = False
+            break
+
+    # Keep the output order stable, whatever order the keywords appeared in
     vitals = {}
+    for vital in VITAL_KEYS:
+        if vital not in found:
+            continue
+
+        values = found[vital]
+        outputs = OUTPUT_KEYS[vital]
+        if len(outputs) == 1:
+            vitals[outputs[0]] = "/".join(values)
+        else:
+            vitals.update(zip(outputs, values))
 
-    bp_match = re.search(
-        r"Blood\s*Pressure.*?(\d{2,3})\s*/\s*(\d{2,3})",
-        text,
-        re.IGNORECASE,
-    )
-    if bp_match:
-        vitals["blood_pressure"] = f"{bp_match.group(1)}/{bp_match.group(2)}"
-
-    hr_match = re.search(
-        r"(Heart\s*Rate|Pulse).*?(\d{2,3})\s*(bpm|beats)?",
-        text,
-        re.IGNORECASE,
-    )
-    if hr_match:
-        vitals["heart_rate"] = hr_match.group(2)
-
- 
-    rr_match = re.search(
-        r"Respiratory\s*Rate.*?(\d{1,2})",
-        text,
-        re.IGNORECASE,
-    )
-    if rr_match:
-        vitals["respiratory_rate"] = rr_match.group(1)
-
- 
-    temp_match = re.search(
-        r"(Body\s*Temperature|Temperature).*?([\d\.]+)\s*(C|F)",
-        text,
-        re.IGNORECASE,
-    )
-    if temp_match:
-        vitals["body_temperature"] = temp_match.group(2)
-
-
-    spo2_match = re.search(
-        r"(SpO2|Oxygen\s*Saturation).*?(\d{2,3})\s*%",
-        text,
-        re.IGNORECASE,
-    )
-    if spo2_match:
-        vitals["spo2"] = spo2_match.group(2)
-
-
-    glucose_match = re.search(
-        r"Blood\s*Glucose.*?(\d{2,3})\s*/\s*(\d{2,3})",
-        text,
-        re.IGNORECASE,
-    )
-    if glucose_match:
-        vitals["fasting_glucose"] = glucose_match.group(1)
-        vitals["random_glucose"] = glucose_match.group(2)
-
-
-    bmi_match = re.search(
-        r"\bBMI.*?([\d\.]+)",
-        text,
-        re.IGNORECASE,
-    )
-    if bmi_match:
-        vitals["bmi"] = bmi_match.group(1)
-
-    return vitals
+    return vitals, complete
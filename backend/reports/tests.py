@@ -1,2 +1,1227 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from unittest import skipUnless
 
+from django.conf import settings
+from django.utils import timezone
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers, StopUpload
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db.models.fields.files import FieldFile
+from unittest.mock import PropertyMock, patch
+from io import StringIO
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+import cv2
+import numpy as np
+import pdfplumber
+from rest_framework.test import APIClient
+
+from .models import MedicalReport, ReportJob
+from .services.job_queue import claim_next_job, record_completed, run_job
+from .services.text_extractor import (
+    decode_image,
+    extract_from_image,
+    extract_layer,
+    extract_from_pdf,
+    extract_pdf_pages,
+    extract_pdf_pages_until_complete,
+    ocr_pdf_page,
+    ocr_image_regions,
+    OcrMemoryExceeded,
+    release_page,
+)
+from .services import text_extractor
+from .services.page_probe import probe_page, NATIVE, SCANNED, MIXED
+from .services.vitals_extractor import extract_vitals
+from .services.vitals_comparator import compare_vitals
+from .services.qualitative_extractor import extract_qualitative
+from .services.patient_extractor import extract_patient_details
+from .services.ocr_layer import parse_tsv, words_to_text, layer_text, page_text, layer_is_complete, layer_is_partial, make_layer, ocr_page, dump_layer, load_layer
+from .services.report_processor import analyze_text, load_report_layer, process_report, reevaluate_report, upload_source
+from .services.deadline import Deadline, DeadlineExceeded
+from .services.analytes import ANALYTES, NORMAL_RANGES, VALUE_PATTERNS
+from .services.image_regions import downscale_to_dpi, find_text_regions
+from .services.image_hash import hamming_distance
+from .services.deduplication import same_numbers
+from .services.cleanup_report import cleanup_old_reports
+from .services.rasterizer import open_rasterizer
+from .upload_handlers import ReportUploadHandler
+from .services.ocr_engine import get_ocr_engine, parse_config, tesserocr
+from .services.ocr_admission import OcrBusy, ocr_queue_full, ocr_slot, queue_depth
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+
+def make_scanned_pdf(path, page_widths, table_pages=()):
+    """Build a PDF without a text layer; each page width identifies the page"""
+    pdf = canvas.Canvas(str(path))
+    for index, width in enumerate(page_widths):
+        pdf.setPageSize((width, 100))
+        pdf.rect(10, 10, 20, 20, fill=1)
+        if index in table_pages:
+            # Ruled grid, like a scanned vitals table
+            for y in range(20, 100, 15):
+                pdf.line(5, y, width - 5, y)
+            for x in range(5, int(width), 40):
+                pdf.line(x, 20, x, 95)
+        pdf.showPage()
+    pdf.save()
+
+
+def fake_tsv(text, conf=90):
+    """Tesseract image_to_data output with one line of words"""
+    rows = ["level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\t"
+            "left\ttop\twidth\theight\tconf\ttext",
+            "1\t1\t0\t0\t0\t0\t0\t0\t100\t100\t-1\t"]
+    for number, word in enumerate(text.split(), start=1):
+        rows.append(f"5\t1\t1\t1\t1\t{number}\t{number * 10}\t5\t8\t8\t{conf}\t{word}")
+    return "\n".join(rows)
+
+
+def make_report(user, name="report.pdf", content=b"%PDF-1.4 test"):
+    return MedicalReport.objects.create(
+        user=user,
+        file=SimpleUploadedFile(name, content),
+        original_filename=name,
+        file_size_kb=round(len(content) / 1024, 2),
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ReportJobQueueTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="patient", password="pass1234")
+
+    def test_claim_marks_job_processing(self):
+        report = make_report(self.user)
+        ReportJob.objects.create(report=report)
+
+        job = claim_next_job("worker-1")
+
+        self.assertEqual(job.status, ReportJob.STATUS_PROCESSING)
+        self.assertEqual(job.locked_by, "worker-1")
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(claim_next_job("worker-2"))
+
+    @patch("reports.services.job_queue.process_report")
+    def test_run_job_success(self, mock_process):
+        ReportJob.objects.create(report=make_report(self.user))
+        job = claim_next_job("worker-1")
+
+        self.assertEqual(run_job(job), ReportJob.STATUS_DONE)
+        self.assertEqual(ReportJob.objects.get(pk=job.pk).status, ReportJob.STATUS_DONE)
+
+    @override_settings(REPORT_JOB_MAX_ATTEMPTS=1)
+    @patch("reports.services.job_queue.process_report", side_effect=RuntimeError("ocr"))
+    def test_run_job_failure_after_last_attempt(self, mock_process):
+        ReportJob.objects.create(report=make_report(self.user))
+        job = claim_next_job("worker-1")
+
+        self.assertEqual(run_job(job), ReportJob.STATUS_FAILED)
+        self.assertEqual(ReportJob.objects.get(pk=job.pk).error, "ocr")
+
+    @override_settings(REPORT_JOB_MAX_ATTEMPTS=1)
+    @patch("reports.services.job_queue.process_report", side_effect=OcrBusy("OCR queue is full"))
+    def test_run_job_deferred_when_ocr_is_busy(self, mock_process):
+        ReportJob.objects.create(report=make_report(self.user))
+        job = claim_next_job("worker-1")
+
+        self.assertEqual(run_job(job), ReportJob.STATUS_QUEUED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportJob.STATUS_QUEUED)
+        self.assertEqual(job.attempts, 0)
+
+    @patch("reports.services.job_queue.process_report", side_effect=OcrMemoryExceeded("OCR worker ran out of memory"))
+    def test_run_job_fails_without_retry_when_ocr_runs_out_of_memory(self, mock_process):
+        ReportJob.objects.create(report=make_report(self.user))
+        job = claim_next_job("worker-1")
+
+        self.assertEqual(run_job(job), ReportJob.STATUS_FAILED)
+        self.assertEqual(ReportJob.objects.get(pk=job.pk).status, ReportJob.STATUS_FAILED)
+
+    @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, OCR_ENGINE="fake", OCR_FAKE_TEXT="Pulse 80 bpm")
+    def test_report_deleted_while_processing_is_not_recreated(self):
+        report = make_report(self.user, name="photo.png", content=cv2.imencode(".png", make_page_image())[1].tobytes())
+        ReportJob.objects.create(report=report)
+        job = claim_next_job("worker-1")
+
+        def delete_report(*args, **kwargs):
+            MedicalReport.objects.filter(pk=report.pk).delete()
+
+        with patch("reports.services.report_processor.generate_report_pdf", side_effect=delete_report):
+            self.assertEqual(run_job(job), ReportJob.STATUS_FAILED)
+
+        self.assertFalse(MedicalReport.objects.filter(pk=report.pk).exists())
+        self.assertFalse(ReportJob.objects.exists())
+
+    def test_cleanup_keeps_reports_still_being_processed(self):
+        reports = [make_report(self.user) for _ in range(8)]
+        for age, report in enumerate(reversed(reports)):
+            MedicalReport.objects.filter(pk=report.pk).update(uploaded_at=timezone.now() - timedelta(minutes=age))
+        ReportJob.objects.create(report=reports[0], status=ReportJob.STATUS_PROCESSING)
+        ReportJob.objects.create(report=reports[1], status=ReportJob.STATUS_DONE)
+
+        cleanup_old_reports(self.user, keep=6)
+
+        remaining = set(MedicalReport.objects.values_list("pk", flat=True))
+        self.assertEqual(remaining, {report.pk for report in reports} - {reports[1].pk})
+
+
+    def test_reevaluate_command_resumes_from_checkpoint(self):
+        reports = [make_report(self.user) for _ in range(3)]
+        for report in reports:
+            report.extracted_text = "Heart Rate: 120 bpm"
+            report.save()
+
+        checkpoint = f"{TEMP_MEDIA_ROOT}/reevaluate.checkpoint"
+        with open(checkpoint, "w") as f:
+            f.write(str(reports[0].id))
+
+        call_command("reevaluate_reports", chunk_size=1, checkpoint=checkpoint, stdout=StringIO())
+
+        vitals = [MedicalReport.objects.get(pk=r.pk).vitals for r in reports]
+        self.assertEqual(vitals, [None, {"heart_rate": "120"}, {"heart_rate": "120"}])
+        with open(checkpoint) as f:
+            self.assertEqual(f.read(), str(reports[-1].id))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, OCR_ENGINE="fake", OCR_FAKE_TEXT="Pulse 80 bpm")
+class ReportProcessorTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="patient", password="pass1234")
+        self.png = cv2.imencode(".png", make_page_image())[1].tobytes()
+
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_storage_without_local_paths(self, mock_pdf):
+        report = make_report(self.user, name="photo.png", content=self.png)
+
+        with patch.object(FieldFile, "path", new_callable=PropertyMock, side_effect=NotImplementedError):
+            process_report(report)
+
+        self.assertEqual(MedicalReport.objects.get(pk=report.pk).vitals, {"heart_rate": "80"})
+
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_processes_upload_buffer(self, mock_pdf):
+        upload = SimpleUploadedFile("photo.png", self.png)
+        source = upload_source(upload)
+        report = make_report(self.user, name="photo.png", content=b"not read")
+
+        process_report(report, source=source)
+
+        self.assertIsInstance(source, memoryview)
+        self.assertEqual(report.vitals, {"heart_rate": "80"})
+
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_rerun_resumes_from_stored_layer_and_cached_analysis(self, mock_pdf):
+        report = make_report(self.user, name="photo.png", content=self.png)
+        process_report(report)
+
+        timings = MedicalReport.objects.get(pk=report.pk).stage_timings
+        self.assertEqual(timings["ocr"]["how"], "run")
+        self.assertEqual(timings["analysis.vitals"]["how"], "run")
+        self.assertGreaterEqual(timings["ocr"]["wall"], 0)
+        self.assertIn("cpu", timings["pdf"])
+
+        with patch("reports.services.report_processor.extract_layer") as mock_extract:
+            process_report(report)
+
+        mock_extract.assert_not_called()
+        self.assertEqual(report.stage_timings["ocr"]["how"], "stored")
+        self.assertEqual(report.stage_timings["analysis.vitals"]["how"], "cached")
+        self.assertEqual(report.vitals, {"heart_rate": "80"})
+
+    @patch("reports.services.report_processor.scan_vitals", return_value=({"heart_rate": "72"}, True))
+    def test_reevaluation_bypasses_the_analysis_cache(self, mock_vitals):
+        analyze_text("Pulse 72 bpm")
+        analyze_text("Pulse 72 bpm")
+        self.assertEqual(mock_vitals.call_count, 1)
+
+        report = make_report(self.user)
+        report.extracted_text = "Pulse 72 bpm"
+        reevaluate_report(report)
+
+        self.assertEqual(mock_vitals.call_count, 2)
+        self.assertEqual(report.vitals, {"heart_rate": "72"})
+
+    @patch("reports.services.report_processor.scan_vitals", return_value=({"heart_rate": "72"}, False))
+    def test_cut_short_vitals_scan_is_not_cached(self, mock_vitals):
+        results = analyze_text("Pulse 72 bpm")
+        analyze_text("Pulse 72 bpm")
+
+        self.assertEqual(mock_vitals.call_count, 2)
+        self.assertTrue(results["partial"])
+        self.assertEqual(results["vitals"], {"heart_rate": "72"})
+
+    @override_settings(IMAGE_NEAR_DUPLICATES=True)
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_reshot_photo_reuses_ocr_layer(self, mock_pdf):
+        first = make_report(self.user, name="photo.png", content=self.png)
+        process_report(first)
+        record_completed(first)
+
+        # The same page again, shifted and a little darker
+        page = make_page_image()
+        reshot = cv2.warpAffine(page, np.float32([[1, 0, 6], [0, 1, 4]]), (900, 1200), borderValue=255)
+        reshot = (reshot * 0.9).astype(np.uint8)
+        second = make_report(self.user, name="photo2.png", content=cv2.imencode(".png", reshot)[1].tobytes())
+
+        with patch("reports.services.report_processor.extract_layer") as mock_extract:
+            process_report(second)
+
+        mock_extract.assert_not_called()
+        self.assertLessEqual(hamming_distance(first.image_hash, second.image_hash), 6)
+        self.assertEqual(second.ocr_layer.name, first.ocr_layer.name)
+        self.assertEqual(second.vitals, {"heart_rate": "80"})
+
+    @override_settings(IMAGE_NEAR_DUPLICATES=True)
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_similar_photo_reading_other_values_is_ocrd(self, mock_pdf):
+        first = make_report(self.user, name="photo.png", content=self.png)
+        process_report(first)
+        record_completed(first)
+        second = make_report(self.user, name="photo2.png", content=self.png + b"\0")
+
+        # The same form with another value: the hashes match, the numbers don't
+        with self.settings(OCR_FAKE_TEXT="Pulse 96 bpm"):
+            process_report(second)
+
+        self.assertEqual(second.image_hash, first.image_hash)
+        self.assertNotEqual(second.ocr_layer.name, first.ocr_layer.name)
+        self.assertEqual(second.vitals, {"heart_rate": "96"})
+
+    @override_settings(IMAGE_NEAR_DUPLICATES=True)
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_similar_photo_unconfirmed_in_time_is_ocrd(self, mock_pdf):
+        first = make_report(self.user, name="photo.png", content=self.png)
+        process_report(first)
+        record_completed(first)
+        second = make_report(self.user, name="photo2.png", content=self.png + b"\0")
+
+        with patch("reports.services.report_processor.quick_image_text",
+                   side_effect=DeadlineExceeded("OCR: out of time")) as mock_quick:
+            process_report(second)
+
+        self.assertIsNotNone(mock_quick.call_args.kwargs["deadline"].expires_at)
+        self.assertNotEqual(second.ocr_layer.name, first.ocr_layer.name)
+        self.assertEqual(second.vitals, {"heart_rate": "80"})
+
+    def test_same_numbers_needs_every_number_read(self):
+        self.assertTrue(same_numbers("Pulse 80 bpm BP 120/80", "Pulse 80 bpm\nBP 120/80"))
+        self.assertFalse(same_numbers("Pulse 86 bpm BP 120/80", "Pulse 80 bpm\nBP 120/80"))
+        self.assertFalse(same_numbers("Pulse bpm", "Pulse 80 bpm"))
+        self.assertFalse(same_numbers("Pulse 80", "Pulse 80 bpm BP 120/80 Temp 98.6"))
+
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_similar_photos_are_ocrd_unless_enabled(self, mock_pdf):
+        first = make_report(self.user, name="photo.png", content=self.png)
+        process_report(first)
+        record_completed(first)
+        second = make_report(self.user, name="photo2.png", content=self.png + b"\0")
+
+        process_report(second)
+
+        self.assertEqual(second.image_hash, first.image_hash)
+        self.assertNotEqual(second.ocr_layer.name, first.ocr_layer.name)
+
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_out_of_time_report_is_saved_partial(self, mock_pdf):
+        report = make_report(self.user, name="photo.png", content=self.png)
+        deadline = Deadline(60)
+        deadline.expires_at = time.time() - 1
+
+        process_report(report, deadline=deadline)
+
+        report.refresh_from_db()
+        self.assertTrue(report.partial)
+        self.assertEqual(report.extracted_text, "")
+        self.assertIsNotNone(report.patient_details)
+        self.assertIsNone(report.comparison_table)
+        self.assertIsNone(load_report_layer(report))
+        mock_pdf.assert_not_called()
+
+    def test_pdf_bytes(self):
+        path = f"{TEMP_MEDIA_ROOT}/scanned.pdf"
+        make_scanned_pdf(path, [144, 216])
+        with open(path, "rb") as f:
+            data = f.read()
+
+        layer = extract_layer(memoryview(data), "scanned.pdf")
+
+        self.assertEqual([page["source"] for page in layer["pages"]], ["ocr", "ocr"])
+        self.assertEqual(layer_text(layer), "Pulse 80 bpm\nPulse 80 bpm")
+
+    def test_decode_image_from_buffer(self):
+        image = decode_image(memoryview(self.png))
+
+        self.assertEqual(image.shape, (1200, 900, 3))
+        self.assertIsNone(decode_image(b""))
+        self.assertIsNone(decode_image(b"not an image"))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, OCR_ENGINE="fake", OCR_FAKE_TEXT="Pulse 80 bpm")
+class UploadBatchViewTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="patient", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def png(self, shade):
+        page = make_page_image()
+        page[0, 0] = shade
+        return cv2.imencode(".png", page)[1].tobytes()
+
+    @patch("reports.services.report_processor.generate_report_pdf")
+    @patch("reports.services.report_processor.cleanup_old_reports")
+    def test_batch_streams_a_result_per_file(self, mock_cleanup, mock_pdf):
+        files = [SimpleUploadedFile(f"photo{shade}.png", self.png(shade)) for shade in (0, 1, 2)]
+
+        response = self.client.post("/api/reports/upload-batch/", {"reports": files})
+
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        results, summary = lines[:-1], lines[-1]
+
+        self.assertEqual(sorted(r["filename"] for r in results), ["photo0.png", "photo1.png", "photo2.png"])
+        self.assertTrue(all(r["status"] == ReportJob.STATUS_DONE for r in results))
+        self.assertEqual(results[0]["vitals"], {"heart_rate": "80"})
+        self.assertEqual(summary["count"], 3)
+        self.assertEqual(summary[ReportJob.STATUS_DONE], 3)
+        self.assertEqual(mock_cleanup.call_count, 1)
+
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_batch_keeps_all_of_its_own_reports(self, mock_pdf):
+        files = [SimpleUploadedFile(f"photo{shade}.png", self.png(shade)) for shade in range(8)]
+
+        response = self.client.post("/api/reports/upload-batch/", {"reports": files})
+        b"".join(response.streaming_content)
+
+        self.assertEqual(MedicalReport.objects.filter(user=self.user).count(), 8)
+
+    @patch("reports.services.report_processor.generate_report_pdf")
+    @patch("reports.services.report_processor.cleanup_old_reports")
+    def test_batch_finishes_when_client_disconnects(self, mock_cleanup, mock_pdf):
+        files = [SimpleUploadedFile(f"photo{shade}.png", self.png(shade)) for shade in (0, 1, 2)]
+
+        response = self.client.post("/api/reports/upload-batch/", {"reports": files})
+        next(iter(response.streaming_content))
+        response.close()
+
+        for _ in range(100):
+            if not ReportJob.objects.exclude(status=ReportJob.STATUS_DONE).exists() and mock_cleanup.called:
+                break
+            time.sleep(0.1)
+
+        self.assertEqual(ReportJob.objects.filter(status=ReportJob.STATUS_DONE).count(), 3)
+        self.assertEqual(mock_cleanup.call_count, 1)
+
+    @patch("reports.views.ocr_queue_full", return_value=True)
+    def test_batch_refused_when_ocr_queue_is_full(self, mock_full):
+        files = [SimpleUploadedFile("photo.png", self.png(0))]
+
+        response = self.client.post("/api/reports/upload-batch/", {"reports": files})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "15")
+        self.assertFalse(MedicalReport.objects.exists())
+
+    def test_unsupported_file_rejects_batch(self):
+        files = [
+            SimpleUploadedFile("photo.png", self.png(0)),
+            SimpleUploadedFile("notes.txt", b"Pulse 80 bpm"),
+        ]
+
+        media_root = tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)
+        with self.settings(MEDIA_ROOT=media_root):
+            response = self.client.post("/api/reports/upload-batch/", {"reports": files})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["filename"], "notes.txt")
+        self.assertFalse(MedicalReport.objects.exists())
+        self.assertEqual(os.listdir(f"{media_root}/reports"), [])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadReportViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="patient", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_upload_returns_202_and_queues_job(self):
+        response = self.client.post(
+            "/api/reports/upload/",
+            {"report": SimpleUploadedFile("scan.pdf", b"%PDF-1.4 test")},
+        )
+
+        self.assertEqual(response.status_code, 202)
+        report = MedicalReport.objects.get(id=response.data["report_id"])
+        self.assertEqual(report.job.status, ReportJob.STATUS_QUEUED)
+
+        status_response = self.client.get(f"/api/reports/{report.id}/status/")
+        self.assertEqual(status_response.data["status"], ReportJob.STATUS_QUEUED)
+
+    def test_upload_streams_into_storage(self):
+        content = b"%PDF-1.4 " + b"x" * 200_000
+
+        with self.settings(MEDIA_ROOT=tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)):
+            response = self.client.post(
+                "/api/reports/upload/",
+                {"report": SimpleUploadedFile("scan.pdf", content)},
+            )
+
+            report = MedicalReport.objects.get(id=response.data["report_id"])
+            self.assertEqual(report.content_hash, hashlib.sha256(content).hexdigest())
+            with report.file.open("rb") as f:
+                self.assertEqual(f.read(), content)
+            self.assertEqual(os.listdir(os.path.dirname(report.file.path)), [os.path.basename(report.file.name)])
+
+    def test_upload_with_wrong_magic_bytes_is_rejected(self):
+        media_root = tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)
+
+        with self.settings(MEDIA_ROOT=media_root):
+            response = self.client.post(
+                "/api/reports/upload/",
+                {"report": SimpleUploadedFile("scan.pdf", b"\x89PNG\r\n\x1a\n not a pdf")},
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "File contents do not match its type")
+        self.assertFalse(MedicalReport.objects.exists())
+        self.assertEqual(os.listdir(f"{media_root}/reports"), [])
+
+    def test_oversized_upload_stops_mid_stream(self):
+        media_root = tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)
+        chunk = b"x" * 600 * 1024
+        handler = ReportUploadHandler(max_size_bytes=1024 * 1024)
+
+        with self.settings(MEDIA_ROOT=media_root):
+            with self.assertRaises(StopFutureHandlers):
+                handler.new_file("report", "scan.pdf", "application/pdf", None)
+            handler.receive_data_chunk(b"%PDF-1.4 " + chunk, 0)
+
+            with self.assertRaises(StopUpload):
+                handler.receive_data_chunk(chunk, len(chunk) + 9)
+
+        self.assertEqual(handler.error, "File size exceeds 1 MB limit")
+        self.assertEqual(os.listdir(f"{media_root}/reports"), [])
+
+    def test_identical_upload_reuses_processed_results(self):
+        first = self.client.post(
+            "/api/reports/upload/",
+            {"report": SimpleUploadedFile("scan.pdf", b"%PDF-1.4 same")},
+        )
+        report = MedicalReport.objects.get(id=first.data["report_id"])
+        report.extracted_text = "Blood Pressure: 130/85"
+        report.vitals = {"blood_pressure": "130/85"}
+        report.save()
+        report.job.status = ReportJob.STATUS_DONE
+        report.job.save()
+
+        with patch("reports.services.report_processor.generate_report_pdf"):
+            second = self.client.post(
+                "/api/reports/upload/",
+                {"report": SimpleUploadedFile("again.pdf", b"%PDF-1.4 same")},
+            )
+
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data["vitals"], {"blood_pressure": "130/85"})
+        duplicate = MedicalReport.objects.get(id=second.data["report_id"])
+        self.assertEqual(duplicate.content_hash, report.content_hash)
+        self.assertEqual(duplicate.extracted_text, report.extracted_text)
+
+    @patch("reports.views.generate_report_pdf")
+    def test_reprocess_uses_stored_text(self, mock_pdf):
+        report = make_report(self.user)
+        report.extracted_text = "SpO2: 91 %"
+        report.save()
+
+        response = self.client.post(f"/api/reports/{report.id}/reprocess/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["vitals"], {"spo2": "91"})
+        self.assertEqual(MedicalReport.objects.get(pk=report.pk).comparison_table[0]["status"], "Low")
+
+    def test_reprocess_requires_processed_report(self):
+        report = make_report(self.user)
+
+        response = self.client.post(f"/api/reports/{report.id}/reprocess/")
+
+        self.assertEqual(response.status_code, 409)
+
+
+@override_settings(UPLOAD_CHUNK_SIZE_KB=1)
+class ChunkedUploadTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="patient", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.content = b"%PDF-1.4 " + os.urandom(2500)
+
+    def start(self, filename="scan.pdf"):
+        response = self.client.post(
+            "/api/reports/upload/sessions/",
+            {"filename": filename, "size": len(self.content)},
+        )
+        self.assertEqual(response.status_code, 201)
+        return f"/api/reports/upload/sessions/{response.data['upload_id']}/"
+
+    def put_chunk(self, url, index, data=None):
+        if data is None:
+            data = self.content[index * 1024:(index + 1) * 1024]
+        return self.client.put(f"{url}chunks/{index}/", data, content_type="application/octet-stream")
+
+    def test_resumed_upload_is_assembled_and_queued(self):
+        with self.settings(MEDIA_ROOT=tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)):
+            url = self.start()
+            self.assertEqual(self.put_chunk(url, 2).status_code, 200)
+            self.assertEqual(self.put_chunk(url, 0).status_code, 200)
+
+            status_response = self.client.get(url)
+            self.assertEqual(status_response.data["total_chunks"], 3)
+            self.assertEqual(status_response.data["missing_chunks"], [1])
+
+            self.assertEqual(self.client.post(f"{url}finalize/").status_code, 409)
+
+            self.put_chunk(url, 1)
+            response = self.client.post(f"{url}finalize/")
+
+            self.assertEqual(response.status_code, 202)
+            report = MedicalReport.objects.get(id=response.data["report_id"])
+            self.assertEqual(report.job.status, ReportJob.STATUS_QUEUED)
+            self.assertEqual(report.content_hash, hashlib.sha256(self.content).hexdigest())
+            with report.file.open("rb") as f:
+                self.assertEqual(f.read(), self.content)
+            self.assertEqual(os.listdir(f"{settings.MEDIA_ROOT}/upload_sessions"), [])
+
+            again = self.client.post(f"{url}finalize/")
+            self.assertEqual(again.status_code, 200)
+            self.assertEqual(again.data["report_id"], report.id)
+
+    def test_failed_finalize_can_be_retried(self):
+        with self.settings(MEDIA_ROOT=tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)):
+            url = self.start()
+            for index in range(3):
+                self.put_chunk(url, index)
+
+            with patch("reports.views.enqueue_report", side_effect=RuntimeError("database is down")):
+                self.assertEqual(self.client.post(f"{url}finalize/").status_code, 500)
+
+            self.assertEqual(self.client.get(url).data["missing_chunks"], [])
+            self.assertFalse(MedicalReport.objects.exists())
+
+            response = self.client.post(f"{url}finalize/")
+
+            self.assertEqual(response.status_code, 202)
+            report = MedicalReport.objects.get(id=response.data["report_id"])
+            with report.file.open("rb") as f:
+                self.assertEqual(f.read(), self.content)
+            self.assertEqual(os.listdir(f"{settings.MEDIA_ROOT}/upload_sessions"), [])
+
+    def test_chunk_of_wrong_length_is_rejected(self):
+        with self.settings(MEDIA_ROOT=tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)):
+            url = self.start()
+
+            self.assertEqual(self.put_chunk(url, 0, b"%PDF-1.4 short").status_code, 400)
+            self.assertEqual(self.put_chunk(url, 3).status_code, 400)
+            self.assertEqual(self.client.get(url).data["received_chunks"], [])
+
+    def test_other_users_sessions_are_hidden(self):
+        with self.settings(MEDIA_ROOT=tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT)):
+            url = self.start()
+
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username="other", password="pass1234"))
+        self.assertEqual(other.get(url).status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PrecheckReportViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="patient", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.content = b"%PDF-1.4 known"
+        self.source = make_report(self.user, content=self.content)
+        self.source.content_hash = hashlib.sha256(self.content).hexdigest()
+        self.source.extracted_text = "BMI: 22.1"
+        self.source.bmi = 22.1
+        self.source.save()
+        ReportJob.objects.create(report=self.source, status=ReportJob.STATUS_DONE)
+
+    def precheck(self, digest):
+        return self.client.post(
+            "/api/reports/precheck/",
+            {"sha256": digest, "size": len(self.content), "filename": "copy.pdf"},
+        )
+
+    def test_unknown_digest(self):
+        response = self.precheck("0" * 64)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["exists"])
+
+    @patch("reports.services.report_processor.generate_report_pdf")
+    def test_known_digest_creates_report_without_upload(self, mock_pdf):
+        response = self.precheck(self.source.content_hash)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["bmi"], 22.1)
+        report = MedicalReport.objects.get(id=response.data["report_id"])
+        self.assertEqual(report.file.name, self.source.file.name)
+
+    @patch("reports.views.reuse_processed_results", side_effect=RuntimeError("copy failed"))
+    def test_failed_copy_leaves_no_done_report(self, mock_reuse):
+        response = self.precheck(self.source.content_hash)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(MedicalReport.objects.count(), 1)
+        self.assertEqual(ReportJob.objects.filter(status=ReportJob.STATUS_DONE).count(), 1)
+
+    def test_other_users_reports_are_not_matched(self):
+        other = User.objects.create_user(username="other", password="pass1234")
+        self.client.force_authenticate(other)
+
+        response = self.precheck(self.source.content_hash)
+
+        self.assertFalse(response.data["exists"])
+
+    def test_invalid_digest(self):
+        response = self.precheck("not-a-hash")
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(OCR_ENGINE="pytesseract")
+class TextExtractorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.pdf_path = f"{TEMP_MEDIA_ROOT}/scanned.pdf"
+        make_scanned_pdf(self.pdf_path, [72, 144, 216, 288])
+
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_parallel_ocr_keeps_page_order(self, mock_ocr):
+        # Forked pool workers inherit the patch
+        mock_ocr.side_effect = lambda image, config="", timeout=0: fake_tsv(f"width {image.shape[1]}")
+
+        sequential = extract_from_pdf(self.pdf_path, workers=1)
+        parallel = extract_from_pdf(self.pdf_path, workers=3)
+
+        widths = [int(line.split()[1]) for line in sequential.splitlines()]
+        self.assertEqual(len(widths), 4)
+        self.assertEqual(widths, sorted(widths))
+        self.assertEqual(parallel, sequential)
+
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_early_stop_ocrs_table_page_first(self, mock_ocr):
+        mock_ocr.side_effect = lambda image, config="", timeout=0: fake_tsv("Pulse 80 bpm")
+        make_scanned_pdf(self.pdf_path, [144, 288, 144], table_pages=[1])
+
+        pages = extract_pdf_pages_until_complete(
+            self.pdf_path, target_fields=["heart_rate"], workers=1
+        )
+
+        self.assertEqual(mock_ocr.call_count, 1)
+        self.assertEqual(
+            [(page["index"], page["source"]) for page in sorted(pages, key=lambda p: p["index"])],
+            [(0, "skipped"), (1, "ocr"), (2, "skipped")],
+        )
+        # Reprocessing must not reuse a layer missing the skipped pages
+        self.assertFalse(layer_is_complete(make_layer(pages)))
+
+
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_probe_routes_pages(self, mock_ocr):
+        mock_ocr.side_effect = lambda image, config="", timeout=0: fake_tsv("Pulse 80 bpm")
+        pdf = canvas.Canvas(self.pdf_path, pagesize=(300, 300))
+        # Native: plenty of text
+        for y in range(20, 280, 20):
+            pdf.drawString(10, y, "Blood Pressure 120/80 mmHg recorded")
+        pdf.showPage()
+        # Scanned: no text at all
+        pdf.rect(10, 10, 50, 50, fill=1)
+        pdf.showPage()
+        # Mixed: a short header over a large image
+        pdf.drawString(10, 280, "City Hospital Lab Report")
+        pdf.drawImage(ImageReader(Image.new("RGB", (200, 200), "white")), 20, 20, 250, 250)
+        pdf.showPage()
+        pdf.save()
+
+        with pdfplumber.open(self.pdf_path) as document:
+            self.assertEqual([probe_page(page) for page in document.pages], [NATIVE, SCANNED, MIXED])
+
+        pages = extract_pdf_pages(self.pdf_path, workers=1)
+
+        self.assertEqual(mock_ocr.call_count, 2)
+        self.assertEqual([page["probe"] for page in pages], [NATIVE, SCANNED, MIXED])
+        self.assertEqual(pages[2]["text"], "City Hospital Lab Report")
+
+    @override_settings(PDF_BOUNDED_MEMORY=True, PDF_MAX_RENDERED_PAGES=1)
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_bounded_memory_ocrs_one_page_at_a_time_in_a_child(self, mock_ocr):
+        mock_ocr.side_effect = lambda image, config="", timeout=0: fake_tsv(f"width {image.shape[1]}")
+
+        with patch("reports.services.text_extractor._ocr_executor", wraps=text_extractor._ocr_executor) as executor:
+            bounded = extract_from_pdf(self.pdf_path, workers=3)
+
+        self.assertEqual(executor.call_args.args[1], 1)
+        self.assertEqual(len(bounded.splitlines()), 4)
+        # OCR ran in the pool, not in this process
+        self.assertEqual(mock_ocr.call_count, 0)
+
+    @override_settings(PDF_BOUNDED_MEMORY=True, OCR_MEMORY_LIMIT_MB=64)
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_bounded_memory_fails_cleanly_past_the_limit(self, mock_ocr):
+        mock_ocr.side_effect = lambda image, config="", timeout=0: bytearray(256 * 1024 * 1024)
+
+        with self.assertRaises(OcrMemoryExceeded):
+            extract_pdf_pages(self.pdf_path, workers=1)
+
+    @override_settings(PDF_BOUNDED_MEMORY=True, OCR_MEMORY_LIMIT_MB=0)
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_crashed_ocr_worker_is_not_a_memory_failure(self, mock_ocr):
+        mock_ocr.side_effect = lambda image, config="", timeout=0: os._exit(1)
+
+        with self.assertRaises(BrokenProcessPool):
+            extract_pdf_pages(self.pdf_path, workers=1)
+
+    @override_settings(PDF_BOUNDED_MEMORY=True, OCR_MEMORY_LIMIT_MB=0)
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_oom_killed_ocr_worker_is_a_memory_failure(self, mock_ocr):
+        mock_ocr.side_effect = lambda image, config="", timeout=0: os.kill(os.getpid(), signal.SIGKILL)
+
+        with self.assertRaises(OcrMemoryExceeded):
+            extract_pdf_pages(self.pdf_path, workers=1)
+
+    def test_release_page_keeps_other_pages_text_maps(self):
+        with pdfplumber.open(self.pdf_path) as pdf:
+            first, second = pdf.pages[:2]
+            first.get_textmap()
+            second.get_textmap()
+
+            release_page(first)
+
+            self.assertEqual(first.get_textmap.cache_info().currsize, 0)
+            self.assertEqual(second.get_textmap.cache_info().currsize, 1)
+
+    @override_settings(OCR_ADAPTIVE_RESOLUTION=False)
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_mixed_page_ocr_drops_words_of_the_native_text(self, mock_ocr):
+        pdf = canvas.Canvas(self.pdf_path, pagesize=(300, 300))
+        pdf.drawString(10, 280, "City Hospital Lab Report")
+        pdf.drawImage(ImageReader(Image.new("RGB", (200, 200), "white")), 20, 20, 250, 250)
+        pdf.showPage()
+        pdf.save()
+
+        with pdfplumber.open(self.pdf_path) as document:
+            header = document.pages[0].extract_words()[0]
+        left, top = int(header["x0"] * 300 / 72), int(header["top"] * 300 / 72)
+        mock_ocr.return_value = "\n".join([
+            "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext",
+            f"5\t1\t1\t1\t1\t1\t{left}\t{top}\t40\t30\t90\tCity",
+            "5\t1\t2\t1\t1\t1\t200\t600\t80\t30\t90\tPulse",
+        ])
+
+        page = extract_pdf_pages(self.pdf_path, workers=1)[0]
+
+        self.assertEqual(page["probe"], MIXED)
+        self.assertEqual(page_text(page), "City Hospital Lab Report\nPulse")
+
+    def test_rasterizer_backends_render_same_pixels(self):
+        make_scanned_pdf(self.pdf_path, [144, 216], table_pages=[1])
+
+        with open_rasterizer(self.pdf_path, backend="pdfplumber") as plumber, \
+                open_rasterizer(self.pdf_path, backend="pdfium") as pdfium:
+            for index in (0, 1):
+                expected = plumber.render(index, 150)
+                image = pdfium.render(index, 150)
+                self.assertEqual(image.shape, expected.shape)
+                self.assertEqual(image.dtype, np.uint8)
+                self.assertTrue(np.array_equal(image, expected))
+
+        with self.assertRaises(ImproperlyConfigured):
+            open_rasterizer(self.pdf_path, backend="ghostscript")
+
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_pages_past_the_deadline_are_skipped(self, mock_ocr):
+        path = f"{TEMP_MEDIA_ROOT}/scanned.pdf"
+        make_scanned_pdf(path, [144, 216, 288])
+        deadline = Deadline(60)
+
+        def ocr_then_expire(image, config="", timeout=0):
+            deadline.expires_at = time.time() - 1
+            return fake_tsv("Pulse 80 bpm")
+
+        mock_ocr.side_effect = ocr_then_expire
+        layer = make_layer(extract_pdf_pages(path, workers=1, deadline=deadline))
+
+        self.assertEqual([page["source"] for page in layer["pages"]], ["ocr", "skipped", "skipped"])
+        self.assertEqual(layer["pages"][1]["reason"], "deadline")
+        self.assertTrue(layer_is_partial(layer))
+        self.assertGreater(mock_ocr.call_args.kwargs["timeout"], 0)
+
+    @patch(
+        "reports.services.ocr_engine.pytesseract.image_to_data",
+        side_effect=RuntimeError("Tesseract process timeout"),
+    )
+    def test_tesseract_timeout_raises_deadline_exceeded(self, mock_ocr):
+        with self.assertRaises(DeadlineExceeded):
+            get_ocr_engine().image_to_data(np.zeros((10, 10), dtype=np.uint8), timeout=1)
+
+    @override_settings(OCR_ADAPTIVE_RESOLUTION=True, OCR_RESOLUTION_LADDER=[150, 300], OCR_MIN_CONFIDENCE=80)
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_adaptive_resolution_climbs_on_low_confidence(self, mock_ocr):
+        # Only the 300 dpi render of the 72pt wide first page is read confidently
+        mock_ocr.side_effect = lambda image, config="", timeout=0: fake_tsv(
+            f"width {image.shape[1]}", conf=95 if image.shape[1] >= 290 else 40
+        )
+
+        with open_rasterizer(self.pdf_path) as rasterizer:
+            low = ocr_pdf_page(rasterizer, 0)
+            kept = ocr_pdf_page(rasterizer, 1)
+
+        self.assertEqual(mock_ocr.call_count, 3)
+        self.assertEqual((low[1], kept[1]), (300, 150))
+        self.assertGreaterEqual(int(words_to_text(low[0]).split()[1]), 290)
+
+    @override_settings(
+        OCR_ADAPTIVE_RESOLUTION=True, OCR_RESOLUTION_LADDER=[150, 300],
+        OCR_MIN_CONFIDENCE=80, OCR_MIN_FIELDS=1,
+    )
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_adaptive_resolution_climbs_when_no_fields_found(self, mock_ocr):
+        mock_ocr.side_effect = lambda image, config="", timeout=0: fake_tsv(
+            "Pulse 80 bpm" if image.shape[1] >= 290 else "Pulse 8O bpm"
+        )
+
+        with open_rasterizer(self.pdf_path) as rasterizer:
+            words, resolution = ocr_pdf_page(rasterizer, 0)
+
+        self.assertEqual(mock_ocr.call_count, 2)
+        self.assertEqual(resolution, 300)
+        self.assertEqual(words_to_text(words), "Pulse 80 bpm")
+
+
+class VitalsExtractorTests(SimpleTestCase):
+
+    def test_extracts_all_vitals(self):
+        text = (
+            "Pulse: 72 bpm\n"
+            "Blood Pressure: 130 / 85 mmHg\n"
+            "Respiratory Rate: 16\n"
+            "Body Temperature: 37.5 C\n"
+            "SpO2: 97 %\n"
+            "Blood Glucose (F/R): 95/130\n"
+            "BMI: 23.4"
+        )
+
+        self.assertEqual(extract_vitals(text), {
+            "blood_pressure": "130/85",
+            "heart_rate": "72",
+            "respiratory_rate": "16",
+            "body_temperature": "37.5",
+            "spo2": "97",
+            "fasting_glucose": "95",
+            "random_glucose": "130",
+            "bmi": "23.4",
+        })
+
+    def test_value_must_be_on_keyword_line(self):
+        text = "Blood Pressure: not recorded\nBlood Pressure 120/80"
+
+        self.assertEqual(extract_vitals(text), {"blood_pressure": "120/80"})
+        self.assertEqual(extract_vitals("Blood Pressure:\n120/80"), {})
+
+    def test_long_text_without_values(self):
+        text = "Blood Pressure Pulse Temperature " * 20000
+
+        self.assertEqual(extract_vitals(text), {})
+
+    def test_lab_analytes_from_registry(self):
+        text = "Haemoglobin 11.2 g/dL\nPlatelet Count 210000\nSerum Creatinine: 0.9"
+
+        self.assertEqual(extract_vitals(text), {
+            "hemoglobin": "11.2",
+            "platelet_count": "210000",
+            "serum_creatinine": "0.9",
+        })
+
+
+class AnalyteRegistryTests(SimpleTestCase):
+
+    def test_definitions_are_complete(self):
+        for key, definition in ANALYTES.items():
+            self.assertIn("display_name", definition, key)
+            if definition["aliases"]:
+                self.assertIn(key, VALUE_PATTERNS, key)
+            for output in definition.get("outputs", []):
+                self.assertIn(output, NORMAL_RANGES, key)
+
+
+class VitalsComparatorTests(SimpleTestCase):
+
+    def test_statuses_and_display_names(self):
+        results = compare_vitals(
+            {
+                "blood_pressure": "130/85",
+                "spo2": "97%",
+                "fasting_glucose": "110",
+                "hemoglobin": "12.5",
+                "hiv": "non reactive",
+            },
+            gender="Male",
+        )
+
+        self.assertEqual(
+            [(r["vital"], r["patient_value"], r["status"]) for r in results],
+            [
+                ("Blood Pressure", "130/85", "High"),
+                ("SpO₂", 97, "Normal"),
+                ("Blood Sugar", 110.0, "High"),
+                ("Hemoglobin", 12.5, "Low"),
+                ("HIV", "non reactive", "Normal"),
+            ],
+        )
+        self.assertEqual(results[1]["normal_range"], "95–100%")
+
+
+class QualitativeExtractorTests(SimpleTestCase):
+
+    def test_case_insensitive_and_normalized(self):
+        text = (
+            "Blood Sugar: 110 mg/dL\n"
+            "HIV: Non-Reactive\n"
+            "HBsAg (Australia Antigen): NEGATIVE\n"
+            "URINE SUGAR: Absent"
+        )
+
+        self.assertEqual(extract_qualitative(text), {
+            "hiv": "non reactive",
+            "hbsag": "negative",
+            "urine_sugar": "absent",
+        })
+
+    def test_value_must_follow_keyword(self):
+        self.assertEqual(extract_qualitative("VDRL test performed, result Reactive"), {})
+
+
+class PatientExtractorTests(SimpleTestCase):
+
+    def test_header_fields(self):
+        text = "UHID: CC-1001 Age: 52\nSex: F\nBlood Group: B+\nReport Date: 03/02/2025"
+
+        self.assertEqual(extract_patient_details(text), {
+            "patient_id": "CC-1001",
+            "age": "52",
+            "gender": "Female",
+            "blood_group": "B+",
+            "report_date": "03/02/2025",
+        })
+
+    def test_falls_back_to_full_text(self):
+        text = "Gender: Male\n" + "x" * 50 + "\nPatient ID: P-77"
+
+        details = extract_patient_details(text, header_window=20)
+
+        self.assertEqual(details["gender"], "Male")
+        self.assertEqual(details["patient_id"], "P-77")
+        self.assertEqual(details["age"], "Not Available")
+
+    def test_header_does_not_cut_values(self):
+        text = "Report\nPatient ID: P-12345 Age: 52\nMore"
+
+        details = extract_patient_details(text, header_window=len("Report\nPatient ID: P-12"))
+
+        self.assertEqual(details["patient_id"], "P-12345")
+        self.assertEqual(details["age"], "52")
+
+
+def make_page_image():
+    """A binarized page with two text blocks and a solid logo"""
+    page = np.full((1200, 900), 255, dtype=np.uint8)
+    for y in (100, 150, 200):
+        cv2.putText(page, "Blood Pressure 120/80", (60, y), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3)
+    cv2.putText(page, "Signature", (60, 1000), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 3)
+    cv2.rectangle(page, (700, 40), (850, 160), 0, -1)
+    return page
+
+
+@override_settings(OCR_ENGINE="pytesseract")
+class ImageRegionsTests(SimpleTestCase):
+
+    def test_finds_text_blocks_and_skips_logo(self):
+        regions = find_text_regions(make_page_image())
+
+        self.assertEqual(len(regions), 2)
+        (x, y, width, height), signature = regions
+        self.assertLess(y, 100)
+        self.assertGreater(y + height, 200)
+        self.assertLess(x + width, 700)
+        self.assertGreater(signature[1], 900)
+
+    def test_downscales_only_oversized_images(self):
+        photo = np.zeros((3024, 4032, 3), dtype=np.uint8)
+
+        self.assertEqual(downscale_to_dpi(photo, 200).shape, (1754, 2338, 3))
+        self.assertIs(downscale_to_dpi(photo, 400), photo)
+        self.assertIs(downscale_to_dpi(photo, 0), photo)
+
+    @patch("reports.services.ocr_engine.pytesseract.image_to_data")
+    def test_region_words_in_image_coordinates(self, mock_ocr):
+        mock_ocr.side_effect = lambda image, config="", timeout=0: fake_tsv(f"crop {image.shape[1]}")
+        regions = [(50, 400, 300, 40), (10, 20, 500, 60)]
+
+        words = ocr_image_regions(make_page_image(), regions, workers=2)
+
+        self.assertEqual(words_to_text(words), "crop 300\ncrop 500")
+        self.assertEqual(words[0][3:5], [60, 405])
+        self.assertEqual(words[2][3:5], [20, 25])
+
+    @patch("reports.services.text_extractor.ocr_words")
+    def test_region_threads_are_reused_across_images(self, mock_ocr):
+        threads = []
+        mock_ocr.side_effect = lambda image, config="", deadline=None: threads.append(threading.current_thread()) or []
+        regions = [(0, 0, 10, 10), (20, 20, 10, 10)]
+
+        ocr_image_regions(make_page_image(), regions[:1], workers=2)
+        self.assertIs(threads[0], threading.current_thread())
+
+        ocr_image_regions(make_page_image(), regions, workers=2)
+        ocr_image_regions(make_page_image(), regions, workers=2)
+        self.assertTrue(all(thread.name.startswith("ocr-region") for thread in threads[1:]))
+        self.assertIs(text_extractor.region_executor(), text_extractor.region_executor())
+
+
+class OcrEngineTests(SimpleTestCase):
+
+    @override_settings(OCR_ENGINE="fake", OCR_FAKE_TEXT="Pulse 80 bpm")
+    def test_fake_engine_reads_configured_text(self):
+        path = f"{TEMP_MEDIA_ROOT}/photo.png"
+        cv2.imwrite(path, make_page_image())
+
+        self.assertEqual(get_ocr_engine().name, "fake")
+        self.assertEqual(extract_from_image(path), "Pulse 80 bpm")
+
+    def test_parse_config(self):
+        self.assertEqual(parse_config(""), (3, {}))
+        self.assertEqual(
+            parse_config("--oem 3 --psm 6 -c preserve_interword_spaces=1"),
+            (6, {"preserve_interword_spaces": "1"}),
+        )
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_ocr_engine("cuneiform")
+
+    @skipUnless(tesserocr and "eng" in tesserocr.get_languages()[1], "tesserocr with eng tessdata needed")
+    def test_tesserocr_keeps_one_api_per_thread(self):
+        engine = get_ocr_engine("tesserocr")
+        image = make_page_image()
+
+        self.assertIn("Blood", engine.image_to_data(image, config="--psm 6"))
+        api = engine.api()
+        engine.image_to_data(image)
+        self.assertIs(engine.api(), api)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertIsNot(executor.submit(engine.api).result(), api)
+
+        with self.assertRaises(DeadlineExceeded):
+            engine.image_to_data(image, timeout=0.001)
+        self.assertIn("Blood", engine.image_to_data(image, config="--psm 6", timeout=30))
+
+    @skipUnless(tesserocr and "eng" in tesserocr.get_languages()[1], "tesserocr with eng tessdata needed")
+    def test_tesserocr_variables_do_not_leak_into_later_calls(self):
+        engine = get_ocr_engine("tesserocr")
+        image = make_page_image()
+
+        digits_only = engine.image_to_data(image, config="--psm 6 -c tessedit_char_whitelist=0123456789/")
+        self.assertNotIn("Blood", digits_only)
+        self.assertEqual(engine.api().GetVariableAsString("tessedit_char_whitelist"), "")
+        self.assertIn("Blood", engine.image_to_data(image, config="--psm 6"))
+
+
+class OcrAdmissionTests(SimpleTestCase):
+
+    def test_full_queue_fails_fast(self):
+        settings_override = override_settings(
+            OCR_SLOT_DIR=tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT),
+            OCR_MAX_CONCURRENT=1,
+            OCR_MAX_QUEUED=1,
+        )
+        released = threading.Event()
+
+        def wait_for_slot():
+            with ocr_slot():
+                released.set()
+
+        with settings_override, ThreadPoolExecutor(max_workers=1) as executor:
+            with ocr_slot():
+                waiter = executor.submit(wait_for_slot)
+                while queue_depth()["waiting"] < 1:
+                    time.sleep(0.01)
+
+                self.assertEqual(queue_depth(), {"running": 1, "waiting": 1, "slots": 1, "queue_limit": 1})
+                self.assertTrue(ocr_queue_full())
+                with self.assertRaises(OcrBusy):
+                    with ocr_slot():
+                        pass
+
+            waiter.result(timeout=5)
+            self.assertTrue(released.is_set())
+            self.assertEqual(queue_depth()["running"], 0)
+            self.assertFalse(ocr_queue_full())
+
+    @skipUnless(os.path.exists("/proc/locks"), "needs the kernel lock table")
+    def test_queue_depth_does_not_take_locks(self):
+        with override_settings(OCR_SLOT_DIR=tempfile.mkdtemp(dir=TEMP_MEDIA_ROOT), OCR_MAX_CONCURRENT=2):
+            with ocr_slot():
+                with patch("reports.services.ocr_admission.fcntl.flock") as mock_flock:
+                    self.assertEqual(queue_depth()["running"], 1)
+
+            mock_flock.assert_not_called()
+            self.assertEqual(queue_depth()["running"], 0)
+
+
+class OcrLayerTests(SimpleTestCase):
+
+    def test_tsv_round_trip(self):
+        words = parse_tsv(fake_tsv("Blood Pressure 120/80"))
+        layer = make_layer([ocr_page(1, words), {"index": 0, "source": "text", "text": "Header"}])
+
+        restored = load_layer(dump_layer(layer))
+
+        self.assertEqual(words[0], [1, 1, 1, 10, 5, 8, 8, 90, "Blood"])
+        self.assertEqual(words_to_text(words), "Blood Pressure 120/80")
+        self.assertEqual(layer_text(restored), "Header\nBlood Pressure 120/80")
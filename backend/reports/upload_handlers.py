@@ -0,0 +1,188 @@
+"""
+Upload handler for report files that writes the upload straight to its
+final place in storage, hashing it and checking its type on the way.
+
+Django's default handlers spool large uploads to a temp file which
+FileField.save then copies into MEDIA_ROOT, writing every byte twice.
+"""
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+from .models import MedicalReport
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of each accepted file type
+MAGIC_BYTES = {
+    ".pdf": [b"%PDF-"],
+    ".png": [b"\x89PNG\r\n\x1a\n"],
+    ".jpg": [b"\xff\xd8\xff"],
+    ".jpeg": [b"\xff\xd8\xff"],
+}
+
+# Room for the multipart boundaries and headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class StoredUploadedFile(UploadedFile):
+    """An upload already written to storage under stored_name, with its SHA-256"""
+
+    def __init__(self, file, name, content_type, size, charset, stored_name, content_hash):
+        super().__init__(file, name, content_type, size, charset)
+        self.stored_name = stored_name
+        self.content_hash = content_hash
+
+
+class ReportUploadHandler(FileUploadHandler):
+    """
+    Streams the files of one field ("report" by default) into
+    MedicalReport.file's storage. The upload is stopped as soon as a file is
+    too large, its extension isn't allowed or its first bytes don't match
+    the extension; the reason is left in self.error for the view. Storages
+    without local paths fall back to Django's default handlers.
+    """
+
+    FIELD_NAME = "report"
+
+    def __init__(self, request=None, max_size_bytes: int = None, allowed_extensions=None,
+                 field_name: str = FIELD_NAME, max_files: int = 1):
+        super().__init__(request)
+        self.max_size_bytes = max_size_bytes
+        self.allowed_extensions = allowed_extensions or list(MAGIC_BYTES)
+        self.field_name = field_name
+        self.max_files = max_files
+        self.error = None
+        self.active = False
+        self.destination = None
+        self.stored_name = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # The whole body is bigger than the files allowed: refuse before reading it
+        max_body_bytes = (self.max_size_bytes or 0) * self.max_files + MULTIPART_OVERHEAD_BYTES
+        if self.max_size_bytes and content_length > max_body_bytes:
+            self.error = self.size_error()
+            logger.info(f"Upload rejected before streaming: {self.error}")
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.active = False
+
+        if field_name != self.field_name:
+            return
+
+        self.extension = Path(file_name).suffix.lower()
+        if self.extension not in self.allowed_extensions:
+            self.reject("Unsupported file type. Allowed: PDF, JPG, JPEG, PNG")
+
+        field = MedicalReport._meta.get_field("file")
+        try:
+            self.open_destination(field.storage, field.generate_filename(None, file_name))
+        except NotImplementedError:
+            return
+
+        self.active = True
+        self.digest = hashlib.sha256()
+        self.size = 0
+        raise StopFutureHandlers()
+
+    def open_destination(self, storage, name: str):
+        self.destination, self.stored_name = create_stored_file(storage, name)
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+
+        if start == 0 and not matches_magic_bytes(self.extension, raw_data):
+            self.reject("File contents do not match its type")
+
+        self.size += len(raw_data)
+        if self.max_size_bytes and self.size > self.max_size_bytes:
+            self.reject(self.size_error())
+
+        self.digest.update(raw_data)
+        self.destination.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+
+        self.active = False
+        self.destination.flush()
+        self.destination.seek(0)
+
+        stored = StoredUploadedFile(
+            file=self.destination,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            stored_name=self.stored_name,
+            content_hash=self.digest.hexdigest(),
+        )
+        # The finished file belongs to the request now
+        self.destination = None
+        self.stored_name = None
+        return stored
+
+    def upload_interrupted(self):
+        self.discard()
+
+    def size_error(self) -> str:
+        return f"File size exceeds {self.max_size_bytes // (1024 * 1024)} MB limit"
+
+    def reject(self, error: str):
+        self.error = error
+        self.discard()
+        logger.info(f"Upload rejected while streaming: {error}")
+        raise StopUpload(connection_reset=True)
+
+    def discard(self):
+        """Remove a partially written file"""
+        self.active = False
+        if self.destination is not None and self.stored_name is not None:
+            self.destination.close()
+            MedicalReport._meta.get_field("file").storage.delete(self.stored_name)
+            self.destination = None
+            self.stored_name = None
+
+
+def create_stored_file(storage, name: str):
+    """
+    Create a new, empty file in storage under an available name based on name.
+    The file is created exclusively, so concurrent uploads never share a name.
+    Returns (open file, stored name); raises NotImplementedError for storages
+    without local paths.
+    """
+    while True:
+        stored_name = storage.get_available_name(name)
+        path = storage.path(stored_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            return open(path, "xb+"), stored_name
+        except FileExistsError:
+            continue
+
+
+def matches_magic_bytes(extension: str, head: bytes) -> bool:
+    """Whether the first bytes of a file fit its extension"""
+    magics = MAGIC_BYTES.get(extension)
+    return not magics or any(head.startswith(magic) for magic in magics)
+
+
+def delete_stored_upload(file):
+    """Remove a streamed upload that no report ended up referencing"""
+    if isinstance(file, StoredUploadedFile):
+        file.close()
+        storage = MedicalReport._meta.get_field("file").storage
+        if not MedicalReport.objects.filter(file=file.stored_name).exists():
+            storage.delete(file.stored_name)
@@ -1,8 +1,29 @@
 from django.urls import path
-from .views import UploadReportView, DownloadReportPDF, ReportHistoryView, DashboardView
+from .views import (
+    UploadReportView,
+    UploadBatchView,
+    UploadSessionView,
+    UploadSessionStatusView,
+    UploadChunkView,
+    FinalizeUploadView,
+    PrecheckReportView,
+    ReportStatusView,
+    ReprocessReportView,
+    DownloadReportPDF,
+    ReportHistoryView,
+    DashboardView,
+)
 
 urlpatterns = [
     path("upload/", UploadReportView.as_view()),
+    path("upload-batch/", UploadBatchView.as_view()),
+    path("upload/sessions/", UploadSessionView.as_view()),
+    path("upload/sessions/<uuid:upload_id>/", UploadSessionStatusView.as_view()),
+    path("upload/sessions/<uuid:upload_id>/chunks/<int:index>/", UploadChunkView.as_view()),
+    path("upload/sessions/<uuid:upload_id>/finalize/", FinalizeUploadView.as_view()),
+    path("precheck/", PrecheckReportView.as_view()),
+    path("<int:report_id>/status/", ReportStatusView.as_view()),
+    path("<int:report_id>/reprocess/", ReprocessReportView.as_view()),
     path("download/<int:report_id>/", DownloadReportPDF.as_view()),
     path("history/", ReportHistoryView.as_view()),
     path("dashboard/", DashboardView.as_view()),
@@ -1,39 +1,156 @@
-from pathlib import Path
 import os
-import tempfile
+import re
+import json
+import socket
 import logging
+from functools import partial
 
 from django.conf import settings
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.utils import timezone
-from django.core.files import File
+from django.db import transaction
 
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework import status
 
-from .models import MedicalReport
-from .services.text_extractor import extract_text
-from .services.text_normalizer import normalize_text
-from .services.patient_extractor import extract_patient_details
-from .services.vitals_extractor import extract_vitals
-from .services.vitals_comparator import compare_vitals
-from .services.observation_engine import generate_observations
-from .services.conclusion_engine import generate_conclusion
-from .services.pdf_generator import generate_summary_pdf
-from .services.cleanup_report import cleanup_old_reports
+from .models import MedicalReport, ReportJob, UploadSession
+from .services.batch_processor import start_batch
+from .services.ocr_admission import ocr_queue_full
+from .services.job_queue import enqueue_report, record_completed, start_inline_job
+from .services.report_processor import (
+    ANALYSIS_FIELDS,
+    build_report_result,
+    cleanup_user_reports,
+    finish_copied_report,
+    generate_report_pdf,
+    reevaluate_report,
+    upload_source,
+)
+from .services.deduplication import compute_content_hash, find_processed_duplicate, reuse_processed_results
+from .services.chunked_upload import (
+    ChunkError,
+    assemble_upload,
+    create_session,
+    discard_chunks,
+    missing_chunks,
+    received_chunks,
+    write_chunk,
+)
+from .upload_handlers import ReportUploadHandler, StoredUploadedFile, delete_stored_upload
 
 logger = logging.getLogger(__name__)
 
 
+def ocr_busy_response():
+    response = Response(
+        {"error": "Report processing is busy. Please try again shortly."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response["Retry-After"] = str(settings.OCR_RETRY_AFTER_SECONDS)
+    return response
+
+
+def create_uploaded_report(user, file):
+    """Create the report for an upload, storing the file unless already streamed into storage"""
+    if isinstance(file, StoredUploadedFile):
+        content_hash = file.content_hash
+        stored_file = file.stored_name
+    else:
+        content_hash = compute_content_hash(file)
+        stored_file = file
+
+    return MedicalReport.objects.create(
+        user=user,
+        file=stored_file,
+        original_filename=file.name,
+        file_size_kb=round(file.size / 1024, 2),
+        content_hash=content_hash,
+    )
+
+
+def batch_source(file):
+    """
+    A batch upload as its background processing reads it: the in-memory
+    buffer, or None to read the stored report file. Django's temporary
+    upload files are deleted with the request, which the batch may outlive.
+    """
+    if isinstance(file, StoredUploadedFile) or hasattr(file, "temporary_file_path"):
+        return None
+    return upload_source(file)
+
+
+def queue_uploaded_report(request, file, session=None):
+    """
+    Store a validated upload as a report and queue it for processing, or
+    answer straight away from an identical report that was already processed.
+    session is the resumable upload the file was assembled from, if any.
+    """
+    try:
+        # Store the file and queue it; OCR and extraction run in the worker
+        with transaction.atomic():
+            report = create_uploaded_report(request.user, file)
+            if session is not None:
+                session.report = report
+                session.save(update_fields=["report"])
+
+            # Identical file already processed: copy its results, skip OCR.
+            # Done in the same transaction so a done job always has results.
+            source = find_processed_duplicate(report.content_hash, exclude_id=report.id)
+            if source is not None:
+                reuse_processed_results(report, source)
+                job = record_completed(report)
+            else:
+                job = enqueue_report(report)
+        logger.info(f"Report created with ID {report.id} for user {request.user.username}")
+
+        # Answer the duplicate immediately; only its PDF may still be missing
+        if source is not None:
+            logger.info(f"Report {report.id} reuses results of identical report {source.id}")
+            finish_copied_report(report)
+            return Response(
+                {
+                    "success": True,
+                    "message": "Report processed successfully",
+                    "status": job.status,
+                    **build_report_result(report),
+                },
+                status=status.HTTP_201_CREATED,
+            )
+
+        return Response(
+            {
+                "success": True,
+                "message": "Report queued for processing",
+                "report_id": report.id,
+                "status": job.status,
+                "status_url": request.build_absolute_uri(
+                    f"/api/reports/{report.id}/status/"
+                ),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    except Exception as e:
+        logger.error(f"Report upload error: {str(e)}", exc_info=True)
+        delete_stored_upload(file)
+        if session is not None:
+            # Rolled back with the report: the session has no report yet
+            session.report = None
+        return Response(
+            {"error": "Failed to upload report. Please try again."}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @method_decorator(csrf_exempt, name="dispatch")
 class UploadReportView(APIView):
     """
-    Upload and process medical reports (PDF, JPG, JPEG, PNG)
-    Extracts patient details, vitals, generates observations and conclusions
+    Upload medical reports (PDF, JPG, JPEG, PNG) for processing
+    The file is stored and queued; poll the status endpoint for results
     """
     permission_classes = [IsAuthenticated]
 
@@ -41,10 +158,24 @@ class UploadReportView(APIView):
     MAX_FILE_SIZE_MB = 10
 
     def post(self, request):
-        """Process uploaded medical report file"""
-        
-        # Validate file presence
+        """Store uploaded medical report file and queue it for processing"""
+
+        # Stream the file straight into storage, checking it as it arrives
+        handler = ReportUploadHandler(
+            request._request,
+            max_size_bytes=self.MAX_FILE_SIZE_MB * 1024 * 1024,
+            allowed_extensions=self.ALLOWED_EXTENSIONS,
+        )
+        request._request.upload_handlers = [handler, *request._request.upload_handlers]
+
         file = request.FILES.get("report")
+        if handler.error:
+            return Response(
+                {"error": handler.error},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Validate file presence
         if not file:
             return Response(
                 {"error": "No report file provided"}, 
@@ -65,125 +196,496 @@ class UploadReportView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        return queue_uploaded_report(request, file)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class UploadBatchView(APIView):
+    """
+    Upload several medical reports at once and process them right away
+    Results are streamed back as newline-delimited JSON, one line per file
+    in the order they finish, then a summary line
+    """
+    permission_classes = [IsAuthenticated]
+
+    MAX_FILES = 10
+
+    def post(self, request):
+        """Store the uploaded files and process them concurrently"""
+
+        # Refuse before reading the files when the node can't take more OCR
+        if ocr_queue_full():
+            return ocr_busy_response()
+
+        max_size_bytes = UploadReportView.MAX_FILE_SIZE_MB * 1024 * 1024
+        handler = ReportUploadHandler(
+            request._request,
+            max_size_bytes=max_size_bytes,
+            allowed_extensions=UploadReportView.ALLOWED_EXTENSIONS,
+            field_name="reports",
+            max_files=self.MAX_FILES,
+        )
+        request._request.upload_handlers = [handler, *request._request.upload_handlers]
+
+        files = request.FILES.getlist("reports")
+        if handler.error:
+            for file in files:
+                delete_stored_upload(file)
+            return Response(
+                {"error": handler.error, "filename": handler.file_name},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        error = self._validate(files, max_size_bytes)
+        if error:
+            for file in files:
+                delete_stored_upload(file)
+            return Response(
+                {"error": error},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        worker_id = f"batch:{socket.gethostname()}:{os.getpid()}"
+        finished, items = [], []
+
         try:
-            # Create medical report record
-            report = MedicalReport.objects.create(
-                user=request.user,
-                file=file,
-                original_filename=file.name,
-                file_size_kb=round(file.size / 1024, 2),
+            with transaction.atomic():
+                for file in files:
+                    report = create_uploaded_report(request.user, file)
+                    duplicate = find_processed_duplicate(report.content_hash, exclude_id=report.id)
+                    if duplicate is not None:
+                        # Copied in the same transaction so a done job always has results
+                        reuse_processed_results(report, duplicate)
+                        finished.append(record_completed(report))
+                    else:
+                        items.append((start_inline_job(report, worker_id), batch_source(file)))
+
+            for job in finished:
+                finish_copied_report(job.report, cleanup=False)
+        except Exception as e:
+            logger.error(f"Report batch upload error: {str(e)}", exc_info=True)
+            for file in files:
+                delete_stored_upload(file)
+            return Response(
+                {"error": "Failed to upload reports. Please try again."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-            logger.info(f"Report created with ID {report.id} for user {request.user.username}")
 
-            # Extract and normalize text
-            raw_text = extract_text(report.file.path)
-            text = normalize_text(raw_text)
+        logger.info(f"Batch of {len(files)} reports created for user {request.user.username}")
 
-            # Extract patient details
-            patient_details = extract_patient_details(text)
-            patient_details = {k: v or "Not Available" for k, v in patient_details.items()}
+        # Once for the whole batch rather than after every report, keeping
+        # at least the batch's own reports
+        last_report = (items[-1][0] if items else finished[-1]).report
+        cleanup = partial(cleanup_user_reports, last_report, keep=len(files))
 
-            # Extract vitals
-            vitals = extract_vitals(text)
-            
-            # Compare vitals with normal ranges
-            comparison_table = compare_vitals(
-                vitals=vitals,
-                gender=patient_details.get("gender"),
+        if items:
+            # Processing runs apart from the response, so a client that
+            # disconnects doesn't stop it half way
+            pending = start_batch(items, on_finished=cleanup)
+        else:
+            cleanup()
+            pending = None
+
+        return StreamingHttpResponse(
+            self._stream_results(request, finished, pending, len(files)),
+            content_type="application/x-ndjson",
+        )
+
+    def _validate(self, files, max_size_bytes):
+        if not files:
+            return "No report files provided"
+
+        if len(files) > self.MAX_FILES:
+            return f"At most {self.MAX_FILES} files can be uploaded at once"
+
+        for file in files:
+            if file.size > max_size_bytes:
+                return f"{file.name}: File size exceeds {UploadReportView.MAX_FILE_SIZE_MB} MB limit"
+            if not any(file.name.lower().endswith(ext) for ext in UploadReportView.ALLOWED_EXTENSIONS):
+                return f"{file.name}: Unsupported file type. Allowed: PDF, JPG, JPEG, PNG"
+
+        return None
+
+    def _stream_results(self, request, finished, pending, count):
+        counts = {ReportJob.STATUS_DONE: 0, ReportJob.STATUS_QUEUED: 0, ReportJob.STATUS_FAILED: 0}
+
+        # Identical files already processed answer first, without OCR
+        for job in finished:
+            counts[job.status] += 1
+            yield self._result_line(request, job)
+
+        while pending is not None and (job := pending.get()) is not None:
+            counts[job.status] += 1
+            yield self._result_line(request, job)
+
+        yield json.dumps({"success": True, "done": True, "count": count, **counts}) + "\n"
+
+    def _result_line(self, request, job):
+        report = job.report
+        data = {
+            "filename": report.original_filename,
+            "report_id": report.id,
+            "status": job.status,
+        }
+
+        if job.status == ReportJob.STATUS_DONE:
+            data.update(build_report_result(report))
+        elif job.status == ReportJob.STATUS_QUEUED:
+            # Failed once; the background worker retries it
+            data["status_url"] = request.build_absolute_uri(f"/api/reports/{report.id}/status/")
+        else:
+            data["error"] = "Failed to process report. Please try again."
+
+        return json.dumps({"success": job.status != ReportJob.STATUS_FAILED, **data}) + "\n"
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class UploadSessionView(APIView):
+    """
+    Start a resumable upload for a report too large to send reliably at once
+    The file is then PUT in numbered chunks and finalized into a report
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Create an upload session and return its chunk layout"""
+
+        filename = str(request.data.get("filename", "")).strip()
+
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "File size is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if size <= 0 or size > UploadReportView.MAX_FILE_SIZE_MB * 1024 * 1024:
+            return Response(
+                {"error": f"File size exceeds {UploadReportView.MAX_FILE_SIZE_MB} MB limit"},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            # Generate AI observations and conclusions
-            observations = generate_observations(comparison_table)
-            final_conclusion = generate_conclusion(comparison_table)
+        if not any(filename.lower().endswith(ext) for ext in UploadReportView.ALLOWED_EXTENSIONS):
+            return Response(
+                {"error": "Unsupported file type. Allowed: PDF, JPG, JPEG, PNG"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            # Calculate BMI if available
-            bmi = None
-            try:
-                bmi_value = vitals.get("bmi")
-                if bmi_value:
-                    bmi = round(float(bmi_value), 1)
-            except (ValueError, TypeError):
-                pass
-
-            # Calculate BMI from weight and height if not extracted
-            if bmi is None:
-                try:
-                    weight = float(patient_details.get("weight", 0))
-                    height_cm = float(patient_details.get("height", 0))
-                    if weight > 0 and height_cm > 0:
-                        height_m = height_cm / 100
-                        bmi = round(weight / (height_m ** 2), 1)
-                except (ValueError, TypeError, ZeroDivisionError):
-                    pass
-
-            # Extract respiratory rate
-            respiratory_rate = None
-            try:
-                rr_value = vitals.get("respiratory_rate")
-                if rr_value:
-                    respiratory_rate = float(rr_value)
-            except (ValueError, TypeError):
-                pass
-
-            # Save all extracted data
-            report.extracted_text = text
-            report.patient_details = patient_details
-            report.vitals = vitals
-            report.comparison_table = comparison_table
-            report.key_observations = observations
-            report.final_conclusion = final_conclusion
-            report.bmi = bmi
-            report.respiratory_rate = respiratory_rate
-            report.save()
-
-            # Generate PDF summary
-            pdf_generated = False
-            try:
-                with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-                    generate_summary_pdf(report, tmp.name)
-                    tmp.seek(0)
-                    
-                    pdf_filename = f"Medical_Report_Summary_{report.id}.pdf"
-                    report.summary_pdf.save(pdf_filename, File(tmp), save=True)
-                    pdf_generated = True
-                    logger.info(f"PDF generated successfully for report {report.id}")
-                    
-                    # Clean up temp file
-                    try:
-                        os.unlink(tmp.name)
-                    except Exception as e:
-                        logger.warning(f"Failed to delete temp file: {e}")
-                        
-            except Exception as e:
-                logger.error(f"PDF generation failed for report {report.id}: {str(e)}")
-                # Continue without PDF - it's not critical
-
-            # Cleanup old reports (keep last 6)
-            try:
-                cleanup_old_reports(request.user)
-            except Exception as e:
-                logger.warning(f"Cleanup failed: {str(e)}")
+        session = create_session(request.user, filename, size)
+        logger.info(f"Upload session {session.id} started for user {request.user.username}")
 
-            # Build response
-            response_data = {
+        return Response(
+            {
                 "success": True,
-                "message": "Report processed successfully",
-                "report_id": report.id,
-                "bmi": bmi,
-                "respiratory_rate": respiratory_rate,
-                "final_conclusion": final_conclusion,
-                "patient_details": patient_details,
-                "vitals": vitals,
-                "key_observations": observations,
-                "pdf_generated": pdf_generated,
-            }
+                "upload_id": str(session.id),
+                "chunk_size": session.chunk_size,
+                "total_chunks": session.total_chunks,
+                "upload_url": request.build_absolute_uri(
+                    f"/api/reports/upload/sessions/{session.id}/"
+                ),
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+def get_upload_session(request, upload_id):
+    try:
+        return UploadSession.objects.get(id=upload_id, user=request.user)
+    except UploadSession.DoesNotExist:
+        raise Http404("Upload not found or you don't have permission to access it")
+
+
+class UploadSessionStatusView(APIView):
+    """
+    Get which chunks of a resumable upload the server already holds
+    Clients resume by sending only the missing chunks
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        """Return received and missing chunk indexes"""
+
+        session = get_upload_session(request, upload_id)
+
+        return Response(
+            {
+                "success": True,
+                "upload_id": str(session.id),
+                "chunk_size": session.chunk_size,
+                "total_chunks": session.total_chunks,
+                "received_chunks": received_chunks(session),
+                "missing_chunks": missing_chunks(session),
+                "report_id": session.report_id,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class UploadChunkView(APIView):
+    """
+    Receive one chunk of a resumable upload as the raw request body
+    Chunks can arrive in any order; sending one again replaces it
+    """
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, upload_id, index):
+        """Stream the chunk to disk"""
+
+        session = get_upload_session(request, upload_id)
+
+        if session.report_id is not None:
+            return Response(
+                {"error": "Upload has already been finalized"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+            write_chunk(session, index, request.stream, length)
+        except ChunkError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {"success": True, "index": index, "received": length},
+            status=status.HTTP_200_OK,
+        )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class FinalizeUploadView(APIView):
+    """
+    Join the chunks of a resumable upload and process it like a direct upload
+    Finalizing again returns the report already created
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        """Assemble the file and queue it for processing"""
+
+        with transaction.atomic():
+            session = get_upload_session(request, upload_id)
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+
+            if session.report_id is not None:
+                return Response(
+                    {
+                        "success": True,
+                        "report_id": session.report_id,
+                        "status": session.report.job.status,
+                        "status_url": request.build_absolute_uri(
+                            f"/api/reports/{session.report_id}/status/"
+                        ),
+                    },
+                    status=status.HTTP_200_OK,
+                )
+
+            missing = missing_chunks(session)
+            if missing:
+                return Response(
+                    {"error": "Upload is incomplete", "missing_chunks": missing},
+                    status=status.HTTP_409_CONFLICT
+                )
 
-            return Response(response_data, status=status.HTTP_201_CREATED)
+            try:
+                file = assemble_upload(session)
+            except ChunkError as e:
+                return Response(
+                    {"error": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            response = queue_uploaded_report(request, file, session=session)
+
+        file.close()
+        # Chunks go only once the report is committed, so a failed finalize
+        # can be retried without uploading them again
+        if UploadSession.objects.filter(pk=session.pk, report__isnull=False).exists():
+            discard_chunks(session)
+        return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class PrecheckReportView(APIView):
+    """
+    Check whether a report is already known before uploading it
+    Clients send the SHA-256 and size of the file; on a match the report is
+    created from the stored results and the file never has to be sent
+    """
+    permission_classes = [IsAuthenticated]
+
+    SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+    def post(self, request):
+        """Create a report from an identical processed one, if the user has one"""
+
+        digest = str(request.data.get("sha256", "")).strip().lower()
+        filename = str(request.data.get("filename", "")).strip()
+
+        if not self.SHA256_PATTERN.match(digest):
+            return Response(
+                {"error": "A valid SHA-256 hex digest is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "File size is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if size <= 0 or size > UploadReportView.MAX_FILE_SIZE_MB * 1024 * 1024:
+            return Response(
+                {"error": f"File size exceeds {UploadReportView.MAX_FILE_SIZE_MB} MB limit"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not any(filename.lower().endswith(ext) for ext in UploadReportView.ALLOWED_EXTENSIONS):
+            return Response(
+                {"error": "Unsupported file type. Allowed: PDF, JPG, JPEG, PNG"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            # Only the user's own reports: a digest alone is not proof the
+            # client actually holds the file.
+            source = find_processed_duplicate(digest, user=request.user)
+
+            if source is None or source.file_size_kb != round(size / 1024, 2):
+                return Response(
+                    {"success": True, "exists": False},
+                    status=status.HTTP_200_OK
+                )
+
+            with transaction.atomic():
+                report = MedicalReport.objects.create(
+                    user=request.user,
+                    file=source.file.name,
+                    original_filename=filename,
+                    file_size_kb=source.file_size_kb,
+                    content_hash=digest,
+                )
+                reuse_processed_results(report, source)
+                job = record_completed(report)
+            logger.info(f"Report {report.id} created from pre-check match with report {source.id}")
+
+            finish_copied_report(report)
+
+            return Response(
+                {
+                    "success": True,
+                    "exists": True,
+                    "message": "Report processed successfully",
+                    "status": job.status,
+                    **build_report_result(report),
+                },
+                status=status.HTTP_201_CREATED,
+            )
+
+        except Exception as e:
+            logger.error(f"Report pre-check error: {str(e)}", exc_info=True)
+            return Response(
+                {"error": "Failed to check report. Please upload the file instead."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class ReportStatusView(APIView):
+    """
+    Get the processing status of an uploaded report
+    Includes the extracted results once processing is done
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, report_id):
+        """Return queue state and, when finished, the report results"""
+
+        try:
+            report = MedicalReport.objects.select_related("job").get(
+                id=report_id,
+                user=request.user
+            )
+        except MedicalReport.DoesNotExist:
+            raise Http404("Report not found or you don't have permission to access it")
+
+        try:
+            job = report.job
+        except ReportJob.DoesNotExist:
+            job = None
+
+        if job is not None:
+            job_status = job.status
+        elif report.extracted_text is not None:
+            # Processed inline before the job queue existed
+            job_status = ReportJob.STATUS_DONE
+        else:
+            job_status = "unknown"
+
+        data = {
+            "success": True,
+            "report_id": report.id,
+            "status": job_status,
+            "attempts": job.attempts if job else 0,
+        }
+
+        if job_status == ReportJob.STATUS_DONE:
+            data.update(build_report_result(report))
+        elif job_status == ReportJob.STATUS_FAILED:
+            data["error"] = "Failed to process report. Please try again."
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ReprocessReportView(APIView):
+    """
+    Re-run extraction for a processed report from its stored text
+    Refreshes vitals, comparison, observations, conclusion and the PDF without OCR
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, report_id):
+        """Re-evaluate a report with the current extractors and ranges"""
+
+        try:
+            report = MedicalReport.objects.get(
+                id=report_id,
+                user=request.user
+            )
+        except MedicalReport.DoesNotExist:
+            raise Http404("Report not found or you don't have permission to access it")
+
+        if report.extracted_text is None:
+            return Response(
+                {"error": "Report has not been processed yet"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        try:
+            reevaluate_report(report)
+            report.save(update_fields=ANALYSIS_FIELDS)
+            generate_report_pdf(report)
+            logger.info(f"Report {report.id} reprocessed from stored text")
+
+            return Response(
+                {
+                    "success": True,
+                    "message": "Report reprocessed successfully",
+                    **build_report_result(report),
+                },
+                status=status.HTTP_200_OK,
+            )
 
         except Exception as e:
-            logger.error(f"Report processing error: {str(e)}", exc_info=True)
+            logger.error(f"Report reprocessing error: {str(e)}", exc_info=True)
             return Response(
-                {"error": "Failed to process report. Please try again."}, 
+                {"error": "Failed to reprocess report. Please try again."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 